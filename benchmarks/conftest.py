@@ -0,0 +1,159 @@
+"""
+Shared fixtures for the benchmarks
+
+The corpus is synthesized locally on first use: sine and noise WAV files of
+a few lengths, sample rates and channel layouts, plus FLAC and MP3 copies
+encoded with libgroove. It is cached in `$GROOVE_BENCH_CORPUS`, by default
+a directory in the system temp dir.
+
+Run with pytest-benchmark, for machine readable results use:
+
+    py.test benchmarks --benchmark-json=benchmarks.json
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+from array import array
+import math
+import os
+import tempfile
+import wave
+
+import pytest
+
+import groove
+
+
+CORPUS_DIR = os.environ.get(
+    'GROOVE_BENCH_CORPUS',
+    os.path.join(tempfile.gettempdir(), 'groove-bench-corpus'),
+)
+
+# name: (signal, seconds, sample rate, channels)
+SPECS = {
+    'sine-10s-44k-mono': ('sine', 10, 44100, 1),
+    'sine-10s-48k-stereo': ('sine', 10, 48000, 2),
+    'noise-10s-44k-stereo': ('noise', 10, 44100, 2),
+    'noise-10s-48k-5.1': ('noise', 10, 48000, 6),
+    'sine-120s-44k-stereo': ('sine', 120, 44100, 2),
+}
+
+# extension: (format short name, codec short name)
+ENCODINGS = {
+    'flac': ('flac', 'flac'),
+    'mp3': ('mp3', 'libmp3lame'),
+}
+
+
+def _samples(signal, rate, channels):
+    """One second of interleaved s16 samples, it repeats seamlessly"""
+    if signal == 'noise':
+        noise = array('h')
+        noise.frombytes(os.urandom(rate * channels * 2))
+        return noise
+
+    # 440 whole periods per second, -6 dBFS
+    wave_table = [int(16384 * math.sin(2 * math.pi * 440 * n / rate))
+                  for n in range(rate)]
+    return array('h', [s for s in wave_table for _ in range(channels)])
+
+
+def write_wav(path, signal, seconds, rate, channels):
+    one_second = _samples(signal, rate, channels).tobytes()
+    with wave.open(path, 'wb') as fd:
+        fd.setnchannels(channels)
+        fd.setsampwidth(2)
+        fd.setframerate(rate)
+        for _ in range(seconds):
+            fd.writeframes(one_second)
+
+
+def encode(src, dst, format_short_name, codec_short_name):
+    """Encode `src` to `dst` with libgroove, keeping the audio format"""
+    encoder = groove.Encoder()
+    encoder.format_short_name = format_short_name
+    encoder.codec_short_name = codec_short_name
+    encoder.filename = dst
+
+    with groove.File(src) as gfile:
+        playlist = groove.Playlist()
+        playlist.append(gfile)
+        encoder.target_audio_format.clone(gfile.audio_format())
+        encoder.playlist = playlist
+        try:
+            with open(dst, 'wb') as fd:
+                while True:
+                    try:
+                        buff = encoder.get_buffer(True)
+                    except groove.Buffer.End:
+                        break
+                    fd.write(buff.data)
+                    buff.unref()
+        finally:
+            encoder.playlist = None
+            playlist.clear()
+
+
+def build_corpus():
+    """Generate missing corpus files
+
+    Returns:
+        A dict of `name.ext: path` for every file that could be made
+    """
+    if not os.path.isdir(CORPUS_DIR):
+        os.makedirs(CORPUS_DIR)
+
+    corpus = {}
+    for name, spec in sorted(SPECS.items()):
+        wav = os.path.join(CORPUS_DIR, name + '.wav')
+        if not os.path.exists(wav):
+            write_wav(wav + '.tmp', *spec)
+            os.rename(wav + '.tmp', wav)
+        corpus[name + '.wav'] = wav
+
+        for ext, (fmt, codec) in sorted(ENCODINGS.items()):
+            path = os.path.join(CORPUS_DIR, '%s.%s' % (name, ext))
+            if not os.path.exists(path):
+                try:
+                    encode(wav, path + '.tmp', fmt, codec)
+                except AssertionError:
+                    # libav was built without this codec
+                    continue
+                os.rename(path + '.tmp', path)
+            corpus['%s.%s' % (name, ext)] = path
+    return corpus
+
+
+def corpus_ids():
+    return ['%s.%s' % (name, ext) for name in sorted(SPECS)
+            for ext in ['wav'] + sorted(ENCODINGS)]
+
+
+def audio_seconds(corpus_id):
+    return SPECS[corpus_id.rsplit('.', 1)[0]][1]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def groove_init():
+    groove.init()
+    yield
+    groove.finish()
+
+
+@pytest.fixture(scope='session')
+def corpus():
+    return build_corpus()
+
+
+@pytest.fixture(params=corpus_ids())
+def corpus_file(request, corpus):
+    """Tuple of (corpus id, path), for every file of the corpus"""
+    if request.param not in corpus:
+        pytest.skip('%s could not be encoded' % request.param)
+    return request.param, corpus[request.param]
+
+
+@pytest.fixture
+def short_file(corpus):
+    """A 10 second stereo MP3, or WAV without MP3 support"""
+    name = 'sine-10s-48k-stereo'
+    return corpus.get(name + '.mp3', corpus[name + '.wav'])
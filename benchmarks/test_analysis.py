@@ -0,0 +1,54 @@
+"""
+Benchmark LoudnessDetector and Fingerprinter
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+import groove
+
+from conftest import SPECS
+
+
+LONG = 'sine-120s-44k-stereo'
+
+
+def analyze(path, detector):
+    with groove.File(path) as gfile:
+        playlist = groove.Playlist()
+        playlist.append(gfile)
+        detector.playlist = playlist
+        try:
+            return list(detector)
+        finally:
+            detector.playlist = None
+            playlist.clear()
+
+
+@pytest.fixture
+def long_file(corpus):
+    return corpus.get(LONG + '.mp3', corpus[LONG + '.wav'])
+
+
+def test_loudness(benchmark, long_file):
+    benchmark.extra_info['audio_seconds'] = SPECS[LONG][1]
+    infos = benchmark.pedantic(
+        lambda: analyze(long_file, groove.LoudnessDetector()), rounds=3)
+    assert len(infos) == 2
+
+
+def test_fingerprint(benchmark, long_file):
+    benchmark.extra_info['audio_seconds'] = SPECS[LONG][1]
+    infos = benchmark.pedantic(
+        lambda: analyze(long_file, groove.Fingerprinter(base64_encode=False)),
+        rounds=3)
+    assert len(infos) == 1
+
+
+def test_fingerprint_prefix(benchmark, long_file):
+    benchmark.extra_info['audio_seconds'] = 30
+    infos = benchmark.pedantic(
+        lambda: analyze(long_file, groove.Fingerprinter(base64_encode=False,
+                                                        max_duration=30)),
+        rounds=3)
+    assert len(infos) == 1
@@ -0,0 +1,68 @@
+"""
+Benchmark decoding through a Sink and Buffer wrapping
+"""
+from __future__ import absolute_import, unicode_literals
+
+import groove
+from groove._groove import ffi
+
+from conftest import audio_seconds
+
+
+def decode(path):
+    frames = 0
+    with groove.File(path) as gfile:
+        playlist = groove.Playlist()
+        sink = groove.Sink()
+        sink.buffer_size = 8192
+        sink.playlist = playlist
+        playlist.append(gfile)
+        try:
+            while True:
+                try:
+                    buff = sink.get_buffer(True)
+                except groove.Buffer.End:
+                    break
+                frames += buff.frame_count
+                buff.unref()
+        finally:
+            sink.playlist = None
+            playlist.clear()
+    return frames
+
+
+def test_sink_decode(benchmark, corpus_file):
+    corpus_id, path = corpus_file
+    benchmark.extra_info['audio_seconds'] = audio_seconds(corpus_id)
+    frames = benchmark.pedantic(decode, args=(path,), rounds=3)
+    assert frames > 0
+
+
+def test_buffer_wrap(benchmark):
+    objs = [ffi.new('struct GrooveBuffer *') for _ in range(1000)]
+    benchmark.extra_info['buffers'] = len(objs)
+
+    def wrap():
+        for obj in objs:
+            buff, _ = groove.Buffer._from_obj(obj)
+            buff.frame_count
+            buff._obj = None
+
+    benchmark(wrap)
+
+
+def test_buffer_stats(benchmark, short_file):
+    with groove.File(short_file) as gfile:
+        playlist = groove.Playlist()
+        sink = groove.Sink()
+        sink.playlist = playlist
+        playlist.append(gfile)
+        buff = sink.get_buffer(True)
+        try:
+            benchmark.extra_info['frames'] = buff.frame_count
+            stats = benchmark(buff.stats)
+        finally:
+            buff.unref()
+            sink.playlist = None
+            playlist.clear()
+    assert stats.samples > 0
@@ -0,0 +1,32 @@
+"""
+Benchmark encoding throughput
+"""
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+from conftest import ENCODINGS, SPECS, encode
+
+
+@pytest.fixture
+def tmpdir_path():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+@pytest.mark.parametrize('ext', sorted(ENCODINGS))
+def test_encode(benchmark, corpus, tmpdir_path, ext):
+    name = 'sine-10s-48k-stereo'
+    if '%s.%s' % (name, ext) not in corpus:
+        pytest.skip('%s is not supported' % ext)
+
+    benchmark.extra_info['audio_seconds'] = SPECS[name][1]
+    dst = os.path.join(tmpdir_path, 'out.' + ext)
+    fmt, codec = ENCODINGS[ext]
+    benchmark.pedantic(encode, args=(corpus[name + '.wav'], dst, fmt, codec),
+                       rounds=3)
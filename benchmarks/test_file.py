@@ -0,0 +1,27 @@
+"""
+Benchmark opening files and reading tags
+"""
+from __future__ import absolute_import, unicode_literals
+
+import groove
+
+
+def test_open_close(benchmark, corpus_file):
+    _, path = corpus_file
+
+    def open_close():
+        gfile = groove.File(path)
+        gfile.open()
+        gfile.close()
+
+    benchmark(open_close)
+
+
+def test_get_tags(benchmark, short_file):
+    with groove.File(short_file) as gfile:
+        gfile.set_tags(dict(
+            (('TAG%02d' % n).encode(), ('value %d' % n).encode())
+            for n in range(32)
+        ))
+        tags = benchmark(gfile.get_tags)
+    assert len(tags) >= 32
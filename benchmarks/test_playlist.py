@@ -0,0 +1,59 @@
+"""
+Benchmark Playlist operations on a 10k item playlist
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+import groove
+
+
+ITEMS = 10000
+
+
+@pytest.fixture
+def gfile(short_file):
+    with groove.File(short_file) as gfile:
+        yield gfile
+
+
+@pytest.fixture
+def playlist(gfile):
+    playlist = groove.Playlist()
+    # Never decode, only measure list operations
+    playlist.pause()
+    for _ in range(ITEMS):
+        playlist.append(gfile)
+    yield playlist
+    playlist.clear()
+
+
+def test_append(benchmark, gfile):
+    def fill():
+        playlist = groove.Playlist()
+        playlist.pause()
+        for _ in range(ITEMS):
+            playlist.append(gfile)
+        playlist.clear()
+
+    benchmark.pedantic(fill, rounds=5)
+
+
+def test_len(benchmark, playlist):
+    assert benchmark(len, playlist) == ITEMS
+
+
+def test_getitem(benchmark, playlist):
+    benchmark(playlist.__getitem__, ITEMS // 2)
+
+
+def test_getitem_negative(benchmark, playlist):
+    benchmark(playlist.__getitem__, -ITEMS // 4)
+
+
+def test_iter(benchmark, playlist):
+    assert benchmark(lambda: sum(1 for _ in playlist)) == ITEMS
+
+
+def test_reversed(benchmark, playlist):
+    assert benchmark(lambda: sum(1 for _ in reversed(playlist))) == ITEMS
@@ -0,0 +1,41 @@
+"""
+Benchmark handing items to another thread
+"""
+from __future__ import absolute_import, unicode_literals
+
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import pytest
+
+import groove
+from groove._groove import ffi
+
+
+ITEMS = 10000
+
+
+def handoff(q, items):
+    """Put every item from this thread and get them in another"""
+    def consume():
+        for _ in items:
+            q.get()
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    for item in items:
+        q.put(item)
+    thread.join()
+
+
+@pytest.mark.parametrize('make_queue', [queue.Queue, groove.Queue],
+                         ids=['queue.Queue', 'groove.Queue'])
+def test_handoff(benchmark, make_queue):
+    items = [ffi.new('int *', n) for n in range(ITEMS)]
+    q = make_queue()
+    benchmark.extra_info['items'] = ITEMS
+    benchmark.pedantic(handoff, args=(q, items), rounds=5)
@@ -0,0 +1,74 @@
+"""
+Benchmark reusing out-parameter cdata instead of allocating per call
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import sys
+
+import pytest
+
+import groove
+from groove import utils
+from groove._groove import ffi, lib
+
+
+CALLS = 10000
+
+
+@pytest.fixture
+def playlist(short_file):
+    with groove.File(short_file) as gfile:
+        playlist = groove.Playlist()
+        playlist.pause()
+        playlist.append(gfile)
+        yield playlist
+        playlist.clear()
+
+
+def position_new(playlist_obj):
+    pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
+    seconds = ffi.new('double *')
+    lib.groove_playlist_position(playlist_obj, pitem_obj_ptr, seconds)
+    return pitem_obj_ptr[0], float(seconds[0])
+
+
+_scratch = utils.Scratch(ffi, pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
+def position_scratch(playlist_obj):
+    pitem_obj_ptr = _scratch.pitem_ptr
+    seconds = _scratch.seconds
+    lib.groove_playlist_position(playlist_obj, pitem_obj_ptr, seconds)
+    return pitem_obj_ptr[0], float(seconds[0])
+
+
+def allocations_per_call(func, *args):
+    """Number of `ffi.new` calls made by each call of `func`"""
+    count = [0]
+
+    def profile(frame, event, arg):
+        if event == 'c_call' and arg == ffi.new:
+            count[0] += 1
+
+    sys.setprofile(profile)
+    try:
+        for _ in range(CALLS):
+            func(*args)
+    finally:
+        sys.setprofile(None)
+    return count[0] / CALLS
+
+
+@pytest.mark.parametrize('func', [position_new, position_scratch],
+                         ids=['new', 'scratch'])
+def test_out_params(benchmark, playlist, func):
+    benchmark.extra_info['allocations_per_call'] = \
+        allocations_per_call(func, playlist._obj)
+    benchmark(func, playlist._obj)
+
+
+def test_decode_position(benchmark, playlist):
+    benchmark.extra_info['allocations_per_call'] = \
+        allocations_per_call(playlist.decode_position)
+    benchmark(playlist.decode_position)
@@ -4,10 +4,16 @@
 Calculate the fingerprint for a set of audio files
 
 Usage:
-    fingerprint [-v...] [--raw] FILE...
+    fingerprint [-v...] [--raw] [--max-duration SECONDS] FILE...
+    fingerprint [-v...] --store DB [--workers N] FILE...
 
 Options:
     --raw              Print the raw fingerprint, defaults to b64-encoded
+    --max-duration SECONDS
+                       Only fingerprint the start of each file
+    --store DB         Fingerprint in parallel into a database, skipping
+                       files that did not change since the last run
+    --workers N        Number of worker processes, defaults to CPU count
     -v --verbose       Set logging level, repeat to increase verbosity
 """
 from __future__ import print_function, unicode_literals
@@ -17,12 +23,13 @@ import sys
 
 from docopt import docopt
 import groove
+from groove.fingerprint_store import FingerprintStore, fingerprint_library
 
 
 _log = logging.getLogger(__name__)
 
 
-def main(raw, *infiles):
+def main(raw, max_duration, *infiles):
     # Create a playlist
     playlist = groove.Playlist()
 
@@ -33,7 +40,8 @@ def main(raw, *infiles):
         playlist.append(gfile)
 
     # Create the fingerprinter and attach the playlist
-    printer = groove.Fingerprinter(base64_encode=not raw)
+    printer = groove.Fingerprinter(base64_encode=not raw,
+                                   max_duration=max_duration)
     printer.playlist = playlist
 
     # Iterate over the fingerprinter
@@ -53,6 +61,21 @@ def main(raw, *infiles):
     return 0
 
 
+def print_progress(progress):
+    rate = progress.audio_seconds / max(progress.elapsed, 1e-6)
+    print('{0.files_done}/{1} files, {2:.1f}x realtime'.format(
+        progress, progress.files_total - progress.files_skipped, rate))
+
+
+def main_store(db, workers, *infiles):
+    with FingerprintStore(db) as store:
+        result = fingerprint_library(infiles, store, workers,
+                                     progress=print_progress)
+    print('{0.files_done} fingerprinted, {0.files_skipped} unchanged, '
+          '{0.files_failed} failed in {0.elapsed:.1f}s'.format(result))
+    return 0
+
+
 if __name__ == '__main__':
     args = docopt(__doc__)
 
@@ -62,8 +85,18 @@ if __name__ == '__main__':
     }.get(args['--verbose'], logging.DEBUG)
     logging.basicConfig(level=loglvl)
 
+    if args['--store']:
+        workers = args['--workers']
+        sys.exit(main_store(
+            args['--store'],
+            int(workers) if workers is not None else None,
+            *args['FILE']
+        ))
+
     groove.init()
+    max_duration = args['--max-duration']
     sys.exit(main(
         args['--raw'],
+        float(max_duration) if max_duration is not None else None,
         *args['FILE']
     ))
@@ -4,9 +4,14 @@
 Calculate replaygain values for a set of files
 
 Usage:
-    replaygain [-v...] FILE...
+    replaygain [-v...] [--group=BY] [--workers=N] [--track-only] [--tag] FILE...
 
 Options:
+    --group BY         Group files into albums by directory, tags or file
+                       [default: directory]
+    --workers N        Number of worker processes, defaults to CPU count
+    --track-only       Only compute track gain
+    --tag              Write REPLAYGAIN_* tags to the files
     -v --verbose       Set logging level, repeat to increase verbosity
 """
 from __future__ import print_function, unicode_literals
@@ -16,48 +21,27 @@ import sys
 
 from docopt import docopt
 import groove
+from groove.replaygain import analyze_library
 
 
 _log = logging.getLogger(__name__)
 
 
-def loudness_to_replaygain(loudness):
-    """Convert loudness to replaygain value, clamped to (-51.0, 51.0)"""
-    rg = -18.0 - loudness
-    rg = min(max(rg, -51.0), 51.0)
-    return rg
+def main(infiles, group, workers, track_only, tag):
+    _log.debug('Analyzing %d files', len(infiles))
+    results = analyze_library(infiles, by=group, album=not track_only,
+                              workers=workers, tag=tag)
 
-def main(infiles):
-    _log.debug('Creating a playlist and loudness detector')
-    loudness_detector = groove.LoudnessDetector()
-    playlist = groove.Playlist()
+    for album in results:
+        print('\nalbum complete: {0}'.format(album.name))
+        for track in album.tracks:
+            print('{0}\n  suggested gain: {1:.2f}, sample peak: {2}, '
+                  'duration: {3}'.format(track.filename, track.gain,
+                                         track.peak, track.duration))
 
-    _log.debug('Opening files and adding to playlist')
-    for infile in infiles:
-        gfile = groove.File(infile)
-        gfile.open()
-        playlist.append(gfile)
-
-    _log.debug('Attaching playlist to detector')
-    loudness_detector.playlist = playlist
-
-    _log.debug('Processing playlist')
-    for loudness, peak, duration, pitem in loudness_detector:
-        if pitem is None:
-            print('\nAll files complete.')
-        else:
-            print('\nfile complete: {0}\n'.format(pitem.file.filename))
-
-        print('suggested gain: {0:.2f}, sample peak: {1}, duration: {2}'
-            .format(loudness_to_replaygain(loudness), peak, duration))
-
-    _log.debug('Detaching playlist')
-    loudness_detector.playlist = None
-
-    _log.debug('Closing files and clearing playlist')
-    while len(playlist) > 0:
-        playlist[0].file.close()
-        del playlist[0]
+        if album.gain is not None:
+            print('album gain: {0:.2f}, sample peak: {1}, duration: {2}'
+                .format(album.gain, album.peak, album.duration))
 
     return 0
 
@@ -71,7 +55,15 @@ if __name__ == '__main__':
     }.get(args['--verbose'], logging.DEBUG)
     logging.basicConfig(level=loglvl)
 
+    workers = args['--workers']
+    if workers is not None:
+        workers = int(workers)
+
     groove.init()
     sys.exit(main(
-        args['FILE']
+        args['FILE'],
+        args['--group'],
+        workers,
+        args['--track-only'],
+        args['--tag'],
     ))
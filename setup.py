@@ -8,6 +8,9 @@ from setuptools import setup
 
 cffi_modules = [
     'src/groove/_build.py:ffi_groove',
+    'src/groove/_build.py:ffi_fingerprinter',
+    'src/groove/_build.py:ffi_loudness',
+    'src/groove/_build.py:ffi_player',
 ]
 
 packages = [
@@ -24,6 +27,11 @@ if sys.version_info < (3, 4):
         'enum34'
     ]
 
+if sys.version_info < (3, 2):
+    requires += [
+        'futures'
+    ]
+
 with open('src/groove/__init__.py', 'r') as fd:
     version = re.search(r'^__version__\s*=\s*[\'"]([^\'"]*)[\'"]',
                         fd.read(), re.MULTILINE).group(1)
@@ -43,6 +51,9 @@ setup(
     setup_requires=['cffi>=1.4.0'],
     cffi_modules=cffi_modules,
     install_requires=requires,
+    extras_require={
+        'analysis': ['numpy', 'scipy'],
+    },
     zip_safe=False,
     classifiers=(
         'Development Status :: 1 - Planning',
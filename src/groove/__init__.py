@@ -5,15 +5,15 @@ Groove
 
 A thin cffi wrapper around Andrew Kelley's libgroove library.
 """
+import sys
+
 from groove.groove import *
 from groove.audio_format import *
 from groove.buffer import *
 from groove.encoder import *
 from groove.file import *
-from groove.fingerprinter import *
-from groove.loudness import *
-from groove.player import *
 from groove.playlist import *
+from groove.queue import *
 from groove.sink import *
 
 
@@ -22,3 +22,52 @@ __version__ = '0.1.0'
 __version_info__ = (0, 1, 0)
 __author__ = 'kalhartt'
 __license__ = 'MIT'
+
+
+# Names from submodules that load another libgroove library, imported on
+# first access so a process that only decodes or encodes never loads them
+_lazy_modules = {
+    'groove.fingerprinter': [
+        'Fingerprinter',
+        'FingerprinterInfo',
+        'WindowFingerprint',
+        'WindowedFingerprinter',
+    ],
+    'groove.loudness': [
+        'LoudnessDetector',
+        'LoudnessDetectorInfo',
+    ],
+    'groove.player': [
+        'Device',
+        'Player',
+        'PlayerEvent',
+        'PlayerEventDispatcher',
+        'PlayerEventInfo',
+    ],
+}
+
+_lazy_names = dict(
+    (name, module)
+    for module, names in _lazy_modules.items()
+    for name in names
+)
+
+
+if sys.version_info >= (3, 7):
+    import importlib
+
+    def __getattr__(name):
+        module = _lazy_names.get(name)
+        if module is None:
+            raise AttributeError(
+                "module 'groove' has no attribute '%s'" % name)
+        value = getattr(importlib.import_module(module), name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_lazy_names))
+else:
+    from groove.fingerprinter import *
+    from groove.loudness import *
+    from groove.player import *
@@ -166,6 +166,8 @@ int groove_sink_buffer_peek(struct GrooveSink *sink, int block);
 
 int groove_sink_set_gain(struct GrooveSink *sink, double gain);
 
+int groove_sink_get_fill_level(struct GrooveSink *sink);
+
 extern "Python" {
     void groove_sink_callback_flush(struct GrooveSink *);
     void groove_sink_callback_purge(struct GrooveSink *, struct GroovePlaylistItem *);
@@ -180,7 +182,7 @@ struct GrooveQueue {
     void (*cleanup)(struct GrooveQueue*, void *obj);
     void (*put)(struct GrooveQueue*, void *obj);
     void (*get)(struct GrooveQueue*, void *obj);
-    void (*purge)(struct GrooveQueue*, void *obj);
+    int (*purge)(struct GrooveQueue*, void *obj);
 };
 
 struct GrooveQueue *groove_queue_create(void);
@@ -201,6 +203,11 @@ int groove_queue_peek(struct GrooveQueue *queue, int block);
 void groove_queue_purge(struct GrooveQueue *queue);
 
 void groove_queue_cleanup_default(struct GrooveQueue *queue, void *obj);
+
+extern "Python" {
+    void pygroove_queue_cleanup(struct GrooveQueue *, void *);
+    int pygroove_queue_purge(struct GrooveQueue *, void *);
+}
 """
 
 _encoder_header = r"""
@@ -281,6 +288,38 @@ int groove_fingerprinter_decode(char *encoded_fp, int32_t **fp, int *size);
 void groove_fingerprinter_dealloc(void *ptr);
 """
 
+_helpers_header = r"""
+int pygroove_playlist_items(struct GroovePlaylist *playlist,
+        struct GroovePlaylistItem **items, int size);
+struct GroovePlaylistItem *pygroove_playlist_item_at(
+        struct GroovePlaylist *playlist, int index);
+
+int pygroove_file_tags(struct GrooveFile *file, int flags,
+        const char **keys, const char **values, int size);
+
+int pygroove_buffer_stats(struct GrooveBuffer *buffer, double *peak,
+        double *sum_squares);
+
+void pygroove_interleave(uint8_t **planes, int channels, int frames,
+        int sample_size, uint8_t *out);
+void pygroove_deinterleave(const uint8_t *in, int channels, int frames,
+        int sample_size, uint8_t **planes);
+"""
+
+_chromaprint_header = r"""
+void *pygroove_chromaprint_new(void);
+void pygroove_chromaprint_free(void *ctx);
+
+int pygroove_chromaprint_start(void *ctx, int sample_rate, int num_channels);
+int pygroove_chromaprint_feed(void *ctx, const int16_t *data, int size);
+int pygroove_chromaprint_finish(void *ctx);
+
+int pygroove_chromaprint_get_raw_fingerprint(void *ctx, int32_t **fp,
+        int *size);
+
+void pygroove_chromaprint_dealloc(void *ptr);
+"""
+
 _loudness_header = r"""
 struct GrooveLoudnessDetectorInfo {
     double loudness;
@@ -317,6 +356,12 @@ void groove_loudness_detector_position(struct GrooveLoudnessDetector *detector,
 """
 
 _player_header = r"""
+enum GroovePlayerEventType {
+    GROOVE_EVENT_NOWPLAYING,
+    GROOVE_EVENT_BUFFERUNDERRUN,
+    GROOVE_EVENT_DEVICEREOPENED,
+};
+
 union GroovePlayerEvent {
     enum GroovePlayerEventType type;
 };
@@ -367,28 +412,227 @@ struct GrooveAudioFormat groove_player_get_device_audio_format(struct GroovePlay
 ##########
 
 _groove_source = r"""
+#include <string.h>
+
 #include <groove/groove.h>
 #include <groove/queue.h>
 #include <groove/encoder.h>
+
+/* Helpers for loops that would otherwise cross the FFI once per element.
+   Functions filling an array of `size` return the number of elements
+   available, which may be more than `size`. */
+
+static int pygroove_playlist_items(struct GroovePlaylist *playlist,
+        struct GroovePlaylistItem **items, int size) {
+    struct GroovePlaylistItem *item;
+    int count = 0;
+    for (item = playlist->head; item; item = item->next) {
+        if (count < size)
+            items[count] = item;
+        count += 1;
+    }
+    return count;
+}
+
+/* Negative indexes count from the tail, NULL if out of range */
+static struct GroovePlaylistItem *pygroove_playlist_item_at(
+        struct GroovePlaylist *playlist, int index) {
+    struct GroovePlaylistItem *item;
+    if (index >= 0) {
+        for (item = playlist->head; item && index > 0; item = item->next)
+            index -= 1;
+    } else {
+        for (item = playlist->tail; item && index < -1; item = item->prev)
+            index += 1;
+    }
+    return item;
+}
+
+static int pygroove_file_tags(struct GrooveFile *file, int flags,
+        const char **keys, const char **values, int size) {
+    struct GrooveTag *tag = NULL;
+    int count = 0;
+    while ((tag = groove_file_metadata_get(file, "", tag, flags))) {
+        if (count < size) {
+            keys[count] = groove_tag_key(tag);
+            values[count] = groove_tag_value(tag);
+        }
+        count += 1;
+    }
+    return count;
+}
+
+static double pygroove_sample(const uint8_t *data, int index,
+        enum GrooveSampleFormat fmt) {
+    switch (fmt) {
+        case GROOVE_SAMPLE_FMT_U8:
+            return (data[index] - 128) / 128.0;
+        case GROOVE_SAMPLE_FMT_S16:
+            return ((const int16_t *)data)[index] / 32768.0;
+        case GROOVE_SAMPLE_FMT_S32:
+            return ((const int32_t *)data)[index] / 2147483648.0;
+        case GROOVE_SAMPLE_FMT_FLT:
+            return ((const float *)data)[index];
+        case GROOVE_SAMPLE_FMT_DBL:
+            return ((const double *)data)[index];
+        default:
+            return 0.0;
+    }
+}
+
+/* Peak and sum of squares of a decoded buffer, scaled to [-1.0, 1.0].
+   Returns the number of samples, or -1 for an unknown sample format. */
+static int pygroove_buffer_stats(struct GrooveBuffer *buffer, double *peak,
+        double *sum_squares) {
+    int fmt = buffer->format.sample_fmt;
+    int channels = groove_channel_layout_count(buffer->format.channel_layout);
+    int planes = 1;
+    int per_plane = buffer->frame_count * channels;
+    double max = 0.0, sum = 0.0, x;
+    int p, i;
+
+    if (fmt < GROOVE_SAMPLE_FMT_U8 || fmt > GROOVE_SAMPLE_FMT_DBLP)
+        return -1;
+    if (fmt >= GROOVE_SAMPLE_FMT_U8P) {
+        fmt -= GROOVE_SAMPLE_FMT_U8P - GROOVE_SAMPLE_FMT_U8;
+        planes = channels;
+        per_plane = buffer->frame_count;
+    }
+
+    for (p = 0; p < planes; p += 1) {
+        for (i = 0; i < per_plane; i += 1) {
+            x = pygroove_sample(buffer->data[p], i, fmt);
+            sum += x * x;
+            if (x < 0.0)
+                x = -x;
+            if (x > max)
+                max = x;
+        }
+    }
+    *peak = max;
+    *sum_squares = sum;
+    return planes * per_plane;
+}
+
+static void pygroove_interleave(uint8_t **planes, int channels, int frames,
+        int sample_size, uint8_t *out) {
+    const uint8_t *src;
+    uint8_t *dst;
+    int c, f;
+    for (c = 0; c < channels; c += 1) {
+        src = planes[c];
+        dst = out + c * sample_size;
+        for (f = 0; f < frames; f += 1) {
+            memcpy(dst, src, sample_size);
+            src += sample_size;
+            dst += channels * sample_size;
+        }
+    }
+}
+
+static void pygroove_deinterleave(const uint8_t *in, int channels, int frames,
+        int sample_size, uint8_t **planes) {
+    const uint8_t *src;
+    uint8_t *dst;
+    int c, f;
+    for (c = 0; c < channels; c += 1) {
+        src = in + c * sample_size;
+        dst = planes[c];
+        for (f = 0; f < frames; f += 1) {
+            memcpy(dst, src, sample_size);
+            src += channels * sample_size;
+            dst += sample_size;
+        }
+    }
+}
+"""
+
+_fingerprinter_source = r"""
+#include <groove/groove.h>
 #include <groovefingerprinter/fingerprinter.h>
+#include <chromaprint.h>
+
+/* Chromaprint changed its context and pointer types between releases, these
+   wrappers take the same arguments for all of them */
+static void *pygroove_chromaprint_new(void) {
+    return chromaprint_new(CHROMAPRINT_ALGORITHM_DEFAULT);
+}
+
+static void pygroove_chromaprint_free(void *ctx) {
+    chromaprint_free(ctx);
+}
+
+static int pygroove_chromaprint_start(void *ctx, int sample_rate,
+        int num_channels) {
+    return chromaprint_start(ctx, sample_rate, num_channels);
+}
+
+static int pygroove_chromaprint_feed(void *ctx, const int16_t *data,
+        int size) {
+    return chromaprint_feed(ctx, (const void *)data, size);
+}
+
+static int pygroove_chromaprint_finish(void *ctx) {
+    return chromaprint_finish(ctx);
+}
+
+static int pygroove_chromaprint_get_raw_fingerprint(void *ctx, int32_t **fp,
+        int *size) {
+    void *raw = NULL;
+    int result = chromaprint_get_raw_fingerprint(ctx, (void *)&raw, size);
+    *fp = raw;
+    return result;
+}
+
+static void pygroove_chromaprint_dealloc(void *ptr) {
+    chromaprint_dealloc(ptr);
+}
+"""
+
+_loudness_source = r"""
+#include <groove/groove.h>
 #include <grooveloudness/loudness.h>
+"""
+
+_player_source = r"""
+#include <groove/groove.h>
 #include <grooveplayer/player.h>
 """
+
+# One extension per library, so importing groove only loads libgroove. The
+# others are loaded with the first Fingerprinter, LoudnessDetector or
+# Player and share types with groove._groove through ffi.include.
 # TODO: set these differently depending on platform/compiler
-libs = [
-    ':libgroove.so.4',
-    ':libgroovefingerprinter.so.4',
-    ':libgrooveloudness.so.4',
-    ':libgrooveplayer.so.4',
-]
 ffi_groove = FFI()
-ffi_groove.set_source('groove._groove', _groove_source, libraries=libs)
+ffi_groove.set_source('groove._groove', _groove_source,
+                      libraries=[':libgroove.so.4'])
 ffi_groove.cdef(_groove_header)
 ffi_groove.cdef(_queue_header)
 ffi_groove.cdef(_encoder_header)
-ffi_groove.cdef(_fingerprinter_header)
-ffi_groove.cdef(_loudness_header)
-ffi_groove.cdef(_player_header)
+ffi_groove.cdef(_helpers_header)
+
+ffi_fingerprinter = FFI()
+ffi_fingerprinter.include(ffi_groove)
+ffi_fingerprinter.set_source('groove._fingerprinter', _fingerprinter_source,
+                             libraries=[':libgroovefingerprinter.so.4',
+                                        ':libchromaprint.so.1',
+                                        ':libgroove.so.4'])
+ffi_fingerprinter.cdef(_fingerprinter_header)
+ffi_fingerprinter.cdef(_chromaprint_header)
+
+ffi_loudness = FFI()
+ffi_loudness.include(ffi_groove)
+ffi_loudness.set_source('groove._loudness', _loudness_source,
+                        libraries=[':libgrooveloudness.so.4',
+                                   ':libgroove.so.4'])
+ffi_loudness.cdef(_loudness_header)
+
+ffi_player = FFI()
+ffi_player.include(ffi_groove)
+ffi_player.set_source('groove._player', _player_source,
+                      libraries=[':libgrooveplayer.so.4', ':libgroove.so.4'])
+ffi_player.cdef(_player_header)
 
 if __name__ == '__main__':
-    ffi_groove.compile()
+    for ffi in (ffi_groove, ffi_fingerprinter, ffi_loudness, ffi_player):
+        ffi.compile()
@@ -0,0 +1,91 @@
+"""
+NumPy views of decoded audio buffers
+
+Requires numpy, install with the `analysis` extra.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import numpy as np
+
+from groove._groove import ffi, lib
+from groove.groove import SampleFormat
+
+
+_dtypes = {
+    SampleFormat.u8: np.uint8,
+    SampleFormat.s16: np.int16,
+    SampleFormat.s32: np.int32,
+    SampleFormat.flt: np.float32,
+    SampleFormat.dbl: np.float64,
+    SampleFormat.u8p: np.uint8,
+    SampleFormat.s16p: np.int16,
+    SampleFormat.s32p: np.int32,
+    SampleFormat.fltp: np.float32,
+    SampleFormat.dblp: np.float64,
+}
+
+_planar = frozenset([
+    SampleFormat.u8p,
+    SampleFormat.s16p,
+    SampleFormat.s32p,
+    SampleFormat.fltp,
+    SampleFormat.dblp,
+])
+
+# Scale integer samples to [-1.0, 1.0)
+_scales = {
+    SampleFormat.u8: 1.0 / 128,
+    SampleFormat.s16: 1.0 / (1 << 15),
+    SampleFormat.s32: 1.0 / (1 << 31),
+    SampleFormat.u8p: 1.0 / 128,
+    SampleFormat.s16p: 1.0 / (1 << 15),
+    SampleFormat.s32p: 1.0 / (1 << 31),
+}
+
+
+def channel_count(buff):
+    return lib.groove_channel_layout_count(buff._obj.format.channel_layout)
+
+
+def buffer_to_ndarray(buff):
+    """View the samples of a decoded buffer
+
+    For interleaved formats the array shares memory with the buffer, it must
+    not be used after the buffer is unref'd. Planar formats are copied into
+    one array.
+
+    Returns:
+        An array of shape `(frames, channels)` in the buffer's sample type
+    """
+    obj = buff._obj
+    fmt = SampleFormat.__values__[obj.format.sample_fmt]
+    if fmt not in _dtypes:
+        raise ValueError('Unsupported sample format %s' % fmt.name)
+
+    dtype = _dtypes[fmt]
+    channels = channel_count(buff)
+    plane_size = obj.frame_count * np.dtype(dtype).itemsize
+    if fmt not in _planar:
+        data = ffi.buffer(obj.data[0], plane_size * channels)
+        return np.frombuffer(data, dtype).reshape(obj.frame_count, channels)
+
+    samples = np.empty((obj.frame_count, channels), dtype)
+    lib.pygroove_interleave(obj.data, channels, obj.frame_count,
+                            np.dtype(dtype).itemsize,
+                            ffi.cast('uint8_t *', ffi.from_buffer(samples)))
+    return samples
+
+
+def buffer_to_float(buff, dtype=np.float64):
+    """Copy the samples of a decoded buffer as floats in [-1.0, 1.0]
+
+    Returns:
+        A new array of shape `(frames, channels)`
+    """
+    fmt = SampleFormat.__values__[buff._obj.format.sample_fmt]
+    samples = buffer_to_ndarray(buff).astype(dtype)
+    if fmt in (SampleFormat.u8, SampleFormat.u8p):
+        samples -= 128
+    if fmt in _scales:
+        samples *= _scales[fmt]
+    return samples
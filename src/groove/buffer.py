@@ -1,11 +1,49 @@
 from __future__ import absolute_import, unicode_literals
 
+import atexit
+from collections import namedtuple
+import logging
+import math
+import threading
+import traceback
+import weakref
+
 from groove import _constants
+from groove import utils
 from groove._groove import ffi, lib
+from groove.audio_format import AudioFormat
 from groove.groove import GrooveClass
+from groove.playlist import PlaylistItem
+
+
+__all__ = [
+    'Buffer',
+    'BufferAccount',
+    'BufferStats',
+    'LiveBuffer',
+]
+
+
+_log = logging.getLogger(__name__)
+
 
+_scratch = utils.Scratch(ffi, peak='double *', sum_squares='double *')
 
-__all__ = ['Buffer']
+
+BufferStats = namedtuple('BufferStats', [
+    'peak',
+    'rms',
+    'sum_squares',
+    'samples',
+])
+
+
+LiveBuffer = namedtuple('LiveBuffer', [
+    'address',
+    'refs',
+    'size',
+    'stacks',
+])
 
 
 class Buffer(GrooveClass):
@@ -17,6 +55,9 @@ class Buffer(GrooveClass):
     """
     # NOTE: Buffers must be constructed via Buffer._from_obj
     _ffitype = 'struct GrooveBuffer *'
+    playlist = None
+    # BufferAccount of the Sink or Encoder the buffer came from
+    _account = None
 
     class NotReady(Exception): pass
     class End(Exception): pass
@@ -33,7 +74,8 @@ class Buffer(GrooveClass):
 
     @property
     def audio_format(self):
-        audio_format, _ = AudioFormat._from_obj(self._obj.format)
+        fmt_obj = ffi.addressof(self._obj.format)
+        audio_format, _ = AudioFormat._from_obj(fmt_obj)
         return audio_format
 
     @property
@@ -80,13 +122,196 @@ class Buffer(GrooveClass):
     def __init__(self):
         raise NotImplementedError('Buffers can only be created by a Sink')
 
+    def _layout(self):
+        """Tuple of (channels, bytes per sample, planar)"""
+        fmt = self._obj.format
+        return (
+            lib.groove_channel_layout_count(fmt.channel_layout),
+            lib.groove_sample_format_bytes_per_sample(fmt.sample_fmt),
+            fmt.sample_fmt >= _constants.GROOVE_SAMPLE_FMT_U8P,
+        )
+
+    def stats(self):
+        """Peak, RMS and sum of squares of a decoded buffer
+
+        Computed in C over every sample of every channel, with samples
+        scaled to [-1.0, 1.0].
+
+        Returns:
+            A BufferStats
+        """
+        peak = _scratch.peak
+        sum_squares = _scratch.sum_squares
+        samples = lib.pygroove_buffer_stats(self._obj, peak, sum_squares)
+        if samples < 0:
+            raise ValueError('Buffer does not hold decoded audio')
+
+        rms = math.sqrt(sum_squares[0] / samples) if samples else 0.0
+        return BufferStats(peak[0], rms, sum_squares[0], samples)
+
+    def interleaved(self):
+        """Samples of a decoded buffer with the channels interleaved
+
+        Planar audio is interleaved in C, interleaved audio is copied as is.
+        """
+        channels, sample_size, planar = self._layout()
+        frames = self._obj.frame_count
+        if not planar:
+            return ffi.buffer(self._obj.data[0],
+                              frames * channels * sample_size)[:]
+
+        out = ffi.new('uint8_t[]', frames * channels * sample_size)
+        lib.pygroove_interleave(self._obj.data, channels, frames, sample_size,
+                                out)
+        return ffi.buffer(out)[:]
+
+    def planes(self):
+        """Samples of a decoded buffer as one bytes object per channel
+
+        Interleaved audio is split in C, planar audio is copied as is.
+        """
+        channels, sample_size, planar = self._layout()
+        plane_size = self._obj.frame_count * sample_size
+        if planar:
+            return [ffi.buffer(self._obj.data[n], plane_size)[:]
+                    for n in range(channels)]
+
+        planes = [ffi.new('uint8_t[]', plane_size) for n in range(channels)]
+        lib.pygroove_deinterleave(self._obj.data[0], channels,
+                                  self._obj.frame_count, sample_size,
+                                  ffi.new('uint8_t *[]', planes))
+        return [ffi.buffer(plane)[:] for plane in planes]
+
     def ref(self):
         """Increment the reference count"""
         lib.groove_buffer_ref(self._obj)
+        if self._account is not None:
+            self._account.acquire(self)
 
     def unref(self):
         """Decrement reference count
 
         This can be used to advance the buffer, see the examples
         """
+        if self._account is not None:
+            self._account.release(self)
         lib.groove_buffer_unref(self._obj)
+
+
+# Accounts that may still hold buffers, reported at exit
+_accounts = weakref.WeakSet()
+
+
+class BufferAccount(object):
+    """Buffers taken from one Sink or Encoder and not unreferenced yet
+
+    Every buffer handed out by `get_buffer` and every `Buffer.ref()` holds
+    libgroove memory until the matching `Buffer.unref()`. The account counts
+    those references and their bytes. Buffers still referenced when the
+    owner is detached from its playlist, or when the process exits, are
+    logged as warnings.
+
+    Attributes:
+        name (str): Used in reports
+        count (int): References held on live buffers
+        bytes (int): Bytes of the live buffers
+        total_count (int): Buffers handed out so far
+        total_bytes (int): Bytes handed out so far
+        max_bytes (int): If set, `get_buffer` applies backpressure while the
+                         live buffers hold at least this many bytes. It waits
+                         for an `unref` when blocking and raises
+                         `Buffer.NotReady` otherwise.
+        debug (bool): Record where every live reference was taken, for
+                      `live_buffers` and the reports. This is slow.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.bytes = 0
+        self.total_count = 0
+        self.total_bytes = 0
+        self.max_bytes = None
+        self.debug = False
+        self._live = {}
+        self._cond = threading.Condition(threading.Lock())
+        _accounts.add(self)
+
+    def _address(self, buff):
+        return int(ffi.cast('uintptr_t', buff._obj))
+
+    def wait(self, block):
+        """Wait until the live buffers are below `max_bytes`"""
+        if self.max_bytes is None:
+            return
+        with self._cond:
+            while self.bytes >= self.max_bytes:
+                if not block:
+                    raise Buffer.NotReady()
+                self._cond.wait()
+
+    def handout(self, buff):
+        """Account for a buffer returned by `get_buffer`"""
+        buff._account = self
+        size = buff._obj.size
+        with self._cond:
+            self.total_count += 1
+            self.total_bytes += size
+        self.acquire(buff, size)
+
+    def acquire(self, buff, size=None):
+        """Account for a new reference on `buff`"""
+        if size is None:
+            size = buff._obj.size
+        with self._cond:
+            self.count += 1
+            self.bytes += size
+            if self.debug:
+                stack = ''.join(traceback.format_stack()[:-2])
+                address = self._address(buff)
+                refs, _, stacks = self._live.get(address, (0, 0, ()))
+                self._live[address] = (refs + 1, size, stacks + (stack,))
+
+    def release(self, buff):
+        """Account for a reference dropped by `unref`"""
+        size = buff._obj.size
+        with self._cond:
+            self.count -= 1
+            self.bytes -= size
+            address = self._address(buff)
+            if address in self._live:
+                refs, size, stacks = self._live[address]
+                if refs > 1:
+                    self._live[address] = (refs - 1, size, stacks[:-1])
+                else:
+                    del self._live[address]
+            self._cond.notify_all()
+
+    def live_buffers(self):
+        """List of LiveBuffer recorded while `debug` was set"""
+        with self._cond:
+            return [LiveBuffer(address, refs, size, stacks)
+                    for address, (refs, size, stacks)
+                    in sorted(self._live.items())]
+
+    def report(self, when):
+        """Log a warning if buffers are still referenced
+
+        Returns:
+            True if there were live buffers
+        """
+        if self.count <= 0:
+            return False
+        _log.warning('%s: %d buffer references holding %d bytes were not '
+                     'released %s', self.name, self.count, self.bytes, when)
+        for live in self.live_buffers():
+            _log.warning('Buffer 0x%x, %d refs of %d bytes, taken at:\n%s',
+                         live.address, live.refs, live.size,
+                         '\n'.join(live.stacks))
+        return True
+
+
+@atexit.register
+def _report_at_exit():
+    for account in list(_accounts):
+        account.report('at exit')
@@ -0,0 +1,130 @@
+"""
+Interpolated playback position
+"""
+from __future__ import absolute_import, unicode_literals
+
+import time
+
+from groove.player import PlayerEvent
+
+
+__all__ = [
+    'PlaybackClock',
+]
+
+
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    _monotonic = time.time
+
+
+class PlaybackClock(object):
+    """Cheap playback position of a Player
+
+    `Player.position()` crosses into libgroove and allocates on every call.
+    The clock samples it at most once every `interval` seconds and in
+    between extrapolates from the last sample with the monotonic clock. The
+    rate of extrapolation is the measured playback rate, smoothed over
+    samples, so a device clock that runs slightly fast or slow does not
+    cause jumps at each sample.
+
+    Use the clock's `seek`, `pause` and `play` instead of the playlist's so
+    it can re-anchor immediately. With a PlayerEventDispatcher it also
+    re-anchors on now_playing, buffer_underrun and device_reopened events.
+
+    Arguments:
+        player (Player): Player to follow
+        interval (float): Longest time in seconds between two samples
+        dispatcher (PlayerEventDispatcher): Re-anchor on player events
+        smoothing (float): Weight of each new rate measurement
+        clock (callable): Returns the current time in seconds, defaults to
+                          `time.monotonic`
+    """
+
+    def __init__(self, player, interval=0.25, dispatcher=None, smoothing=0.1,
+                 clock=_monotonic):
+        self.player = player
+        self.interval = interval
+        self.smoothing = smoothing
+        self.rate = 1.0
+        self._clock = clock
+        self._sample = None
+        self._anchor = None
+        self._dispatcher = dispatcher
+        self._subscription = None
+
+        playlist = player.playlist
+        self._playing = playlist is None or playlist.is_playing()
+        self.sync()
+        if dispatcher is not None:
+            self._subscription = dispatcher.subscribe(self._on_event, player)
+
+    def close(self):
+        """Stop following player events"""
+        if self._subscription is not None:
+            self._dispatcher.unsubscribe(self._subscription)
+            self._subscription = None
+
+    def sync(self):
+        """Sample the player position now and re-anchor to it"""
+        now = self._clock()
+        pitem, seconds = self.player.position()
+        last, self._sample = self._sample, (now, seconds, pitem)
+
+        rate = self.rate if self._playing and pitem is not None else 0.0
+        if rate and last is not None and last[2] is pitem and now > last[0]:
+            measured = (seconds - last[1]) / (now - last[0])
+            if measured < 0.5:
+                # Stalled, most likely a buffer underrun
+                rate = 0.0
+            elif measured < 2.0:
+                self.rate += self.smoothing * (measured - self.rate)
+                rate = self.rate
+        self._anchor = (now, seconds, pitem, rate)
+
+    def position(self):
+        """Get the interpolated playback position
+
+        Returns:
+            A tuple of (playlist_item, seconds) like `Player.position`
+        """
+        now = self._clock()
+        anchor = self._anchor
+        if now - anchor[0] >= self.interval:
+            self.sync()
+            anchor = self._anchor
+        return anchor[2], anchor[1] + (now - anchor[0]) * anchor[3]
+
+    @property
+    def seconds(self):
+        """Interpolated seconds into the current item"""
+        return self.position()[1]
+
+    def seek(self, playlist_item, seconds):
+        """Seek the player's playlist and re-anchor"""
+        self.player.playlist.seek(playlist_item, seconds)
+        self._sample = None
+        rate = self.rate if self._playing else 0.0
+        self._anchor = (self._clock(), seconds, playlist_item, rate)
+
+    def pause(self):
+        """Pause the player's playlist and freeze the clock"""
+        self.player.playlist.pause()
+        self._playing = False
+        self._sample = None
+        self.sync()
+
+    def play(self):
+        """Resume the player's playlist from the frozen position"""
+        self.player.playlist.play()
+        self._playing = True
+        self._sample = None
+        _, seconds, pitem, _ = self._anchor
+        self._anchor = (self._clock(), seconds, pitem, self.rate)
+
+    def _on_event(self, info):
+        self._sample = None
+        playing = self._playing and info.event != PlayerEvent.buffer_underrun
+        rate = self.rate if playing and info.playlist_item is not None else 0.0
+        self._anchor = (self._clock(), info.seconds, info.playlist_item, rate)
@@ -4,13 +4,18 @@ from groove import _constants
 from groove import utils
 from groove._groove import ffi, lib
 from groove.audio_format import AudioFormat
-from groove.buffer import Buffer
+from groove.buffer import Buffer, BufferAccount
 from groove.groove import GrooveClass
 
 
 __all__ = ['Encoder']
 
 
+_scratch = utils.Scratch(ffi, buffer_ptr='struct GrooveBuffer **',
+                         pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
 class Encoder(GrooveClass):
     """Groove Encoder"""
     _ffitype = 'struct GrooveEncoder *'
@@ -111,6 +116,7 @@ class Encoder(GrooveClass):
         assert obj != ffi.NULL
         self._obj = ffi.gc(obj, lib.groove_encoder_destroy)
         self._playlist = None
+        self.buffer_account = BufferAccount('Encoder')
 
     @property
     def disable_resample(self):
@@ -170,6 +176,7 @@ class Encoder(GrooveClass):
         # TODO: better exception handling
         if self._obj.playlist != ffi.NULL:
             assert lib.groove_encoder_detach(self._obj) == 0
+            self.buffer_account.report('when the encoder was detached')
         if value is not None:
             assert lib.groove_encoder_attach(self._obj, value._obj) == 0
         self._playlist = value
@@ -191,9 +198,13 @@ class Encoder(GrooveClass):
         If no buffer is ready, this raises `groove.Buffer.NotReady`
         If the end of the playlist is reached, this raises `groove.Buffer.End`
         If block is True and no buffer is ready, this may block indefinately
+
+        While `buffer_account.max_bytes` is exceeded no buffer is taken, this
+        raises `groove.Buffer.NotReady` or blocks until buffers are unref'd.
         """
         # TODO: add timeout, might have to be done in libgroove to be safe
-        buff_obj_ptr = ffi.new('struct GrooveBuffer **')
+        self.buffer_account.wait(block)
+        buff_obj_ptr = _scratch.buffer_ptr
         value = lib.groove_encoder_buffer_get(self._obj, buff_obj_ptr, 1 if block else 0)
         assert value >= 0
 
@@ -204,6 +215,8 @@ class Encoder(GrooveClass):
         elif value == _constants.GROOVE_BUFFER_YES:
             buff, _ = self.BufferClass._from_obj(buff_obj_ptr[0])
             buff.encoder = self
+            buff.playlist = self._playlist
+            self.buffer_account.handout(buff)
             return buff
 
         raise Exception('Unknown value %s from groove_encoder_buffer_get' % value)
@@ -262,7 +275,7 @@ class Encoder(GrooveClass):
             A tuple of (playlist_item, seconds). If the playlist is empty
             playlist_item will be None and seconds will be -1.0
         """
-        pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
-        seconds = ffi.new('double *')
+        pitem_obj_ptr = _scratch.pitem_ptr
+        seconds = _scratch.seconds
         lib.groove_encoder_position(self._obj, pitem_obj_ptr, seconds)
         return self._pitem(pitem_obj_ptr[0]), float(seconds[0])
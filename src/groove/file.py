@@ -35,12 +35,8 @@ class File(GrooveClass):
     def filename(self):
         return self._filename
 
-    @classmethod
-    def _from_obj(cls, obj):
-        instance, created = super(File, cls)._from_obj(obj)
-        if created:
-            instance._filename = ffi.string(instance._obj.filename).decode()
-        return instance, created
+    def _init_from_obj(self):
+        self._filename = ffi.string(self._obj.filename).decode()
 
     def __init__(self, filename):
         self._obj = None
@@ -106,19 +102,20 @@ class File(GrooveClass):
             A dictionary of `name: value` pairs. Both `name` and `value` will
             be type `bytes`.
         """
-        # Have to make a GrooveTag** so cffi doesn't try to sizeof GrooveTag
-        gtag_ptr = ffi.new('struct GrooveTag **')
-        gtag = gtag_ptr[0]
-        tags = OrderedDict()
+        # Collect every key and value pointer in one call, retry if there
+        # were more tags than room
+        size = 32
         while True:
-            gtag = lib.groove_file_metadata_get(self._obj, b'', gtag, flags)
-            if gtag == ffi.NULL:
+            keys = ffi.new('const char *[]', size)
+            values = ffi.new('const char *[]', size)
+            count = lib.pygroove_file_tags(self._obj, flags, keys, values, size)
+            if count <= size:
                 break
+            size = count
 
-            key = ffi.string(lib.groove_tag_key(gtag))
-            value = ffi.string(lib.groove_tag_value(gtag))
-            tags[key] = value
-
+        tags = OrderedDict()
+        for n in range(count):
+            tags[ffi.string(keys[n])] = ffi.string(values[n])
         return tags
 
     @_require_open
@@ -0,0 +1,254 @@
+"""
+Bulk fingerprinting with a persistent store
+
+Raw fingerprints are kept as int32 blobs in sqlite, keyed by file identity.
+`fingerprint_library` shards the files that are missing or changed across
+worker processes and commits every finished shard, so an interrupted run
+resumes where it stopped.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from array import array
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import logging
+import sqlite3
+import time
+
+import groove
+from groove import utils
+from groove.file import File
+from groove.fingerprinter import Fingerprinter, _int32_typecode
+from groove.playlist import Playlist
+
+
+__all__ = [
+    'FingerprintProgress',
+    'FingerprintStore',
+    'StoredFingerprint',
+    'fingerprint_library',
+]
+
+
+_log = logging.getLogger(__name__)
+
+
+StoredFingerprint = namedtuple('StoredFingerprint', [
+    'filename',
+    'fingerprint',
+    'duration',
+])
+
+
+FingerprintProgress = namedtuple('FingerprintProgress', [
+    'files_done',
+    'files_total',
+    'files_skipped',
+    'files_failed',
+    'audio_seconds',
+    'elapsed',
+])
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT,
+    duration REAL NOT NULL,
+    fingerprint BLOB NOT NULL
+);
+"""
+
+
+def _from_blob(blob):
+    fp = array(_int32_typecode)
+    if hasattr(fp, 'frombytes'):
+        fp.frombytes(blob)
+    else:
+        fp.fromstring(bytes(blob))
+    return fp
+
+
+class FingerprintStore(object):
+    """Raw fingerprints and durations backed by sqlite
+
+    Blobs hold the raw fingerprint in native byte order.
+
+    Arguments:
+        path (str): Database file, created if it does not exist
+        content_hash (bool): Also compare a hash of the file contents when
+                             deciding whether a file changed
+    """
+
+    def __init__(self, path, content_hash=False):
+        self.path = path
+        self.content_hash = content_hash
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __len__(self):
+        return self._db.execute('SELECT COUNT(*) FROM fingerprints').fetchone()[0]
+
+    def __iter__(self):
+        """Every stored fingerprint, whether or not its file changed"""
+        rows = self._db.execute(
+            'SELECT path, duration, fingerprint FROM fingerprints')
+        for path, duration, blob in rows:
+            yield StoredFingerprint(path, _from_blob(blob), duration)
+
+    def close(self):
+        self._db.close()
+
+    def identity(self, filename):
+        """FileIdentity of `filename`, `None` if it cannot be read"""
+        try:
+            return utils.file_identity(filename, self.content_hash)
+        except OSError:
+            return None
+
+    def is_current(self, ident):
+        """True if the stored fingerprint matches the file `ident`"""
+        if ident is None:
+            return False
+        row = self._db.execute(
+            'SELECT size, mtime, content_hash FROM fingerprints '
+            'WHERE path = ?', (ident.path,)).fetchone()
+        if row is None or (row[0], row[1]) != (ident.size, ident.mtime):
+            return False
+        return not self.content_hash or row[2] == ident.content_hash
+
+    def get(self, filename):
+        """StoredFingerprint for `filename`, `None` if missing or stale"""
+        ident = self.identity(filename)
+        if not self.is_current(ident):
+            return None
+        duration, blob = self._db.execute(
+            'SELECT duration, fingerprint FROM fingerprints WHERE path = ?',
+            (ident.path,)).fetchone()
+        return StoredFingerprint(filename, _from_blob(blob), duration)
+
+    def put(self, ident, fingerprint, duration, commit=True):
+        """Store a raw fingerprint for the file `ident`
+
+        `fingerprint` may be an `array('i')`, an int32 NumPy array or bytes
+        holding native int32 values.
+        """
+        if not isinstance(fingerprint, bytes):
+            fingerprint = memoryview(fingerprint).tobytes()
+        self._db.execute(
+            'INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?, ?)',
+            (ident.path, ident.size, ident.mtime, ident.content_hash,
+             duration, sqlite3.Binary(fingerprint)))
+        if commit:
+            self._db.commit()
+
+    def commit(self):
+        self._db.commit()
+
+
+def _fingerprint_files(filenames):
+    """Worker task, fingerprint a shard of files with one Playlist
+
+    Returns:
+        A tuple (results, failed) where results is a list of
+        `(filename, fingerprint bytes, duration)`
+    """
+    groove.worker_initializer()
+
+    playlist = Playlist()
+    printer = Fingerprinter(base64_encode=False)
+    gfiles = []
+    failed = []
+    for filename in filenames:
+        gfile = File(filename)
+        try:
+            gfile.open()
+        except ValueError:
+            failed.append(filename)
+            continue
+        gfiles.append(gfile)
+        playlist.append(gfile)
+
+    results = []
+    try:
+        printer.playlist = playlist
+        for fp, duration, pitem in printer:
+            results.append((pitem.file.filename, fp.tobytes(), duration))
+    finally:
+        printer.playlist = None
+        playlist.clear()
+        for gfile in gfiles:
+            gfile.close()
+
+    return results, failed
+
+
+def fingerprint_library(filenames, store, workers=None, shard_size=16,
+                        progress=None):
+    """Fingerprint the files whose stored fingerprint is missing or stale
+
+    Arguments:
+        filenames (iterable): Files in the library
+        store (FingerprintStore): Where fingerprints are kept
+        workers (int): Number of worker processes, defaults to the number
+                       of CPUs. With 0 everything runs in this process.
+        shard_size (int): Files per worker task, each task decodes its
+                          files through one Playlist and Fingerprinter
+        progress (callable): Called with a FingerprintProgress after each
+                             shard is stored
+
+    Returns:
+        The final FingerprintProgress
+    """
+    started = time.time()
+    filenames = list(filenames)
+    identities = {}
+    todo = []
+    for filename in filenames:
+        ident = store.identity(filename)
+        if not store.is_current(ident):
+            identities[filename] = ident
+            todo.append(filename)
+
+    shards = [todo[n:n + shard_size] for n in range(0, len(todo), shard_size)]
+    skipped = len(filenames) - len(todo)
+    state = {'done': 0, 'failed': 0, 'seconds': 0.0}
+
+    def report():
+        return FingerprintProgress(state['done'], len(filenames), skipped,
+                                   state['failed'], state['seconds'],
+                                   time.time() - started)
+
+    def store_shard(shard_result):
+        results, failed = shard_result
+        for filename, fp, duration in results:
+            if identities[filename] is not None:
+                store.put(identities[filename], fp, duration, commit=False)
+            state['seconds'] += duration
+        store.commit()
+        for filename in failed:
+            _log.warning('Could not open %s', filename)
+
+        state['done'] += len(results)
+        state['failed'] += len(failed)
+        if progress is not None:
+            progress(report())
+
+    if workers == 0:
+        for shard in shards:
+            store_shard(_fingerprint_files(shard))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(_fingerprint_files, s) for s in shards]
+            for future in as_completed(futures):
+                store_shard(future.result())
+
+    return report()
@@ -1,14 +1,19 @@
 from __future__ import absolute_import, unicode_literals
 
+from array import array
 from collections import namedtuple
 
 from groove import utils
-from groove._groove import ffi, lib
-from groove.groove import GrooveClass
+from groove._fingerprinter import ffi, lib
+from groove.buffer import Buffer
+from groove.groove import ChannelLayout, GrooveClass, SampleFormat
+from groove.sink import Sink
 
 __all__ = [
     'Fingerprinter',
     'FingerprinterInfo',
+    'WindowFingerprint',
+    'WindowedFingerprinter',
 ]
 
 
@@ -19,17 +24,148 @@ FingerprinterInfo = namedtuple('FingerprinterInfo', [
 ])
 
 
+WindowFingerprint = namedtuple('WindowFingerprint', [
+    'start',
+    'end',
+    'fingerprint',
+    'playlist_item',
+])
+
+
+_scratch = utils.Scratch(ffi, pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
+# array typecode for int32_t
+_int32_typecode = 'i' if array('i').itemsize == 4 else 'l'
+
+
+def _fingerprint_from_cdata(fp_obj, size, use_numpy=False):
+    """Copy a raw C fingerprint with a single memory copy
+
+    Returns:
+        An `array('i')`, or an int32 NumPy array if `use_numpy` is True
+    """
+    data = ffi.buffer(fp_obj, size * 4)
+    if use_numpy:
+        import numpy
+        return numpy.frombuffer(data, numpy.int32).copy()
+
+    result = array(_int32_typecode)
+    if hasattr(result, 'frombytes'):
+        result.frombytes(data)
+    else:
+        result.fromstring(data[:])
+    return result
+
+
+def _fingerprint_to_cdata(fp):
+    """Get an `int32_t *` for a raw fingerprint
+
+    Contiguous int32 buffers such as `array('i')` and int32 NumPy arrays are
+    passed without copying, anything else is copied into a new C array.
+
+    Returns:
+        A tuple (pointer, size, keepalive). `keepalive` must be referenced
+        for as long as the pointer is used.
+    """
+    try:
+        view = memoryview(fp)
+    except TypeError:
+        view = None
+
+    if (view is not None and view.ndim == 1 and view.itemsize == 4 and
+            view.format.lstrip('@=<') in ('i', 'l') and
+            getattr(view, 'c_contiguous', True)):
+        keepalive = ffi.from_buffer(fp)
+        return ffi.cast('int32_t *', keepalive), len(view), keepalive
+
+    fp_obj = ffi.new('int32_t[]', [int(n) for n in fp])
+    return fp_obj, len(fp_obj), fp_obj
+
+
+class _Chromaprint(object):
+    """A chromaprint context fed from Python
+
+    Uses the same algorithm and input format as libgroove's fingerprinter,
+    44100Hz stereo signed 16 bit, so fingerprints are interchangeable.
+    """
+    sample_rate = 44100
+    channels = 2
+
+    def __init__(self):
+        obj = lib.pygroove_chromaprint_new()
+        assert obj != ffi.NULL
+        self._obj = ffi.gc(obj, lib.pygroove_chromaprint_free)
+        self.frames = 0
+
+    def start(self):
+        assert lib.pygroove_chromaprint_start(self._obj, self.sample_rate,
+                                              self.channels) == 1
+        self.frames = 0
+
+    def feed(self, data, frames, offset=0):
+        """Feed `frames` interleaved frames from `data`, skipping `offset`"""
+        samples = ffi.cast('int16_t *', data) + offset * self.channels
+        assert lib.pygroove_chromaprint_feed(self._obj, samples,
+                                             frames * self.channels) == 1
+        self.frames += frames
+
+    def finish(self, use_numpy=False):
+        """Finish the fingerprint
+
+        Returns:
+            A tuple (fingerprint, duration). See `_fingerprint_from_cdata`
+            for the fingerprint type.
+        """
+        assert lib.pygroove_chromaprint_finish(self._obj) == 1
+        fp_obj_ptr = ffi.new('int32_t **')
+        size_obj_ptr = ffi.new('int *')
+        assert lib.pygroove_chromaprint_get_raw_fingerprint(
+            self._obj, fp_obj_ptr, size_obj_ptr) == 1
+
+        fp = _fingerprint_from_cdata(fp_obj_ptr[0], size_obj_ptr[0], use_numpy)
+        lib.pygroove_chromaprint_dealloc(fp_obj_ptr[0])
+        return fp, self.frames / float(self.sample_rate)
+
+
+def _chromaprint_sink(buffer_size):
+    """Sink in the format libgroove fingerprints"""
+    sink = Sink()
+    sink.buffer_size = buffer_size
+    fmt = sink.audio_format
+    fmt.sample_rate = _Chromaprint.sample_rate
+    fmt.channel_layout = ChannelLayout.layout_stereo
+    fmt.sample_format = SampleFormat.s16
+    return sink
+
+
 class Fingerprinter(GrooveClass):
-    """Use this to find out the unique id of an audio track"""
+    """Use this to find out the unique id of an audio track
+
+    Arguments:
+        base64_encode (bool): Yield compressed, base64-encoded fingerprints
+                              instead of raw ones
+        use_numpy (bool): Yield raw fingerprints as int32 NumPy arrays
+                          instead of `array('i')`
+        max_duration (float): Only fingerprint the first `max_duration`
+                              seconds of each item, then seek to the next
+                              one. Takes effect when a playlist is attached.
+    """
+    _ffi = ffi
     _ffitype = 'struct GrooveFingerprinter *'
 
     @classmethod
     def encode(cls, fp):
-        """Compress and base64-encode a raw fingerprint"""
+        """Compress and base64-encode a raw fingerprint
+
+        `fp` may be a list of ints, an `array('i')` or an int32 NumPy array.
+        The latter two are passed to libgroove without a copy.
+        """
         # TODO: error handling
         efp_obj_ptr = ffi.new('char **')
-        fp_obj = ffi.new('int32_t[]', fp)
-        assert lib.groove_fingerprinter_encode(fp_obj, len(fp), efp_obj_ptr) == 0
+        fp_obj, size, _keepalive = _fingerprint_to_cdata(fp)
+        assert lib.groove_fingerprinter_encode(fp_obj, size, efp_obj_ptr) == 0
 
         # copy the result to python and free the c obj
         result = ffi.string(efp_obj_ptr[0])
@@ -38,8 +174,12 @@ class Fingerprinter(GrooveClass):
         return result
 
     @classmethod
-    def decode(cls, encoded_fp):
-        """Uncompress and base64-decode a raw fingerprint"""
+    def decode(cls, encoded_fp, use_numpy=False):
+        """Uncompress and base64-decode a raw fingerprint
+
+        Returns:
+            An `array('i')`, or an int32 NumPy array if `use_numpy` is True
+        """
         efp_obj = ffi.new('char[]', encoded_fp)
         fp_obj_ptr = ffi.new('int32_t **')
         size_obj_ptr = ffi.new('int *')
@@ -47,7 +187,7 @@ class Fingerprinter(GrooveClass):
 
         # copy the result to python and free the c obj
         fp_obj = fp_obj_ptr[0]
-        result = [int(fp_obj[n]) for n in range(size_obj_ptr[0])]
+        result = _fingerprint_from_cdata(fp_obj, size_obj_ptr[0], use_numpy)
         lib.groove_fingerprinter_dealloc(fp_obj)
 
         return result
@@ -75,27 +215,101 @@ class Fingerprinter(GrooveClass):
     @playlist.setter
     def playlist(self, value):
         if self._playlist:
-            assert lib.groove_fingerprinter_detach(self._obj) == 0
+            if self._sink is not None:
+                self._sink.playlist = None
+                self._sink = None
+            else:
+                assert lib.groove_fingerprinter_detach(self._obj) == 0
             self._playlist = None
 
         if value is not None:
-            assert lib.groove_fingerprinter_attach(self._obj, value._obj) == 0
+            if self.max_duration is None:
+                assert lib.groove_fingerprinter_attach(self._obj, value._obj) == 0
+            else:
+                self._sink = _chromaprint_sink(self.sink_buffer_size)
+                self._sink.playlist = value
             self._playlist = value
 
-    def __init__(self, base64_encode=True):
+    def __init__(self, base64_encode=True, use_numpy=False, max_duration=None):
         # TODO: error handling
         obj = lib.groove_fingerprinter_create()
         assert obj != ffi.NULL
         self._obj = ffi.gc(obj, lib.groove_fingerprinter_destroy)
         self._playlist = None
+        self._sink = None
         self.base64_encode = base64_encode
+        self.use_numpy = use_numpy
+        self.max_duration = max_duration
 
     def __del__(self):
         # Make sure playlist gets detached before we loose the obj
         if self.playlist is not None:
             self.playlist = None
 
+    def _info(self, fp, duration, pitem):
+        if self.base64_encode:
+            fp = self.encode(fp)
+        return FingerprinterInfo(fp, duration, pitem)
+
+    def _iter_prefix(self):
+        """Fingerprint the start of each item with a Python-side context
+
+        libgroove's fingerprinter discards its current item when the
+        playlist seeks, so prefix mode reads from a sink and feeds
+        chromaprint itself.
+        """
+        max_frames = int(self.max_duration * _Chromaprint.sample_rate)
+        context = _Chromaprint()
+        item_obj = None
+        skip_obj = None
+        while True:
+            try:
+                buff = self._sink.get_buffer(True)
+            except Buffer.End:
+                break
+
+            try:
+                obj = buff._obj
+                if obj.item == skip_obj:
+                    # Decoded before the seek took effect
+                    continue
+
+                if obj.item != item_obj:
+                    if item_obj is not None:
+                        # Item ended before max_duration
+                        fp, duration = context.finish(self.use_numpy)
+                        yield self._info(fp, duration,
+                                         self.playlist._pitem(item_obj))
+                    item_obj = obj.item
+                    skip_obj = None
+                    context.start()
+
+                frames = min(obj.frame_count, max_frames - context.frames)
+                context.feed(obj.data[0], frames)
+            finally:
+                buff.unref()
+
+            if context.frames >= max_frames:
+                pitem = self.playlist._pitem(item_obj)
+                if pitem.next_item is not None:
+                    self.playlist.seek(pitem.next_item, 0.0)
+                else:
+                    self.playlist.seek(pitem, pitem.file.duration())
+
+                fp, duration = context.finish(self.use_numpy)
+                skip_obj, item_obj = item_obj, None
+                yield self._info(fp, duration, pitem)
+
+        if item_obj is not None:
+            fp, duration = context.finish(self.use_numpy)
+            yield self._info(fp, duration, self.playlist._pitem(item_obj))
+
     def __iter__(self):
+        if self._sink is not None:
+            for info in self._iter_prefix():
+                yield info
+            return
+
         info_obj = ffi.new('struct GrooveFingerprinterInfo *');
         while True:
             status = lib.groove_fingerprinter_info_get(self._obj, info_obj, True)
@@ -112,7 +326,7 @@ class Fingerprinter(GrooveClass):
                 fp = ffi.string(efp_obj_ptr[0])
                 lib.groove_fingerprinter_dealloc(efp_obj_ptr[0])
             else:
-                fp = [int(fp_obj[n]) for n in range(fp_size_obj)]
+                fp = _fingerprint_from_cdata(fp_obj, fp_size_obj, self.use_numpy)
 
             duration = float(info_obj.duration)
             pitem = self.playlist._pitem(info_obj.item)
@@ -120,7 +334,12 @@ class Fingerprinter(GrooveClass):
             yield FingerprinterInfo(fp, duration, pitem)
 
     def info_peek(self, block=False):
-        """Check if info is ready"""
+        """Check if info is ready
+
+        In `max_duration` mode this only tells if decoded audio is ready.
+        """
+        if self._sink is not None:
+            return self._sink.buffer_peek(block)
         result = lib.groove_fingerprinter_info_peek(self._obj, block)
         assert result >= 0
         return bool(result)
@@ -131,12 +350,130 @@ class Fingerprinter(GrooveClass):
         Returns:
             A tuple of (playlist_item, seconds). If the playlist is empty
             playlist_item will be None and seconds will be -1.0
+
+            In `max_duration` mode this is the decode position.
         """
-        pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
-        seconds = ffi.new('double *')
+        if self._sink is not None:
+            return self.playlist.decode_position()
+
+        pitem_obj_ptr = _scratch.pitem_ptr
+        seconds = _scratch.seconds
         lib.groove_fingerprinter_position(self._obj, pitem_obj_ptr, seconds)
         if pitem_obj_ptr[0] == ffi.NULL:
             pitem = None
         else:
             pitem = self.playlist._pitem(pitem_obj_ptr[0])
         return pitem, float(seconds[0])
+
+
+class WindowedFingerprinter(object):
+    """Fingerprint overlapping windows of each playlist item
+
+    Iterating yields a WindowFingerprint for every `window` seconds of audio
+    starting every `step` seconds, with `start` and `end` in seconds from
+    the start of the item. All windows are computed in one decode pass by
+    staggered chromaprint contexts, one per overlapping window, so memory
+    does not grow with the length of the recording.
+
+    Arguments:
+        window (float): Length of each window in seconds
+        step (float): Time between the starts of consecutive windows
+        base64_encode (bool): Yield compressed, base64-encoded fingerprints
+                              instead of raw ones
+        use_numpy (bool): Yield raw fingerprints as int32 NumPy arrays
+                          instead of `array('i')`
+        partial (bool): Also yield the longest window cut short by the end
+                        of an item
+        sink_buffer_size (int): How big the sink buffer should be, in sample
+                                frames
+    """
+
+    def __init__(self, window=10.0, step=5.0, base64_encode=True,
+                 use_numpy=False, partial=False, sink_buffer_size=8192):
+        assert window > 0 and step > 0
+        self.window = window
+        self.step = step
+        self.base64_encode = base64_encode
+        self.use_numpy = use_numpy
+        self.partial = partial
+        self.sink = _chromaprint_sink(sink_buffer_size)
+
+    @property
+    def playlist(self):
+        """Playlist to generate fingerprints for"""
+        return self.sink.playlist
+
+    @playlist.setter
+    def playlist(self, value):
+        self.sink.playlist = value
+
+    def _record(self, context, start, end, item_obj):
+        fp, _ = context.finish(self.use_numpy)
+        if self.base64_encode:
+            fp = Fingerprinter.encode(fp)
+        rate = float(_Chromaprint.sample_rate)
+        return WindowFingerprint(start / rate, end / rate, fp,
+                                 self.playlist._pitem(item_obj))
+
+    def __iter__(self):
+        window = int(round(self.window * _Chromaprint.sample_rate))
+        step = int(round(self.step * _Chromaprint.sample_rate))
+
+        # Open windows as (start frame, context), oldest first
+        active = []
+        idle = []
+        item_obj = None
+        position = 0
+        next_start = 0
+        while True:
+            try:
+                buff = self.sink.get_buffer(True)
+            except Buffer.End:
+                buff = None
+
+            records = []
+            try:
+                if item_obj is not None and (buff is None or
+                                             buff._obj.item != item_obj):
+                    if self.partial and active and active[0][0] < position:
+                        records.append(self._record(active[0][1], active[0][0],
+                                                    position, item_obj))
+                    idle.extend(context for _, context in active)
+                    active = []
+                    item_obj = None
+
+                if buff is not None:
+                    obj = buff._obj
+                    if item_obj is None:
+                        item_obj = obj.item
+                        position = next_start = 0
+
+                    end = position + obj.frame_count
+                    while next_start < end:
+                        context = idle.pop() if idle else _Chromaprint()
+                        context.start()
+                        active.append((next_start, context))
+                        next_start += step
+
+                    still_open = []
+                    for start, context in active:
+                        lo = max(position, start)
+                        hi = min(end, start + window)
+                        if hi > lo:
+                            context.feed(obj.data[0], hi - lo, lo - position)
+                        if start + window <= end:
+                            records.append(self._record(
+                                context, start, start + window, item_obj))
+                            idle.append(context)
+                        else:
+                            still_open.append((start, context))
+                    active = still_open
+                    position = end
+            finally:
+                if buff is not None:
+                    buff.unref()
+
+            for record in records:
+                yield record
+            if buff is None:
+                break
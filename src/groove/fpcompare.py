@@ -0,0 +1,173 @@
+"""
+Offset-aligned fingerprint comparison
+
+Two fingerprints of the same recording usually start at different times, so
+they are compared at every relative offset and the offset with the lowest
+bit error rate wins. All offsets, and many candidates, are scored at once
+with NumPy XOR and popcount.
+
+Requires numpy, install with the `analysis` extra.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import namedtuple
+
+import numpy as np
+
+from groove.fingerprinter import Fingerprinter
+
+
+__all__ = [
+    'FingerprintMatch',
+    'bit_error_rate',
+    'compare',
+    'compare_many',
+    'popcount',
+]
+
+
+FingerprintMatch = namedtuple('FingerprintMatch', [
+    'offset',
+    'score',
+    'span',
+])
+
+
+# Number of elements of a (candidates, offsets, length) work array chunk
+_chunk_elements = 1 << 24
+
+
+if hasattr(np, 'bitwise_count'):
+    popcount = np.bitwise_count
+else:
+    _popcount16 = np.array([bin(n).count('1') for n in range(1 << 16)],
+                           np.uint8)
+
+    def popcount(values):
+        """Number of set bits of each uint32 in `values`"""
+        return _popcount16[values & 0xffff] + _popcount16[values >> 16]
+
+
+def as_uint32(fingerprint):
+    """Raw fingerprint as a uint32 array, decoding base64 if needed"""
+    if isinstance(fingerprint, bytes):
+        fingerprint = Fingerprinter.decode(fingerprint, use_numpy=True)
+    return np.asarray(fingerprint, np.int32).view(np.uint32)
+
+
+def bit_error_rate(a, b, offset):
+    """Fraction of differing bits where `b[i + offset]` meets `a[i]`
+
+    Returns 1.0 if the fingerprints do not overlap at `offset`.
+    """
+    start = max(0, -offset)
+    end = min(len(a), len(b) - offset)
+    if end <= start:
+        return 1.0
+    diff = a[start:end] ^ b[start + offset:end + offset]
+    return float(popcount(diff).sum()) / (32.0 * (end - start))
+
+
+def compare(a, b, max_offset=None, min_span=None):
+    """Find the offset at which two fingerprints match best
+
+    Arguments:
+        a, b: Raw or base64-encoded fingerprints
+        max_offset (int): Only try offsets in `[-max_offset, max_offset]`,
+                          by default every offset with any overlap is tried
+        min_span (int): Fewest aligned sub-fingerprints an offset needs to
+                        be considered, defaults to half the shorter
+                        fingerprint
+
+    Returns:
+        A FingerprintMatch. `offset` is where `a[0]` falls in `b`, `score`
+        is 1.0 minus the bit error rate and `span` is the number of aligned
+        sub-fingerprints.
+    """
+    return compare_many(a, [b], max_offset, min_span)[0]
+
+
+def compare_many(query, candidates, max_offset=None, min_span=None):
+    """Compare one fingerprint against many
+
+    Candidates are padded into a matrix and scored in vectorized chunks of
+    candidates and offsets, so memory use does not grow with the number of
+    candidates or offsets.
+
+    Arguments:
+        query: Raw or base64-encoded fingerprint
+        candidates (iterable): Raw or base64-encoded fingerprints
+        max_offset, min_span: See `compare`
+
+    Returns:
+        A list of FingerprintMatch, one per candidate in the same order
+    """
+    query = as_uint32(query)
+    candidates = [as_uint32(c) for c in candidates]
+    if not candidates:
+        return []
+
+    n = len(query)
+    lengths = np.array([len(c) for c in candidates], np.int64)
+    width = max(1, int(lengths.max()))
+    if max_offset is None:
+        offsets = np.arange(-(n - 1), width, dtype=np.int64)
+    else:
+        offsets = np.arange(-max_offset, max_offset + 1, dtype=np.int64)
+
+    if min_span is None:
+        required = np.maximum(1, np.minimum(n, lengths) // 2)
+    else:
+        required = np.full(len(candidates), max(1, min_span))
+
+    # Offsets are chunked as well as candidates, so the work arrays stay
+    # within _chunk_elements however long the fingerprints are
+    offset_chunk = max(1, min(len(offsets), _chunk_elements // max(1, n)))
+    chunk = max(1, _chunk_elements // (offset_chunk * max(1, n)))
+    matches = []
+    for start in range(0, len(candidates), chunk):
+        stop = min(start + chunk, len(candidates))
+        padded = np.zeros((stop - start, width), np.uint32)
+        for row, fp in enumerate(candidates[start:stop]):
+            padded[row, :len(fp)] = fp
+        chunk_lengths = lengths[start:stop, None]
+        rows = np.arange(stop - start)
+
+        best_ber = np.full(stop - start, np.inf)
+        best_offset = np.zeros(stop - start, np.int64)
+        best_span = np.zeros(stop - start, np.int64)
+        for first in range(0, len(offsets), offset_chunk):
+            window = offsets[first:first + offset_chunk]
+            positions = np.arange(n, dtype=np.int64)[None, :] + \
+                window[:, None]
+            clipped = np.clip(positions, 0, width - 1)
+
+            # Aligned sub-fingerprints per (candidate, offset)
+            span = (np.minimum(n, chunk_lengths - window[None, :]) -
+                    np.maximum(0, -window)[None, :]).clip(0)
+
+            # (chunk, offsets, n) bit differences, masked outside each
+            # candidate
+            bits = popcount(padded[:, clipped] ^ query)
+            valid = (positions >= 0) & (positions < chunk_lengths[:, :, None])
+            errors = np.where(valid, bits, 0).sum(axis=2)
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ber = errors / (32.0 * span)
+            ber[span < required[start:stop, None]] = np.inf
+
+            # Strictly better only, the first best offset wins ties
+            column = ber.argmin(axis=1)
+            ber = ber[rows, column]
+            better = ber < best_ber
+            best_ber[better] = ber[better]
+            best_offset[better] = window[column[better]]
+            best_span[better] = span[rows, column][better]
+
+        for ber, offset, span in zip(best_ber, best_offset, best_span):
+            if not np.isfinite(ber):
+                matches.append(FingerprintMatch(0, 0.0, 0))
+                continue
+            matches.append(FingerprintMatch(int(offset), 1.0 - float(ber),
+                                            int(span)))
+    return matches
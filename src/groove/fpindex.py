@@ -0,0 +1,212 @@
+"""
+Fingerprint similarity index
+
+An inverted index from the high bits of each sub-fingerprint to the places
+it occurs. A query looks up its own sub-fingerprints, votes for
+`(document, offset)` pairs and scores only the best candidates by bit error
+rate, so lookups do not compare against every stored fingerprint.
+
+Requires numpy, install with the `analysis` extra.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import namedtuple
+import json
+import os
+
+import numpy as np
+
+from groove.fpcompare import as_uint32, bit_error_rate
+
+
+__all__ = [
+    'FingerprintIndex',
+    'IndexMatch',
+]
+
+
+IndexMatch = namedtuple('IndexMatch', [
+    'label',
+    'doc_id',
+    'score',
+    'offset',
+    'votes',
+])
+
+
+class FingerprintIndex(object):
+    """Index of raw fingerprints for near-duplicate lookup
+
+    Arguments:
+        key_bits (int): Number of high bits of each sub-fingerprint used as
+                        the index key. Fewer bits tolerate more noise but
+                        make postings longer.
+        max_postings (int): Keys occurring more often than this are ignored
+                            at query time, they carry little information
+    """
+    _files = ('data', 'offsets', 'keys', 'doc_ids', 'positions')
+
+    def __init__(self, key_bits=28, max_postings=10000):
+        self.key_bits = key_bits
+        self.max_postings = max_postings
+        self.labels = []
+
+        self._data = np.zeros(0, np.uint32)
+        self._offsets = np.zeros(1, np.int64)
+        self._pending = []
+
+        self._keys = np.zeros(0, np.uint32)
+        self._doc_ids = np.zeros(0, np.int32)
+        self._positions = np.zeros(0, np.int32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _key(self, values):
+        return values >> (32 - self.key_bits)
+
+    def fingerprint(self, doc_id):
+        """The stored raw fingerprint of a document, as uint32"""
+        self._build()
+        return self._data[self._offsets[doc_id]:self._offsets[doc_id + 1]]
+
+    def add(self, label, fingerprint):
+        """Add a raw or base64-encoded fingerprint
+
+        Returns:
+            The document id of the fingerprint
+        """
+        self._pending.append(as_uint32(fingerprint))
+        self.labels.append(label)
+        return len(self.labels) - 1
+
+    def add_infos(self, infos):
+        """Add every FingerprinterInfo from a Fingerprinter
+
+        Documents are labelled with the filename of the playlist item.
+
+        Returns:
+            A list of the new document ids
+        """
+        return [self.add(info.playlist_item.file.filename, info.fingerprint)
+                for info in infos]
+
+    def _build(self):
+        """Merge pending fingerprints and rebuild the postings"""
+        if not self._pending:
+            return
+
+        lengths = [len(fp) for fp in self._pending]
+        self._data = np.concatenate([self._data] + self._pending)
+        self._offsets = np.concatenate((
+            self._offsets,
+            self._offsets[-1] + np.cumsum(lengths, dtype=np.int64)))
+        self._pending = []
+
+        counts = np.diff(self._offsets)
+        doc_ids = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        positions = (np.arange(len(self._data), dtype=np.int64) -
+                     np.repeat(self._offsets[:-1], counts)).astype(np.int32)
+        keys = self._key(self._data)
+        order = np.argsort(keys, kind='mergesort')
+        self._keys = keys[order]
+        self._doc_ids = doc_ids[order]
+        self._positions = positions[order]
+
+    def _vote(self, query):
+        """Count matching keys per `(doc_id, offset)`
+
+        Returns:
+            Arrays (doc_ids, offsets, votes)
+        """
+        qkeys = self._key(query)
+        lo = np.searchsorted(self._keys, qkeys, 'left')
+        hi = np.searchsorted(self._keys, qkeys, 'right')
+        counts = hi - lo
+        counts[counts > self.max_postings] = 0
+        total = counts.sum()
+        if total == 0:
+            empty = np.zeros(0, np.int64)
+            return empty, empty, empty
+
+        # Expand every [lo, hi) range into posting indices
+        starts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        postings = starts + np.arange(total)
+        qpos = np.repeat(np.arange(len(query)), counts)
+
+        doc_ids = self._doc_ids[postings].astype(np.int64)
+        offsets = self._positions[postings] - qpos
+        pairs = (doc_ids << 32) | (offsets + (1 << 31))
+        pairs, votes = np.unique(pairs, return_counts=True)
+        return pairs >> 32, (pairs & 0xffffffff) - (1 << 31), votes
+
+    def query(self, fingerprint, limit=10, min_score=0.0, candidates=50):
+        """Find stored fingerprints similar to `fingerprint`
+
+        Arguments:
+            fingerprint: Raw or base64-encoded fingerprint
+            limit (int): Maximum number of matches to return
+            min_score (float): Minimum score, 1.0 minus the bit error rate
+            candidates (int): Number of best voted documents to score
+
+        Returns:
+            A list of IndexMatch, best first
+        """
+        self._build()
+        query = as_uint32(fingerprint)
+        doc_ids, offsets, votes = self._vote(query)
+
+        # Best offset of each document, then the most voted documents
+        order = np.lexsort((-votes, doc_ids))
+        doc_ids, offsets, votes = doc_ids[order], offsets[order], votes[order]
+        first = np.ones(len(doc_ids), bool)
+        first[1:] = doc_ids[1:] != doc_ids[:-1]
+        doc_ids, offsets, votes = doc_ids[first], offsets[first], votes[first]
+        best = np.argsort(-votes, kind='mergesort')[:candidates]
+
+        matches = []
+        for n in best:
+            doc_id, offset = int(doc_ids[n]), int(offsets[n])
+            score = 1.0 - bit_error_rate(query, self.fingerprint(doc_id),
+                                         offset)
+            if score >= min_score:
+                matches.append(IndexMatch(self.labels[doc_id], doc_id, score,
+                                          offset, int(votes[n])))
+
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:limit]
+
+    def save(self, path):
+        """Write the index to the directory `path`"""
+        self._build()
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+        arrays = (self._data, self._offsets, self._keys, self._doc_ids,
+                  self._positions)
+        for name, values in zip(self._files, arrays):
+            np.save(os.path.join(path, name + '.npy'), values)
+        with open(os.path.join(path, 'index.json'), 'w') as fd:
+            json.dump({
+                'key_bits': self.key_bits,
+                'max_postings': self.max_postings,
+                'labels': self.labels,
+            }, fd)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Read an index written by `save`
+
+        With `mmap` the arrays are memory-mapped read only instead of read
+        into memory. Adding documents copies them into memory again.
+        """
+        with open(os.path.join(path, 'index.json')) as fd:
+            meta = json.load(fd)
+
+        index = cls(meta['key_bits'], meta['max_postings'])
+        index.labels = meta['labels']
+        mmap_mode = 'r' if mmap else None
+        for name in cls._files:
+            values = np.load(os.path.join(path, name + '.npy'), mmap_mode)
+            setattr(index, '_' + name, values)
+        return index
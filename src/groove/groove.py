@@ -3,8 +3,11 @@ Module providing wrapper classes for a pythonic interface to libgroove.so
 """
 from __future__ import absolute_import, unicode_literals
 
+import atexit
 from enum import IntEnum
 from functools import wraps
+import os
+import threading
 from weakref import WeakValueDictionary
 
 from groove import _constants
@@ -17,9 +20,11 @@ __all__ = [
     'ChannelLayout',
     'GrooveClass',
     'SampleFormat',
+    'finish',
     'init',
     'libgroove_version',
     'libgroove_version_info',
+    'worker_initializer',
 ]
 
 
@@ -37,10 +42,83 @@ def libgroove_version_info():
     )
 
 
+_init_lock = threading.Lock()
+_init_count = 0
+_init_pid = None
+_worker_pid = None
+
+
 def init():
-    import atexit
-    lib.groove_init()
-    atexit.register(lib.groove_finish)
+    """Initialize libgroove
+
+    Calls are reference counted: libgroove is initialized by the first
+    call and finished when every `init` has been matched by a `finish`, or
+    at exit. After `os.fork()` the child starts with a count of zero and the
+    next `init` initializes libgroove again. Objects created before the
+    fork must not be used in the child.
+    """
+    global _init_count, _init_pid
+    with _init_lock:
+        if _init_pid != os.getpid():
+            _init_count = 0
+            _init_pid = os.getpid()
+        if _init_count == 0:
+            assert lib.groove_init() >= 0
+        _init_count += 1
+
+
+def finish():
+    """Release one `init`, finishing libgroove with the last one"""
+    global _init_count
+    with _init_lock:
+        if _init_pid != os.getpid() or _init_count == 0:
+            return
+        _init_count -= 1
+        if _init_count == 0:
+            lib.groove_finish()
+
+
+def worker_initializer():
+    """Initialize libgroove once in a pool worker process
+
+    Pass as `initializer` to `multiprocessing.Pool` or
+    `concurrent.futures.ProcessPoolExecutor`. It can also be called at the
+    start of every task, only the first call in each process initializes.
+    """
+    global _worker_pid
+    if _worker_pid != os.getpid():
+        _worker_pid = os.getpid()
+        init()
+
+
+@atexit.register
+def _finish_at_exit():
+    global _init_count
+    with _init_lock:
+        if _init_pid == os.getpid() and _init_count > 0:
+            _init_count = 0
+            lib.groove_finish()
+
+
+def _before_fork():
+    _init_lock.acquire()
+
+
+def _after_fork_in_parent():
+    _init_lock.release()
+
+
+def _after_fork_in_child():
+    # The lock was held by the forking thread, which is the only thread
+    # left in the child. Replace it rather than trust its state.
+    global _init_lock
+    _init_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork,
+                        after_in_parent=_after_fork_in_parent,
+                        after_in_child=_after_fork_in_child)
 
 
 class GrooveClass(object):
@@ -52,10 +130,12 @@ class GrooveClass(object):
     No two python instances should wrap the same underlying C struct.
 
     Attributes:
+        _ffi (cffi.FFI): The ffi of the extension declaring `_ffitype`
         _ffitype (str): Type of the underlying object as used in `ffi.new`,
                         e.g. `'struct GrooveFile *'`
         _obj (cffi.cdata): The backing struct, if it has been instantiated.
     """
+    _ffi = ffi
     _ffitype = None
     __obj = None
 
@@ -63,6 +143,17 @@ class GrooveClass(object):
     # instance when a C function gives us a struct pointer.
     _obj_instance_map = WeakValueDictionary()
 
+    # Changes to the map for one cdata are serialized by one of these locks,
+    # picked by the hash of the key, so unrelated objects do not contend.
+    # Lookups of existing instances take no lock. They are reentrant as a
+    # finalizer run by the GC while one is held can wrap another cdata.
+    _obj_instance_locks = [threading.RLock() for _ in range(64)]
+
+    @classmethod
+    def _obj_instance_lock(cls, key):
+        locks = cls._obj_instance_locks
+        return locks[hash(key) % len(locks)]
+
     @property
     def _obj(self):
         return self.__obj
@@ -72,15 +163,23 @@ class GrooveClass(object):
         if value == ffi.NULL:
             value = None
 
-        if value is not None and ffi.typeof(value) is not ffi.typeof(self._ffitype):
-            raise TypeError('obj must be of type "%s"' % cls._ffitype)
+        if value is not None and \
+                self._ffi.typeof(value) is not self._ffi.typeof(self._ffitype):
+            raise TypeError('obj must be of type "%s"' % self._ffitype)
 
         if self.__obj is not None:
-            del self._obj_instance_map[(self.__obj, self._ffitype)]
+            key = (self.__obj, self._ffitype)
+            with self._obj_instance_lock(key):
+                # Another instance may have been registered for the cdata
+                # since, only remove our own entry
+                if self._obj_instance_map.get(key) is self:
+                    self._obj_instance_map.pop(key, None)
 
         self.__obj = value
         if value is not None:
-            self._obj_instance_map[(value, self._ffitype)] = self
+            key = (value, self._ffitype)
+            with self._obj_instance_lock(key):
+                self._obj_instance_map[key] = self
 
     @classmethod
     def _from_obj(cls, obj):
@@ -95,18 +194,35 @@ class GrooveClass(object):
             found and returned. It is `True` if a new python instance was
             created.
         """
-        if ffi.typeof(obj) is not ffi.typeof(cls._ffitype):
+        if cls._ffi.typeof(obj) is not cls._ffi.typeof(cls._ffitype):
             raise TypeError('obj must be of type "%s"' % cls._ffitype)
 
-        instance = cls._obj_instance_map.get((obj, cls._ffitype), None)
+        key = (obj, cls._ffitype)
+        instance = cls._obj_instance_map.get(key, None)
         if instance is not None:
             return instance, False
 
-        # TODO: This makes me feel terrible and hate everything :(
-        instance = cls.__new__(cls)
-        instance._obj = obj
+        with cls._obj_instance_lock(key):
+            # Another thread may have wrapped it while we waited
+            instance = cls._obj_instance_map.get(key, None)
+            if instance is not None:
+                return instance, False
+
+            # TODO: This makes me feel terrible and hate everything :(
+            instance = cls.__new__(cls)
+            instance.__obj = obj
+            instance._init_from_obj()
+            cls._obj_instance_map[key] = instance
         return instance, True
 
+    def _init_from_obj(self):
+        """Set up an instance created by `_from_obj` instead of `__init__`
+
+        Runs before the instance is registered, so no other thread can get
+        it half initialized.
+        """
+        pass
+
 
 @utils.unique_enum
 class Channel(IntEnum):
@@ -3,7 +3,7 @@ from __future__ import absolute_import, unicode_literals
 from collections import namedtuple
 
 from groove import utils
-from groove._groove import ffi, lib
+from groove._loudness import ffi, lib
 from groove.groove import GrooveClass
 
 __all__ = [
@@ -12,6 +12,10 @@ __all__ = [
 ]
 
 
+_scratch = utils.Scratch(ffi, pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
 LoudnessDetectorInfo = namedtuple('LoudnessDetectorInfo', [
     'loudness',
     'peak',
@@ -22,6 +26,7 @@ LoudnessDetectorInfo = namedtuple('LoudnessDetectorInfo', [
 
 class LoudnessDetector(GrooveClass):
     """pass"""
+    _ffi = ffi
     _ffitype = 'struct GrooveLoudnessDetector *'
 
     info_queue_size = utils.property_convert('info_queue_size', int,
@@ -108,8 +113,8 @@ class LoudnessDetector(GrooveClass):
             A tuple of (playlist_item, seconds). If the playlist is empty
             playlist_item will be None and seconds will be -1.0
         """
-        pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
-        seconds = ffi.new('double *')
+        pitem_obj_ptr = _scratch.pitem_ptr
+        seconds = _scratch.seconds
         lib.groove_loudness_detector_position(self._obj, pitem_obj_ptr, seconds)
         if pitem_obj_ptr[0] == ffi.NULL:
             pitem = None
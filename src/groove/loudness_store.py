@@ -0,0 +1,216 @@
+"""
+Persistent store of loudness results
+
+Results are keyed by file identity, so a catalog refresh only analyzes files
+that changed since the last run.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import hashlib
+import json
+import sqlite3
+
+from groove import utils
+from groove.replaygain import (AlbumGain, TrackGain, analyze_albums,
+                               db_to_float, group_albums,
+                               loudness_to_replaygain)
+
+
+__all__ = ['LoudnessStore']
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    content_hash TEXT,
+    album TEXT,
+    loudness REAL NOT NULL,
+    peak REAL NOT NULL,
+    duration REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS albums (
+    name TEXT PRIMARY KEY,
+    members TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    loudness REAL NOT NULL,
+    peak REAL NOT NULL,
+    duration REAL NOT NULL
+);
+"""
+
+
+def _members_digest(identities):
+    """Digest of album member identities, changes when any member does"""
+    sha = hashlib.sha1()
+    for ident in identities:
+        sha.update(('%s|%d|%r|%s\n' % ident).encode('utf-8'))
+    return sha.hexdigest()
+
+
+class LoudnessStore(object):
+    """Cache of track and album loudness backed by sqlite
+
+    Arguments:
+        path (str): Database file, created if it does not exist
+        content_hash (bool): Also compare a hash of the file contents when
+                             deciding whether a file changed. Slower, but
+                             catches changes that keep size and mtime.
+    """
+
+    def __init__(self, path, content_hash=False):
+        self.path = path
+        self.content_hash = content_hash
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def _identity(self, filename):
+        try:
+            return utils.file_identity(filename, self.content_hash)
+        except OSError:
+            return None
+
+    def _current_row(self, ident):
+        """The stored track row for `ident` if it is still valid"""
+        if ident is None:
+            return None
+        row = self._db.execute(
+            'SELECT size, mtime, content_hash, album, loudness, peak, duration '
+            'FROM tracks WHERE path = ?', (ident.path,)).fetchone()
+        if row is None or (row[0], row[1]) != (ident.size, ident.mtime):
+            return None
+        if self.content_hash and row[2] != ident.content_hash:
+            return None
+        return row
+
+    def track(self, filename):
+        """Cached TrackGain for `filename`, `None` if missing or stale"""
+        ident = self._identity(filename)
+        row = self._current_row(ident)
+        if row is None:
+            return None
+        loudness, peak, duration = row[4:]
+        return TrackGain(filename, loudness_to_replaygain(loudness), peak,
+                         loudness, duration)
+
+    def album(self, name):
+        """Cached AlbumGain for `name`, `None` if missing or stale"""
+        row = self._db.execute(
+            'SELECT members, digest, loudness, peak, duration '
+            'FROM albums WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return None
+
+        members = json.loads(row[0])
+        identities = [self._identity(f) for f in members]
+        if None in identities or _members_digest(identities) != row[1]:
+            return None
+
+        tracks = [self.track(f) for f in members]
+        if None in tracks:
+            return None
+        loudness, peak, duration = row[2:]
+        return AlbumGain(name, loudness_to_replaygain(loudness), peak,
+                         loudness, duration, tracks)
+
+    def _store(self, result, identities):
+        for track in result.tracks:
+            ident = identities[track.filename]
+            self._db.execute(
+                'INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (ident.path, ident.size, ident.mtime, ident.content_hash,
+                 result.name, track.loudness, track.peak, track.duration))
+
+        if result.loudness is not None:
+            members = [t.filename for t in result.tracks]
+            digest = _members_digest(identities[f] for f in members)
+            self._db.execute(
+                'INSERT OR REPLACE INTO albums VALUES (?, ?, ?, ?, ?, ?)',
+                (result.name, json.dumps(members), digest, result.loudness,
+                 result.peak, result.duration))
+        self._db.commit()
+
+    def update(self, filenames, by='directory', album=True, workers=None):
+        """Analyze the files whose results are missing or stale
+
+        With `album` set, an album is analyzed again as a whole when any of
+        its members changed, was added or was removed, because album
+        loudness cannot be derived from the track results. Otherwise only
+        the changed files are analyzed.
+
+        Arguments:
+            filenames (iterable): Files in the catalog
+            by (str): How to group files into albums, see
+                      `groove.replaygain.group_albums`
+            album (bool): Keep album results up to date as well
+            workers (int): Number of worker processes, see
+                           `groove.replaygain.analyze_albums`
+
+        Returns:
+            A generator of the AlbumGain results that were computed
+        """
+        identities = {}
+        jobs = {}
+        for name, files in group_albums(filenames, by).items():
+            for filename in files:
+                identities[filename] = self._identity(filename)
+
+            changed = [f for f in files
+                       if self._current_row(identities[f]) is None]
+            if album:
+                stored = self.album(name)
+                if stored is None or changed or \
+                        set(files) != set(t.filename for t in stored.tracks):
+                    jobs[name] = files
+            elif changed:
+                jobs[name] = changed
+
+        for result in analyze_albums(jobs, album, workers):
+            self._store(result, identities)
+            yield result
+
+    def apply_to_playlist(self, playlist, album=False):
+        """Set the gain and peak of playlist items from cached results
+
+        Items whose file has no current result are left alone. Nothing is
+        decoded.
+
+        Arguments:
+            playlist (Playlist): Playlist to update
+            album (bool): Use the album gain and peak instead of the track's
+
+        Returns:
+            The number of items updated
+        """
+        albums = {}
+        count = 0
+        for item in playlist:
+            ident = self._identity(item.file.filename)
+            row = self._current_row(ident)
+            if row is None:
+                continue
+
+            loudness, peak = row[4], row[5]
+            if album:
+                name = row[3]
+                if name not in albums:
+                    albums[name] = self.album(name)
+                if albums[name] is None:
+                    continue
+                loudness, peak = albums[name].loudness, albums[name].peak
+
+            item.gain = db_to_float(loudness_to_replaygain(loudness))
+            item.peak = peak
+            count += 1
+        return count
@@ -0,0 +1,251 @@
+"""
+Live loudness metering
+
+A LoudnessMeter attaches its own Sink to a playlist, next to a Player or
+Encoder, and computes EBU R128 loudness from the same decoded audio.
+
+Requires numpy and scipy, install with the `analysis` extra.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import deque, namedtuple
+import math
+import threading
+
+import numpy as np
+from scipy.signal import lfilter
+
+from groove._ndarray import buffer_to_ndarray
+from groove.buffer import Buffer
+from groove.groove import ChannelLayout, SampleFormat
+from groove.sink import Sink
+
+
+__all__ = [
+    'LoudnessMeter',
+    'MeterReading',
+]
+
+
+MeterReading = namedtuple('MeterReading', [
+    'momentary',
+    'short_term',
+    'integrated',
+    'peak',
+    'position',
+    'playlist_item',
+])
+
+
+# ITU-R BS.1770 K-weighting at 48kHz, shelf followed by high pass
+_shelf_b = [1.53512485958697, -2.69169618940638, 1.19839281085285]
+_shelf_a = [1.0, -1.69065929318241, 0.73248077421585]
+_highpass_b = [1.0, -2.0, 1.0]
+_highpass_a = [1.0, -1.99004745483398, 0.99007225036621]
+
+_absolute_gate = -70.0
+_relative_gate = -10.0
+_histogram_step = 0.1
+_histogram_max = 5.0
+
+
+def _loudness(power):
+    if power <= 0.0:
+        return float('-inf')
+    return -0.691 + 10.0 * math.log10(power)
+
+
+class LoudnessMeter(object):
+    """Momentary, short-term and integrated loudness of a playing playlist
+
+    Readings are produced every `interval` seconds of audio. The meter
+    reads decoded audio as soon as the playlist decodes it, so readings
+    lead the Player by its buffered audio. Set the playlist fill mode to
+    `Playlist.any_sink_full` to keep the meter close to playback.
+
+    Integrated loudness is gated as in ITU-R BS.1770 using a 0.1 LU
+    histogram of block loudness, so memory use does not grow with time.
+
+    The sink converts the playlist to `channel_layout` and every channel is
+    weighted equally, as in BS.1770. A mono source upmixed to stereo at
+    -3 dB per channel reads the same as metered in mono. Dual mono, the same
+    signal at full scale on both channels, reads 3 LU louder than one
+    channel of it.
+
+    Arguments:
+        interval (float): Seconds of audio between readings, rounded to a
+                          multiple of 0.1
+        sink_buffer_size (int): Buffer queue size of the meter's sink, in
+                                sample frames
+        channel_layout (int): ChannelLayout the audio is metered in
+    """
+    sample_rate = 48000
+    block_frames = 4800
+
+    def __init__(self, interval=0.1, sink_buffer_size=8192,
+                 channel_layout=ChannelLayout.layout_stereo):
+        self.interval_blocks = max(1, int(round(interval * 10)))
+        self.channels = ChannelLayout.count(channel_layout)
+
+        self.sink = Sink()
+        self.sink.buffer_size = sink_buffer_size
+        fmt = self.sink.audio_format
+        fmt.sample_rate = self.sample_rate
+        fmt.channel_layout = channel_layout
+        fmt.sample_format = SampleFormat.flt
+
+        self._b = np.convolve(_shelf_b, _highpass_b)
+        self._a = np.convolve(_shelf_a, _highpass_a)
+        self._thread = None
+        self._abort = False
+        self.reset()
+
+    @property
+    def playlist(self):
+        """Playlist to meter"""
+        return self.sink.playlist
+
+    @playlist.setter
+    def playlist(self, value):
+        self.sink.playlist = value
+
+    def reset(self):
+        """Restart integration, e.g. at the start of a programme"""
+        self._zi = np.zeros((len(self._a) - 1, self.channels))
+        self._leftover = np.zeros((0, 2))
+        self._blocks = deque(maxlen=30)
+        self._since_reading = 0
+        self._reading_peak = 0.0
+
+        bins = int(round((_histogram_max - _absolute_gate) / _histogram_step))
+        self._hist_count = np.zeros(bins, dtype=np.int64)
+        self._hist_power = np.zeros(bins)
+
+    def integrated(self):
+        """Gated loudness of everything metered since the last reset"""
+        count = self._hist_count.sum()
+        if count == 0:
+            return float('-inf')
+
+        threshold = _loudness(self._hist_power.sum() / count) + _relative_gate
+        start = int(math.floor((threshold - _absolute_gate) / _histogram_step))
+        start = max(start, 0)
+        count = self._hist_count[start:].sum()
+        if count == 0:
+            return float('-inf')
+        return _loudness(self._hist_power[start:].sum() / count)
+
+    def _gate_block(self, power):
+        """Add a 400ms gating block to the histogram"""
+        loudness = _loudness(power)
+        if loudness < _absolute_gate:
+            return
+        index = int((loudness - _absolute_gate) / _histogram_step)
+        index = min(index, len(self._hist_count) - 1)
+        self._hist_count[index] += 1
+        self._hist_power[index] += power
+
+    def _blocks_from(self, samples):
+        """Mean square power and peak of each complete 100ms block
+
+        Arguments:
+            samples (ndarray): `(frames, channels)` floats in [-1.0, 1.0]
+
+        Returns:
+            An array of shape `(blocks, 2)` of `(power, peak)`
+        """
+        filtered, self._zi = lfilter(self._b, self._a, samples, axis=0,
+                                     zi=self._zi)
+        frames = np.empty((len(samples), 2))
+        np.square(filtered).sum(axis=1, out=frames[:, 0])
+        np.abs(samples).max(axis=1, out=frames[:, 1])
+
+        frames = np.concatenate((self._leftover, frames))
+        count = len(frames) // self.block_frames
+        used = count * self.block_frames
+        self._leftover = frames[used:]
+
+        blocks = frames[:used].reshape(count, self.block_frames, 2)
+        return np.column_stack((blocks[:, :, 0].mean(axis=1),
+                                blocks[:, :, 1].max(axis=1)))
+
+    def feed(self, samples, position=None, playlist_item=None):
+        """Meter samples that did not come from the meter's sink
+
+        Arguments:
+            samples (ndarray): `(frames, channels)` 48kHz floats in the
+                               meter's channel layout
+
+        Returns:
+            A list of MeterReading that became due
+        """
+        readings = []
+        for power, peak in self._blocks_from(samples):
+            self._blocks.append(power)
+            self._reading_peak = max(self._reading_peak, peak)
+            if len(self._blocks) >= 4:
+                momentary = sum(list(self._blocks)[-4:]) / 4.0
+                self._gate_block(momentary)
+            else:
+                momentary = sum(self._blocks) / len(self._blocks)
+
+            self._since_reading += 1
+            if self._since_reading < self.interval_blocks:
+                continue
+
+            short_term = sum(self._blocks) / len(self._blocks)
+            readings.append(MeterReading(
+                _loudness(momentary),
+                _loudness(short_term),
+                self.integrated(),
+                float(self._reading_peak),
+                position,
+                playlist_item,
+            ))
+            self._since_reading = 0
+            self._reading_peak = 0.0
+        return readings
+
+    def __iter__(self):
+        """Yield readings until the end of the playlist"""
+        while not self._abort:
+            try:
+                buff = self.sink.get_buffer(True)
+            except Buffer.End:
+                return
+            except Buffer.NotReady:
+                # The sink queue was aborted by a detach
+                continue
+
+            try:
+                samples = buffer_to_ndarray(buff)
+                readings = self.feed(samples, buff.position,
+                                     buff.playlist_item)
+            finally:
+                buff.unref()
+
+            for reading in readings:
+                yield reading
+
+    def start(self, callback):
+        """Call `callback(reading)` for each reading from a background thread"""
+        def run():
+            for reading in self:
+                callback(reading)
+
+        self._abort = False
+        self._thread = threading.Thread(target=run, name='groove-meter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread
+
+        The sink is detached so a thread waiting for audio, e.g. while the
+        playlist is paused, wakes up. Set `playlist` again to restart.
+        """
+        self._abort = True
+        self.sink.playlist = None
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
@@ -0,0 +1,438 @@
+"""
+Pipeline health metrics in the Prometheus text format
+
+Sinks and Encoders count their buffers in a BufferAccount and Players
+count underruns, both cheap to update. A MetricsSampler reads them for the
+objects it watches from a background thread and turns them into metrics of
+a MetricsRegistry, which can be served over HTTP or written to a file for
+the node_exporter textfile collector.
+
+    sampler = MetricsSampler(textfile='/var/lib/node_exporter/groove.prom')
+    sampler.watch(sink, 'library-scan')
+    sampler.start()
+    start_http_server(9464)
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+from collections import OrderedDict
+import os
+import threading
+import time
+import weakref
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from groove.encoder import Encoder
+from groove.sink import Sink
+
+
+__all__ = [
+    'Counter',
+    'Gauge',
+    'MetricsRegistry',
+    'MetricsSampler',
+    'start_http_server',
+    'write_textfile',
+]
+
+
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    _monotonic = time.time
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return ('%s' % value).replace('\\', '\\\\').replace('\n', '\\n') \
+        .replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    return repr(float(value))
+
+
+class _Metric(object):
+    """Values of one metric name, one per combination of label values"""
+    kind = None
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labelvalues):
+        assert len(labelvalues) == len(self.labels), \
+            '%s takes labels %s' % (self.name, self.labels)
+        return tuple('%s' % v for v in labelvalues)
+
+    def get(self, *labelvalues):
+        return self._values.get(self._key(labelvalues), 0.0)
+
+    def remove(self, *labelvalues):
+        """Drop the value for these label values"""
+        with self._lock:
+            self._values.pop(self._key(labelvalues), None)
+
+    def samples(self):
+        """List of `(label values, value)` pairs"""
+        with self._lock:
+            return sorted(self._values.items())
+
+    def render(self):
+        lines = [
+            '# HELP %s %s' % (self.name, self.doc.replace('\n', ' ')),
+            '# TYPE %s %s' % (self.name, self.kind),
+        ]
+        for key, value in self.samples():
+            labels = ','.join('%s="%s"' % (name, _escape(v))
+                              for name, v in zip(self.labels, key))
+            if labels:
+                labels = '{%s}' % labels
+            lines.append('%s%s %s' % (self.name, labels, _format_value(value)))
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """A value that only goes up"""
+    kind = 'counter'
+
+    def inc(self, amount=1, *labelvalues):
+        assert amount >= 0, 'counters can only increase'
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down"""
+    kind = 'gauge'
+
+    def set(self, value, *labelvalues):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1, *labelvalues):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class MetricsRegistry(object):
+    """A named collection of metrics
+
+    `counter` and `gauge` return the existing metric if the name is already
+    registered, so independent parts of a program can share them.
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """The process wide registry"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._metrics.values()))
+
+    def __getitem__(self, name):
+        return self._metrics[name]
+
+    def _register(self, cls, name, doc, labels):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, doc, labels)
+            assert type(metric) is cls and metric.labels == tuple(labels), \
+                '%s is already registered differently' % name
+            return metric
+
+    def counter(self, name, doc, labels=()):
+        return self._register(Counter, name, doc, labels)
+
+    def gauge(self, name, doc, labels=()):
+        return self._register(Gauge, name, doc, labels)
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        return ''.join(metric.render() + '\n' for metric in self)
+
+
+def write_textfile(path, registry=None):
+    """Write the registry to `path`, atomically replacing it"""
+    if registry is None:
+        registry = MetricsRegistry.default()
+    tmp = '%s.%d.tmp' % (path, os.getpid())
+    with open(tmp, 'wb') as fd:
+        fd.write(registry.render().encode('utf-8'))
+    os.rename(tmp, path)
+
+
+def start_http_server(port, address='127.0.0.1', registry=None):
+    """Serve the registry at `http://address:port/metrics` from a thread
+
+    Returns:
+        The HTTPServer, call `shutdown()` on it to stop serving
+    """
+    if registry is None:
+        registry = MetricsRegistry.default()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer((address, port), Handler)
+    thread = threading.Thread(target=server.serve_forever,
+                              name='groove-metrics-http')
+    thread.daemon = True
+    thread.start()
+    return server
+
+
+class _Watch(object):
+    """A watched object and its counters at the last sample"""
+
+    def __init__(self, obj, name, kind):
+        self.ref = weakref.ref(obj)
+        self.name = name
+        self.kind = kind
+        if kind == 'player':
+            self.buffers = self.bytes = 0
+        else:
+            self.buffers = obj.buffer_account.total_count
+            self.bytes = obj.buffer_account.total_bytes
+        self.underruns = obj._underruns if kind == 'player' else 0
+        self.time = None
+
+
+class MetricsSampler(object):
+    """Turn the counters of Sinks, Encoders and Players into metrics
+
+    Watched objects are held through weak references, their series are
+    removed once they are garbage collected.
+
+    Metrics, labelled with the name given to `watch`:
+
+    * `groove_sink_buffers_total`, `groove_sink_bytes_total`: Buffers and
+      bytes taken from a Sink
+    * `groove_sink_decode_speed`: Seconds of audio decoded per second. Name
+      a Sink after its playlist to get the throughput of that playlist.
+    * `groove_sink_fill_bytes`, `groove_sink_fill_ratio`: Decoded audio
+      waiting in a Sink, in bytes and as a fraction of `buffer_size`
+    * `groove_encoder_buffers_total`, `groove_encoder_bytes_total`,
+      `groove_encoder_bytes_per_second`: Encoded output
+    * `groove_buffers_outstanding`, `groove_buffers_outstanding_bytes`:
+      References on buffers of a Sink or Encoder that were not unreferenced
+      yet, and their bytes
+    * `groove_player_underruns_total`: buffer_underrun events read from a
+      Player
+
+    Arguments:
+        registry (MetricsRegistry): Where metrics are kept, defaults to the
+                                    process wide registry
+        interval (float): Seconds between samples of the background thread
+        textfile (str): If set, the registry is written to this file after
+                        every sample
+        clock (callable): Returns the current time in seconds, defaults to
+                          `time.monotonic`
+    """
+
+    def __init__(self, registry=None, interval=1.0, textfile=None,
+                 clock=_monotonic):
+        if registry is None:
+            registry = MetricsRegistry.default()
+        self.registry = registry
+        self.interval = interval
+        self.textfile = textfile
+        self._clock = clock
+        self._watches = []
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._thread = None
+
+        label = ('sink',)
+        self.sink_buffers = registry.counter(
+            'groove_sink_buffers_total', 'Buffers taken from the sink', label)
+        self.sink_bytes = registry.counter(
+            'groove_sink_bytes_total', 'Bytes taken from the sink', label)
+        self.sink_decode_speed = registry.gauge(
+            'groove_sink_decode_speed',
+            'Seconds of audio decoded per second', label)
+        self.sink_fill_bytes = registry.gauge(
+            'groove_sink_fill_bytes', 'Bytes waiting in the sink', label)
+        self.sink_fill_ratio = registry.gauge(
+            'groove_sink_fill_ratio',
+            'Audio waiting in the sink as a fraction of its buffer_size',
+            label)
+
+        label = ('encoder',)
+        self.encoder_buffers = registry.counter(
+            'groove_encoder_buffers_total',
+            'Buffers taken from the encoder', label)
+        self.encoder_bytes = registry.counter(
+            'groove_encoder_bytes_total', 'Bytes taken from the encoder',
+            label)
+        self.encoder_bytes_per_second = registry.gauge(
+            'groove_encoder_bytes_per_second',
+            'Encoded bytes taken per second', label)
+
+        self.buffers_outstanding = registry.gauge(
+            'groove_buffers_outstanding',
+            'Buffers handed out and not unreferenced yet', ('source',))
+        self.buffers_outstanding_bytes = registry.gauge(
+            'groove_buffers_outstanding_bytes',
+            'Bytes of buffers handed out and not unreferenced yet',
+            ('source',))
+        self.player_underruns = registry.counter(
+            'groove_player_underruns_total', 'Player buffer underruns',
+            ('player',))
+
+    def watch(self, obj, name):
+        """Sample a Sink, Encoder or Player, labelled `name`"""
+        if isinstance(obj, Sink):
+            kind = 'sink'
+        elif isinstance(obj, Encoder):
+            kind = 'encoder'
+        else:
+            assert hasattr(obj, '_underruns'), \
+                'only Sinks, Encoders and Players can be watched'
+            kind = 'player'
+        with self._lock:
+            self._watches.append(_Watch(obj, name, kind))
+
+    def unwatch(self, obj):
+        """Stop sampling `obj` and drop its series"""
+        with self._lock:
+            watches = [w for w in self._watches if w.ref() is obj]
+            self._watches = [w for w in self._watches if w.ref() is not obj]
+        for watch in watches:
+            self._remove(watch)
+
+    def _remove(self, watch):
+        name = watch.name
+        if watch.kind == 'sink':
+            metrics = [self.sink_buffers, self.sink_bytes,
+                       self.sink_decode_speed, self.sink_fill_bytes,
+                       self.sink_fill_ratio, self.buffers_outstanding,
+                       self.buffers_outstanding_bytes]
+        elif watch.kind == 'encoder':
+            metrics = [self.encoder_buffers, self.encoder_bytes,
+                       self.encoder_bytes_per_second, self.buffers_outstanding,
+                       self.buffers_outstanding_bytes]
+        else:
+            metrics = [self.player_underruns]
+        for metric in metrics:
+            metric.remove(name)
+
+    def _sample_account(self, watch, account):
+        """Set the outstanding gauges, returns the totals handed out"""
+        self.buffers_outstanding.set(account.count, watch.name)
+        self.buffers_outstanding_bytes.set(account.bytes, watch.name)
+        return account.total_count, account.total_bytes
+
+    def _sample_sink(self, watch, sink, elapsed):
+        buffers, nbytes = self._sample_account(watch, sink.buffer_account)
+        self.sink_buffers.inc(buffers - watch.buffers, watch.name)
+        self.sink_bytes.inc(nbytes - watch.bytes, watch.name)
+
+        bytes_per_sec = sink.bytes_per_sec
+        if sink.playlist is None or not bytes_per_sec:
+            self.sink_fill_bytes.set(0, watch.name)
+            self.sink_fill_ratio.set(0, watch.name)
+            self.sink_decode_speed.set(0, watch.name)
+        else:
+            fill = sink.fill_level
+            frame_size = bytes_per_sec / sink.audio_format.sample_rate
+            self.sink_fill_bytes.set(fill, watch.name)
+            self.sink_fill_ratio.set(fill / (sink.buffer_size * frame_size),
+                                     watch.name)
+            if elapsed:
+                speed = (nbytes - watch.bytes) / bytes_per_sec / elapsed
+                self.sink_decode_speed.set(speed, watch.name)
+
+        watch.buffers, watch.bytes = buffers, nbytes
+
+    def _sample_encoder(self, watch, encoder, elapsed):
+        buffers, nbytes = self._sample_account(watch, encoder.buffer_account)
+        self.encoder_buffers.inc(buffers - watch.buffers, watch.name)
+        self.encoder_bytes.inc(nbytes - watch.bytes, watch.name)
+        if elapsed:
+            self.encoder_bytes_per_second.set(
+                (nbytes - watch.bytes) / elapsed, watch.name)
+        watch.buffers, watch.bytes = buffers, nbytes
+
+    def _sample_player(self, watch, player, elapsed):
+        underruns = player._underruns
+        self.player_underruns.inc(underruns - watch.underruns, watch.name)
+        watch.underruns = underruns
+
+    def sample(self):
+        """Update the metrics of every watched object once"""
+        now = self._clock()
+        with self._lock:
+            watches = list(self._watches)
+
+        for watch in watches:
+            obj = watch.ref()
+            if obj is None:
+                with self._lock:
+                    self._watches.remove(watch)
+                self._remove(watch)
+                continue
+
+            elapsed = None if watch.time is None else now - watch.time
+            watch.time = now
+            sample = getattr(self, '_sample_' + watch.kind)
+            sample(watch, obj, elapsed)
+
+        if self.textfile is not None:
+            write_textfile(self.textfile, self.registry)
+
+    def start(self):
+        """Call `sample` every `interval` seconds from a background thread"""
+        def run():
+            while not self._abort.wait(self.interval):
+                self.sample()
+
+        self._abort.clear()
+        self._thread = threading.Thread(target=run, name='groove-metrics')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        if self._thread is not None:
+            self._abort.set()
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,170 @@
+"""
+Wall clock pacing for real-time output
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import namedtuple
+import time
+
+from groove._groove import ffi
+from groove.buffer import Buffer
+
+
+__all__ = [
+    'Pacer',
+    'PacerStats',
+]
+
+
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    _monotonic = time.time
+
+
+PacerStats = namedtuple('PacerStats', [
+    'released',
+    'late',
+    'max_late',
+    'drift',
+    'resyncs',
+])
+
+
+class Pacer(object):
+    """Release buffers from a Sink or Encoder at their presentation time
+
+    Buffers are pulled from `source` as usual, but `get_buffer` holds each
+    one until the monotonic clock reaches its presentation time. The
+    presentation time is worked out from `Buffer.position` and, for decoded
+    audio, the frame count and sample rate. Header and trailer buffers of an
+    encoder (no playlist item) are released immediately.
+
+    To drive many streams from one thread, call `get_buffer(block=False)`
+    and use `due()` to find out when the held buffer may be released.
+
+    Arguments:
+        source (Sink or Encoder): Where to pull buffers from
+        lead (float): Seconds a buffer is released ahead of its presentation
+                      time, this is how much audio the consumer has queued
+        jitter (float): Seconds a buffer may be released after its scheduled
+                        time before it counts as late
+        resync (bool): If a buffer is late, move the clock forward instead of
+                       releasing the following buffers in a burst
+        clock (callable): Returns the current time in seconds, defaults to
+                          `time.monotonic`
+        sleep (callable): Sleeps for a number of seconds
+    """
+
+    def __init__(self, source, lead=0.5, jitter=0.1, resync=True,
+                 clock=_monotonic, sleep=time.sleep):
+        self.source = source
+        self.lead = lead
+        self.jitter = jitter
+        self.resync = resync
+        self.clock = clock
+        self.sleep = sleep
+        self.reset()
+
+    def reset(self):
+        """Forget the clock anchor and statistics
+
+        Call this after seeking the source playlist.
+        """
+        self._pending = None
+        self._pending_pts = None
+        self._origin = None
+        self._start = None
+        self._item = None
+        self._item_base = 0.0
+        self._media_end = 0.0
+        self._released = 0
+        self._late = 0
+        self._max_late = 0.0
+        self._drift = 0.0
+        self._resyncs = 0
+
+    @property
+    def stats(self):
+        """PacerStats for the buffers released so far
+
+        `drift` is how far the last buffer was released after its scheduled
+        time, `max_late` is the largest drift of a late buffer.
+        """
+        return PacerStats(self._released, self._late, self._max_late,
+                          self._drift, self._resyncs)
+
+    def presentation_time(self, buff):
+        """Media time in seconds at which `buff` starts playing
+
+        Returns `None` for buffers not tied to a playlist item. This must be
+        called once for every buffer, in order.
+        """
+        item_obj = buff._obj.item
+        if item_obj == ffi.NULL:
+            return None
+
+        position = buff.position
+        if item_obj != self._item:
+            self._item = item_obj
+            self._item_base = self._media_end - position
+
+        pts = self._item_base + position
+        end = pts
+        if buff.frame_count > 0:
+            end += buff.frame_count / float(buff._obj.format.sample_rate)
+        self._media_end = max(self._media_end, end)
+        return pts
+
+    def due(self):
+        """Clock time the held buffer may be released, or `None`"""
+        if self._pending is None:
+            return None
+        if self._pending_pts is None:
+            return self.clock()
+        if self._origin is None:
+            self._start = self.clock()
+            self._origin = self._start - self._pending_pts
+        return self._origin + self._pending_pts - self.lead
+
+    def get_buffer(self, block=True):
+        """Get the next buffer once it is due
+
+        If `block` is False and no buffer is due, this raises
+        `groove.Buffer.NotReady`; the buffer stays held until the next call.
+        `groove.Buffer.End` is passed through from the source.
+        """
+        if self._pending is None:
+            self._pending = self.source.get_buffer(block)
+            self._pending_pts = self.presentation_time(self._pending)
+
+        due = self.due()
+        now = self.clock()
+        if now < due:
+            if not block:
+                raise Buffer.NotReady()
+            self.sleep(due - now)
+            now = self.clock()
+
+        # The first `lead` seconds are sent in a burst when the clock starts,
+        # those buffers are not late.
+        if self._start is not None:
+            due = max(due, self._start)
+        self._drift = now - due
+        if self._pending_pts is not None and self._drift > self.jitter:
+            self._late += 1
+            self._max_late = max(self._max_late, self._drift)
+            if self.resync:
+                self._origin += self._drift
+                self._resyncs += 1
+
+        buff, self._pending = self._pending, None
+        self._released += 1
+        return buff
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.get_buffer(True)
+            except Buffer.End:
+                return
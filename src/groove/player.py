@@ -2,26 +2,60 @@ from __future__ import absolute_import, unicode_literals
 
 from collections import namedtuple
 from enum import IntEnum
+import logging
+import threading
+import time
+import weakref
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 from groove import _constants
 from groove import utils
-from groove._groove import ffi, lib
+from groove._player import ffi, lib
 from groove.audio_format import AudioFormat
 from groove.groove import GrooveClass
 
 __all__ = [
     'Device',
     'Player',
-    'PlayerEvent'
+    'PlayerEvent',
+    'PlayerEventDispatcher',
+    'PlayerEventInfo',
 ]
 
 
+_log = logging.getLogger(__name__)
+
+
+_scratch = utils.Scratch(ffi, event='union GroovePlayerEvent *',
+                         pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    _monotonic = time.time
+
+
 Device = namedtuple('Device', [
     'index',
     'name',
 ])
 
 
+PlayerEventInfo = namedtuple('PlayerEventInfo', [
+    'player',
+    'event',
+    'playlist_item',
+    'seconds',
+    'time',
+])
+
+
 @utils.unique_enum
 class PlayerEvent(IntEnum):
     """Enumeration for Player events"""
@@ -31,10 +65,14 @@ class PlayerEvent(IntEnum):
 
 
 class Player(GrooveClass):
+    _ffi = ffi
     _ffitype = 'struct GroovePlayer *'
     dummy_device = Device(_constants.GROOVE_PLAYER_DUMMY_DEVICE, 'dummy')
     default_device = Device(_constants.GROOVE_PLAYER_DEFAULT_DEVICE, 'default')
 
+    # Read by groove.metrics
+    _underruns = 0
+
     @classmethod
     def list_devices(cls):
         """Get the list of available devices
@@ -95,13 +133,15 @@ class Player(GrooveClass):
         These are preferences; if a setting cannot be used, a substitute will
         be used instead. `actual_audio_format` is set to the actual values.
         """
-        fmt, _ = AudioFormat._from_obj(self._obj.target_audio_format)
+        fmt_obj = ffi.addressof(self._obj.target_audio_format)
+        fmt, _ = AudioFormat._from_obj(fmt_obj)
         return fmt
 
     @property
     def actual_audio_format(self):
         """Set to the actual audio format you get when you open the device"""
-        fmt, _ = AudioFormat._from_obj(self._obj.actual_audio_format)
+        fmt_obj = ffi.addressof(self._obj.actual_audio_format)
+        fmt, _ = AudioFormat._from_obj(fmt_obj)
         return fmt
 
     @property
@@ -147,14 +187,17 @@ class Player(GrooveClass):
 
     def event_get(self, block=False):
         """Get player event"""
-        event_obj = ffi.new('union GroovePlayerEvent *')
+        event_obj = _scratch.event
         result = lib.groove_player_event_get(self._obj, event_obj, block)
         assert result >= 0
 
         if result == 0:
             return None
 
-        return PlayerEvent.__values__[event_obj.type]
+        event = PlayerEvent.__values__[event_obj.type]
+        if event is PlayerEvent.buffer_underrun:
+            self._underruns += 1
+        return event
 
     def event_peek(self, block=False):
         """Check if event is ready"""
@@ -169,11 +212,196 @@ class Player(GrooveClass):
             A tuple of (playlist_item, seconds). If the playlist is empty
             playlist_item will be None and seconds will be -1.0
         """
-        pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
-        seconds = ffi.new('double *')
+        pitem_obj_ptr = _scratch.pitem_ptr
+        seconds = _scratch.seconds
         lib.groove_player_position(self._obj, pitem_obj_ptr, seconds)
         if pitem_obj_ptr[0] == ffi.NULL:
             pitem = None
         else:
             pitem = self.playlist._pitem(pitem_obj_ptr[0])
         return pitem, float(seconds[0])
+
+
+class _Subscription(object):
+    def __init__(self, handler, player, events):
+        self.handler = handler
+        self.player = player
+        self.events = events
+        self.queue = None
+
+    def matches(self, info):
+        return ((self.player is None or self.player is info.player) and
+                (self.events is None or info.event in self.events))
+
+
+class PlayerEventDispatcher(object):
+    """Deliver events of many Players from a single thread
+
+    libgroove can only wait on one player at a time, so the dispatcher
+    thread polls every watched player, sleeping `interval` seconds when none
+    had an event. For each event the position is read once and handed to
+    every subscriber in a PlayerEventInfo, `time` being the monotonic time
+    the event was read.
+
+    Players are watched through weak references, they stop being watched
+    when they are garbage collected. Use `PlayerEventDispatcher.default()` to
+    share one thread across a process.
+
+    Arguments:
+        interval (float): Seconds between polls when no event is pending
+    """
+    _default = None
+    _default_lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        """The process wide dispatcher"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self._players = weakref.WeakSet()
+        self._subscriptions = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._abort = False
+
+    def add_player(self, player):
+        """Start watching `player` for events
+
+        The dispatcher thread is started if it is not running.
+        """
+        with self._lock:
+            self._players.add(player)
+        self.start()
+
+    def remove_player(self, player):
+        """Stop watching `player`, its pending events are left queued"""
+        with self._lock:
+            self._players.discard(player)
+
+    def subscribe(self, callback, player=None, events=None):
+        """Call `callback(info)` from the dispatcher thread for each event
+
+        Callbacks must not block, exceptions are logged and ignored.
+
+        Arguments:
+            callback (callable): Receives a PlayerEventInfo
+            player (Player): Only events of this player, it is added to the
+                             watched players. Defaults to all players.
+            events (iterable): Only these PlayerEvent types, defaults to all
+
+        Returns:
+            A handle for `unsubscribe`
+        """
+        if events is not None:
+            events = frozenset(events)
+        subscription = _Subscription(callback, player, events)
+        with self._lock:
+            self._subscriptions = self._subscriptions + [subscription]
+        if player is not None:
+            self.add_player(player)
+        return subscription
+
+    def subscribe_queue(self, player=None, events=None, maxsize=0):
+        """Put each event in a new `queue.Queue`
+
+        Events are dropped with a warning when the queue is full.
+
+        Returns:
+            The queue, also the handle for `unsubscribe`
+        """
+        events_queue = queue.Queue(maxsize)
+
+        def put(info):
+            try:
+                events_queue.put_nowait(info)
+            except queue.Full:
+                _log.warning('Event queue full, dropped %s', info.event.name)
+
+        subscription = self.subscribe(put, player, events)
+        subscription.queue = events_queue
+        return events_queue
+
+    def unsubscribe(self, handle):
+        """Remove a subscription made with `subscribe` or `subscribe_queue`"""
+        with self._lock:
+            self._subscriptions = [
+                s for s in self._subscriptions
+                if s is not handle and s.queue is not handle]
+
+    def poll(self):
+        """Dispatch every pending event once
+
+        This is what the dispatcher thread runs, it can also be called
+        directly instead of starting the thread.
+
+        Returns:
+            The number of events dispatched
+        """
+        with self._lock:
+            players = list(self._players)
+
+        count = 0
+        for player in players:
+            try:
+                count += self._poll_player(player)
+            except Exception:
+                _log.exception('Error polling player events')
+        return count
+
+    def _poll_player(self, player):
+        count = 0
+        while True:
+            event = player.event_get(False)
+            if event is None:
+                return count
+            pitem, seconds = player.position()
+            self._dispatch(PlayerEventInfo(player, event, pitem, seconds,
+                                           _monotonic()))
+            count += 1
+
+    def _dispatch(self, info):
+        for subscription in self._subscriptions:
+            if not subscription.matches(info):
+                continue
+            try:
+                subscription.handler(info)
+            except Exception:
+                _log.exception('Error in player event callback')
+
+    def start(self):
+        """Start the dispatcher thread if it is not running"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._abort = False
+            self._thread = threading.Thread(target=self._run,
+                                            name='groove-player-events')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        """Stop the dispatcher thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._abort = True
+        self._wake.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        try:
+            while not self._abort:
+                if self.poll() == 0:
+                    self._wake.wait(self.interval)
+                    self._wake.clear()
+        finally:
+            with self._lock:
+                # Unless stop() already let a new thread start
+                if self._thread is threading.current_thread():
+                    self._thread = None
@@ -15,6 +15,10 @@ from groove.groove import GrooveClass
 __all__ = ['Playlist', 'PlaylistItem']
 
 
+_scratch = utils.Scratch(ffi, pitem_ptr='struct GroovePlaylistItem **',
+                         seconds='double *')
+
+
 class PlaylistItem(GrooveClass):
     """Item in a playlist
 
@@ -61,7 +65,7 @@ class PlaylistItem(GrooveClass):
         pure amplifier rather than a compressor. This results in slightly
         better audio quality.
         """
-        return self._obj.gain
+        return self._obj.peak
 
     @peak.setter
     def peak(self, value):
@@ -94,8 +98,14 @@ class PlaylistItem(GrooveClass):
         raise NotImplementedError('PlaylistItems can only be created by the playlist')
 
     def __eq__(self, rhs):
+        if not isinstance(rhs, PlaylistItem):
+            return NotImplemented
         return self._obj == rhs._obj
 
+    def __ne__(self, rhs):
+        result = self.__eq__(rhs)
+        return result if result is NotImplemented else not result
+
 
 class Playlist(GrooveClass, MutableSequence):
     """Groove Playlist - A mutable sequence of playlist items
@@ -145,35 +155,35 @@ class Playlist(GrooveClass, MutableSequence):
         self._obj = ffi.gc(obj, lib.groove_playlist_destroy)
 
     def __iter__(self):
-        item_obj = self._obj.head
-        while item_obj != ffi.NULL:
+        for item_obj in self._item_objs():
             yield self._pitem(item_obj)
-            item_obj = item_obj.next
 
     def __reversed__(self):
-        item_obj = self._obj.tail
-        while item_obj != ffi.NULL:
+        for item_obj in reversed(self._item_objs()):
             yield self._pitem(item_obj)
-            item_obj = item_obj.prev
 
     def __len__(self):
-        return len([x for x in self])
+        return lib.groove_playlist_count(self._obj)
 
     def __getitem__(self, index):
         # TODO: slicing
         if isinstance(index, slice):
             raise TypeError("Slicing a Playlist is not supported")
 
-        if index < 0:
-            iterator = reversed(self)
-            index = -index - 1
-        else:
-            iterator = self
-
-        for n, item in enumerate(iterator):
-            if n == index:
-                return self._pitem(item._obj)
-        raise IndexError
+        item_obj = lib.pygroove_playlist_item_at(self._obj, index)
+        if item_obj == ffi.NULL:
+            raise IndexError
+        return self._pitem(item_obj)
+
+    def _item_objs(self):
+        """Snapshot of every item pointer, collected in one C call"""
+        size = lib.groove_playlist_count(self._obj)
+        while True:
+            items = ffi.new('struct GroovePlaylistItem *[]', size)
+            count = lib.pygroove_playlist_items(self._obj, items, size)
+            if count <= size:
+                return items[0:count]
+            size = count
 
     def __setitem__(self, index, value):
         remove_obj = self[index]._obj
@@ -231,6 +241,17 @@ class Playlist(GrooveClass, MutableSequence):
         else:
             raise ValueError("File is not in Playlist")
 
+    def apply_loudness(self, store, album=False):
+        """Set item gain and peak from a `groove.loudness_store.LoudnessStore`
+
+        Items whose file has no up to date result in the store are left
+        alone. This does not decode any audio.
+
+        Returns:
+            The number of items updated
+        """
+        return store.apply_to_playlist(self, album)
+
     def set_fill_mode(self, value):
         """Set the fill mode for the playlist
 
@@ -256,8 +277,8 @@ class Playlist(GrooveClass, MutableSequence):
             A tuple of (playlist_item, seconds). If the playlist is empty
             playlist_item will be None and seconds will be -1.0
         """
-        pitem_obj_ptr = ffi.new('struct GroovePlaylistItem **')
-        seconds = ffi.new('double *')
+        pitem_obj_ptr = _scratch.pitem_ptr
+        seconds = _scratch.seconds
         lib.groove_playlist_position(self._obj, pitem_obj_ptr, seconds)
         if pitem_obj_ptr[0] == ffi.NULL:
             pitem = None
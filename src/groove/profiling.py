@@ -0,0 +1,320 @@
+"""
+Opt-in timing of calls into libgroove
+
+While profiling is enabled, the instrumented wrapper methods are replaced on
+their classes by timed versions that record call counts, errors, latency
+histograms and the bytes they return. When disabled the original methods
+are put back, so there is no overhead at all.
+
+    with Profiler() as prof:
+        decode_everything()
+    print(prof.report())
+
+Enabling imports every instrumented module, those whose library cannot be
+loaded are skipped. `Buffer.End` and `Buffer.NotReady` are results rather
+than failures and are not counted as errors. Generators such as the
+detectors' `__iter__` are timed per item, so each call is one info get.
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+from collections import namedtuple
+from functools import wraps
+import importlib
+import inspect
+import threading
+import time
+
+
+__all__ = [
+    'BUCKETS',
+    'CallStats',
+    'Profiler',
+    'disable',
+    'enable',
+    'is_enabled',
+    'reset',
+    'snapshot',
+]
+
+
+try:
+    _perf_counter = time.perf_counter
+except AttributeError:
+    _perf_counter = time.time
+
+
+CallStats = namedtuple('CallStats', [
+    'name',
+    'calls',
+    'errors',
+    'total',
+    'min',
+    'max',
+    'histogram',
+    'bytes',
+])
+
+
+# Upper bounds in seconds of the histogram buckets, the last is unbounded
+BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0, float('inf'))
+
+
+def _buffer_bytes(result):
+    return result.size
+
+
+# (module, class, method, bytes of the result)
+_targets = [
+    ('groove.sink', 'Sink', 'get_buffer', _buffer_bytes),
+    ('groove.sink', 'Sink', 'buffer_peek', None),
+    ('groove.encoder', 'Encoder', 'get_buffer', _buffer_bytes),
+    ('groove.encoder', 'Encoder', 'buffer_peek', None),
+    ('groove.file', 'File', 'open', None),
+    ('groove.file', 'File', 'close', None),
+    ('groove.file', 'File', 'save', None),
+    ('groove.file', 'File', 'get_tags', None),
+    ('groove.playlist', 'Playlist', '__getitem__', None),
+    ('groove.playlist', 'Playlist', '__len__', None),
+    ('groove.playlist', 'Playlist', 'insert', None),
+    ('groove.playlist', 'Playlist', 'remove', None),
+    ('groove.playlist', 'Playlist', 'clear', None),
+    ('groove.playlist', 'Playlist', 'seek', None),
+    ('groove.playlist', 'Playlist', 'decode_position', None),
+    ('groove.loudness', 'LoudnessDetector', '__iter__', None),
+    ('groove.loudness', 'LoudnessDetector', 'info_peek', None),
+    ('groove.loudness', 'LoudnessDetector', 'position', None),
+    ('groove.fingerprinter', 'Fingerprinter', '__iter__', None),
+    ('groove.fingerprinter', 'Fingerprinter', 'info_peek', None),
+    ('groove.fingerprinter', 'Fingerprinter', 'position', None),
+    ('groove.player', 'Player', 'position', None),
+]
+
+
+class _Stats(object):
+    """Mutable counterpart of CallStats"""
+    __slots__ = ('calls', 'errors', 'total', 'min', 'max', 'histogram',
+                 'bytes')
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.histogram = [0] * len(BUCKETS)
+        self.bytes = 0
+
+    def add(self, elapsed, error, nbytes):
+        self.calls += 1
+        self.errors += error
+        self.total += elapsed
+        if self.min is None or elapsed < self.min:
+            self.min = elapsed
+        if self.max is None or elapsed > self.max:
+            self.max = elapsed
+        for n, bound in enumerate(BUCKETS):
+            if elapsed <= bound:
+                self.histogram[n] += 1
+                break
+        self.bytes += nbytes
+
+    def freeze(self, name):
+        return CallStats(name, self.calls, self.errors, self.total,
+                         self.min or 0.0, self.max or 0.0,
+                         tuple(self.histogram), self.bytes)
+
+
+_lock = threading.Lock()
+# Held while methods are swapped, so enable and disable do not interleave
+_switch_lock = threading.Lock()
+_enabled = 0
+_originals = {}
+
+# Every enabled collection of stats, the global one and each active Profiler
+_global_stats = {}
+_collectors = []
+
+
+def _record(name, elapsed, error, nbytes):
+    with _lock:
+        for stats in _collectors:
+            entry = stats.get(name)
+            if entry is None:
+                entry = stats[name] = _Stats()
+            entry.add(elapsed, error, nbytes)
+
+
+def _timed(name, func, nbytes, expected):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = _perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except expected:
+            _record(name, _perf_counter() - start, 0, 0)
+            raise
+        except Exception:
+            _record(name, _perf_counter() - start, 1, 0)
+            raise
+        _record(name, _perf_counter() - start, 0,
+                nbytes(result) if nbytes is not None else 0)
+        return result
+    return wrapper
+
+
+def _timed_generator(name, func):
+    """Time each item produced by a generator, e.g. every info of a detector"""
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        iterator = func(*args, **kwargs)
+        while True:
+            start = _perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except Exception:
+                _record(name, _perf_counter() - start, 1, 0)
+                raise
+            _record(name, _perf_counter() - start, 0, 0)
+            yield item
+    return wrapper
+
+
+def _expected_exceptions():
+    try:
+        from groove.buffer import Buffer
+    except ImportError:
+        return ()
+    return (Buffer.End, Buffer.NotReady)
+
+
+def _install():
+    expected = _expected_exceptions()
+    for module_name, class_name, method, nbytes in _targets:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        cls = getattr(module, class_name)
+        func = cls.__dict__[method]
+        name = '%s.%s' % (class_name, method)
+        if inspect.isgeneratorfunction(func):
+            timed = _timed_generator(name, func)
+        else:
+            timed = _timed(name, func, nbytes, expected)
+        _originals[(cls, method)] = func
+        setattr(cls, method, timed)
+
+
+def _uninstall():
+    for (cls, method), func in _originals.items():
+        setattr(cls, method, func)
+    _originals.clear()
+
+
+def enable():
+    """Start recording, calls nest and must be matched by `disable`"""
+    global _enabled
+    with _switch_lock:
+        _enabled += 1
+        if _enabled > 1:
+            return
+        with _lock:
+            _collectors.append(_global_stats)
+        _install()
+
+
+def disable():
+    """Stop recording once every `enable` has been matched"""
+    global _enabled
+    with _switch_lock:
+        if _enabled == 0:
+            return
+        _enabled -= 1
+        if _enabled > 0:
+            return
+        with _lock:
+            _collectors.remove(_global_stats)
+        _uninstall()
+
+
+def is_enabled():
+    return _enabled > 0
+
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        _global_stats.clear()
+
+
+def _freeze(stats):
+    return dict((name, entry.freeze(name)) for name, entry in stats.items())
+
+
+def snapshot():
+    """Everything recorded since the last `reset`
+
+    Returns:
+        A dict of `Class.method: CallStats`
+    """
+    with _lock:
+        return _freeze(_global_stats)
+
+
+def _format(stats):
+    lines = ['%-32s %8s %6s %10s %10s %10s %12s' % (
+        'call', 'calls', 'errors', 'total s', 'mean ms', 'max ms', 'bytes')]
+    for entry in sorted(stats.values(), key=lambda s: s.total, reverse=True):
+        lines.append('%-32s %8d %6d %10.4f %10.4f %10.4f %12d' % (
+            entry.name, entry.calls, entry.errors, entry.total,
+            1000 * entry.total / entry.calls, 1000 * entry.max, entry.bytes))
+    return '\n'.join(lines)
+
+
+class Profiler(object):
+    """Record the calls made while the context is active
+
+    Profilers may be nested and used from several threads, each records
+    every instrumented call made in the process while it is active.
+
+    Attributes:
+        wall (float): Seconds the profiler was active
+    """
+
+    def __init__(self):
+        self.wall = 0.0
+        self._stats = {}
+        self._start = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.stop()
+
+    def start(self):
+        enable()
+        with _lock:
+            _collectors.append(self._stats)
+        self._start = _perf_counter()
+
+    def stop(self):
+        self.wall += _perf_counter() - self._start
+        with _lock:
+            _collectors.remove(self._stats)
+        disable()
+
+    def stats(self):
+        """A dict of `Class.method: CallStats`"""
+        with _lock:
+            return _freeze(self._stats)
+
+    def report(self):
+        """The stats as a table, the most expensive calls first"""
+        stats = self.stats()
+        total = sum(entry.total for entry in stats.values())
+        return '%s\n%.4f of %.4f s wall time in instrumented calls' % (
+            _format(stats), total, self.wall)
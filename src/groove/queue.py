@@ -0,0 +1,186 @@
+"""
+Thread safe queue backed by GrooveQueue
+"""
+from __future__ import absolute_import, unicode_literals
+
+import threading
+
+from decorator import decorator
+
+from groove import utils
+from groove._groove import ffi, lib
+from groove.buffer import Buffer
+from groove.groove import GrooveClass
+
+
+__all__ = ['Queue']
+
+
+_scratch = utils.Scratch(ffi, obj_ptr='void **')
+
+
+@decorator
+def _require_open(method, *args, **kwargs):
+    if args[0]._obj is None:
+        raise ValueError('Queue is closed')
+    return method(*args, **kwargs)
+
+
+def _unref_buffer(item):
+    if isinstance(item, Buffer):
+        item.unref()
+
+
+class _QueueState(object):
+    """What the C callbacks of a Queue need, reached through `context`
+
+    Kept apart from the Queue so the callbacks still work while the Queue
+    is being finalized.
+    """
+
+    def __init__(self, cleanup):
+        self.cleanup = cleanup
+        self.held = {}
+        self.predicate = None
+
+
+class Queue(GrooveClass):
+    """FIFO queue for handing cdata between threads
+
+    Locking and waiting happen in libgroove with the GIL released, which
+    makes handing items to another thread cheaper than with `queue.Queue`.
+
+    Items are GrooveClass instances, such as Buffers, or cdata pointers.
+    `get` returns the very object that was `put`. The queue keeps a
+    reference to every queued item, an item may only be queued once at a
+    time.
+
+    Items discarded by `flush`, `purge` or `close` are passed to `cleanup`.
+    The default unrefs Buffers, so a Buffer put in the queue hands over its
+    reference. `cleanup` runs while libgroove holds the queue lock and must
+    not use the queue.
+
+    Arguments:
+        cleanup (callable): Called with every discarded item, or `None`
+    """
+    _ffitype = 'struct GrooveQueue *'
+
+    class Empty(Exception): pass
+    class Aborted(Exception): pass
+
+    def __init__(self, cleanup=_unref_buffer):
+        # TODO: better exception handling
+        obj = lib.groove_queue_create()
+        assert obj != ffi.NULL
+        self._state = _QueueState(cleanup)
+        self._handle = ffi.new_handle(self._state)
+        self._purge_lock = threading.Lock()
+        # libgroove only checks abort in get, put is refused here
+        self._aborted = False
+        obj.context = self._handle
+        obj.cleanup = lib.pygroove_queue_cleanup
+        obj.purge = lib.pygroove_queue_purge
+        self._obj = obj
+
+    def __del__(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        """Discard every item and free the queue
+
+        Call `abort` first and wait for consumers if any thread could be
+        blocked in `get`.
+        """
+        obj = self._obj
+        if obj is None:
+            return
+        lib.groove_queue_flush(obj)
+        self._obj = None
+        lib.groove_queue_destroy(obj)
+
+    @staticmethod
+    def _key(item):
+        obj = item._obj if isinstance(item, GrooveClass) else item
+        return ffi.cast('void *', obj)
+
+    @_require_open
+    def put(self, item):
+        """Append an item, raises `Queue.Aborted` after `abort`"""
+        if self._aborted:
+            raise Queue.Aborted()
+        key = self._key(item)
+        held = self._state.held
+        assert key not in held, 'item is already queued'
+        # Hold it before libgroove can hand it to a consumer
+        held[key] = item
+        if lib.groove_queue_put(self._obj, key) < 0:
+            held.pop(key, None)
+            raise Queue.Aborted()
+
+    @_require_open
+    def get(self, block=True):
+        """Remove and return the first item
+
+        If `block` is False and the queue is empty this raises
+        `Queue.Empty`. After `abort` this raises `Queue.Aborted`, waking
+        every blocked `get`.
+        """
+        obj_ptr = _scratch.obj_ptr
+        value = lib.groove_queue_get(self._obj, obj_ptr, block)
+        if value < 0:
+            raise Queue.Aborted()
+        if value == 0:
+            raise Queue.Empty()
+        return self._state.held.pop(obj_ptr[0])
+
+    @_require_open
+    def peek(self, block=False):
+        """True if an item is ready, False if not or after `abort`"""
+        return lib.groove_queue_peek(self._obj, block) == 1
+
+    @_require_open
+    def abort(self):
+        """Wake every blocked `get` and refuse new items until `reset`"""
+        self._aborted = True
+        lib.groove_queue_abort(self._obj)
+
+    @_require_open
+    def reset(self):
+        """Accept items again after `abort`"""
+        lib.groove_queue_reset(self._obj)
+        self._aborted = False
+
+    @_require_open
+    def flush(self):
+        """Discard every item"""
+        lib.groove_queue_flush(self._obj)
+
+    @_require_open
+    def purge(self, predicate):
+        """Discard the items for which `predicate(item)` is true"""
+        with self._purge_lock:
+            self._state.predicate = predicate
+            try:
+                lib.groove_queue_purge(self._obj)
+            finally:
+                self._state.predicate = None
+
+
+@ffi.def_extern()
+def pygroove_queue_cleanup(queue_obj, obj):
+    state = ffi.from_handle(queue_obj.context)
+    item = state.held.pop(obj, None)
+    if item is not None and state.cleanup is not None:
+        state.cleanup(item)
+
+
+@ffi.def_extern()
+def pygroove_queue_purge(queue_obj, obj):
+    state = ffi.from_handle(queue_obj.context)
+    return 1 if state.predicate(state.held[obj]) else 0
@@ -0,0 +1,227 @@
+"""
+ReplayGain analysis for whole libraries
+
+Files are grouped into albums and each album is analyzed by its own
+LoudnessDetector. Albums are spread across worker processes.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import math
+import os
+
+import groove
+from groove.file import File
+from groove.loudness import LoudnessDetector
+from groove.playlist import Playlist
+
+
+__all__ = [
+    'AlbumGain',
+    'TrackGain',
+    'analyze_album',
+    'analyze_albums',
+    'analyze_library',
+    'db_to_float',
+    'group_albums',
+    'loudness_to_replaygain',
+    'write_tags',
+]
+
+
+TrackGain = namedtuple('TrackGain', [
+    'filename',
+    'gain',
+    'peak',
+    'loudness',
+    'duration',
+])
+
+
+AlbumGain = namedtuple('AlbumGain', [
+    'name',
+    'gain',
+    'peak',
+    'loudness',
+    'duration',
+    'tracks',
+])
+
+
+def loudness_to_replaygain(loudness):
+    """Convert loudness to replaygain value, clamped to (-51.0, 51.0)"""
+    rg = -18.0 - loudness
+    rg = min(max(rg, -51.0), 51.0)
+    return rg
+
+
+def db_to_float(db):
+    """Convert a gain in dB to the float format used by Playlist.gain"""
+    return math.exp(math.log(10) * 0.05 * db)
+
+
+def _tag_album_key(filename):
+    with File(filename) as gfile:
+        tags = gfile.get_tags()
+    lowered = dict((k.lower(), v) for k, v in tags.items())
+    artist = lowered.get(b'album_artist') or lowered.get(b'artist') or b''
+    album = lowered.get(b'album')
+    if album is None:
+        # Untagged files are grouped by directory
+        return os.path.dirname(os.path.abspath(filename))
+    return '%s - %s' % (artist.decode('utf-8', 'replace'),
+                        album.decode('utf-8', 'replace'))
+
+
+def group_albums(filenames, by='directory'):
+    """Group filenames into albums
+
+    Arguments:
+        filenames (iterable): Files to group
+        by (str): `'directory'` puts files of the same directory in an
+                  album, `'tags'` uses the album artist and album tags and
+                  `'file'` makes every file its own album
+
+    Returns:
+        An OrderedDict of `album name: [filename, ...]`
+    """
+    if by == 'directory':
+        key = lambda f: os.path.dirname(os.path.abspath(f))
+    elif by == 'tags':
+        key = _tag_album_key
+    elif by == 'file':
+        key = lambda f: f
+    else:
+        raise ValueError('Unknown grouping "%s"' % by)
+
+    albums = OrderedDict()
+    for filename in filenames:
+        albums.setdefault(key(filename), []).append(filename)
+    return albums
+
+
+def analyze_album(name, filenames, album=True):
+    """Compute track and album gain for one album
+
+    Arguments:
+        name (str): Album name, copied to the result
+        filenames (list): Files in the album, in order
+        album (bool): Set False to only compute track gain, the album fields
+                      of the result are then `None`
+
+    Returns:
+        An AlbumGain
+    """
+    groove.worker_initializer()
+
+    playlist = Playlist()
+    detector = LoudnessDetector()
+    detector.disable_album = not album
+    gfiles = [File(filename) for filename in filenames]
+
+    tracks = []
+    album_info = None
+    try:
+        for gfile in gfiles:
+            gfile.open()
+            playlist.append(gfile)
+
+        detector.playlist = playlist
+        for info in detector:
+            if info.playlist_item is None:
+                album_info = info
+                continue
+            tracks.append(TrackGain(
+                info.playlist_item.file.filename,
+                loudness_to_replaygain(info.loudness),
+                info.peak,
+                info.loudness,
+                info.duration,
+            ))
+    finally:
+        detector.playlist = None
+        playlist.clear()
+        for gfile in gfiles:
+            gfile.close()
+
+    if not album or album_info is None:
+        return AlbumGain(name, None, None, None, None, tracks)
+
+    return AlbumGain(
+        name,
+        loudness_to_replaygain(album_info.loudness),
+        album_info.peak,
+        album_info.loudness,
+        album_info.duration,
+        tracks,
+    )
+
+
+def write_tags(result):
+    """Write REPLAYGAIN_* tags for an AlbumGain to its files"""
+    for track in result.tracks:
+        tags = {
+            b'REPLAYGAIN_TRACK_GAIN': ('%.2f dB' % track.gain).encode(),
+            b'REPLAYGAIN_TRACK_PEAK': ('%.6f' % track.peak).encode(),
+        }
+        if result.gain is not None:
+            tags[b'REPLAYGAIN_ALBUM_GAIN'] = ('%.2f dB' % result.gain).encode()
+            tags[b'REPLAYGAIN_ALBUM_PEAK'] = ('%.6f' % result.peak).encode()
+
+        with File(track.filename) as gfile:
+            gfile.set_tags(tags)
+            gfile.save()
+
+
+def _analyze_job(name, filenames, album, tag):
+    result = analyze_album(name, filenames, album)
+    if tag:
+        write_tags(result)
+    return result
+
+
+def analyze_albums(albums, album=True, workers=None, tag=False):
+    """Compute ReplayGain for albums that are already grouped
+
+    Arguments:
+        albums (dict): `album name: [filename, ...]`, see `group_albums`
+        album (bool): Set False to only compute track gain
+        workers (int): Number of worker processes, defaults to the number
+                       of CPUs. With 0 everything runs in this process.
+        tag (bool): Write the REPLAYGAIN_* tags back to the files
+
+    Returns:
+        A generator of AlbumGain, in the order albums finish
+    """
+    if workers == 0:
+        for name, files in albums.items():
+            yield _analyze_job(name, files, album, tag)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        futures = [
+            pool.submit(_analyze_job, name, files, album, tag)
+            for name, files in albums.items()
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def analyze_library(filenames, by='directory', album=True, workers=None,
+                    tag=False):
+    """Compute ReplayGain for many files, one album per worker at a time
+
+    Arguments:
+        filenames (iterable): Files to analyze
+        by (str): How to group files into albums, see `group_albums`
+        album (bool): Set False to only compute track gain
+        workers (int): Number of worker processes, defaults to the number
+                       of CPUs. With 0 everything runs in this process.
+        tag (bool): Write the REPLAYGAIN_* tags back to the files
+
+    Returns:
+        A generator of AlbumGain, in the order albums finish
+    """
+    albums = group_albums(filenames, by)
+    return analyze_albums(albums, album, workers, tag)
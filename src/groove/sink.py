@@ -3,7 +3,8 @@ from __future__ import absolute_import, unicode_literals
 from groove import _constants
 from groove import utils
 from groove._groove import ffi, lib
-from groove.buffer import Buffer
+from groove.audio_format import AudioFormat
+from groove.buffer import Buffer, BufferAccount
 from groove.groove import GrooveClass
 from groove.playlist import PlaylistItem
 
@@ -11,6 +12,9 @@ from groove.playlist import PlaylistItem
 __all__ = ['Sink']
 
 
+_scratch = utils.Scratch(ffi, buffer_ptr='struct GrooveBuffer **')
+
+
 class Sink(GrooveClass):
     """Groove Sink"""
     _ffitype = 'struct GrooveSink *'
@@ -36,7 +40,9 @@ class Sink(GrooveClass):
     @property
     def audio_format(self):
         """Set this to the audio format you want the sink to output"""
-        return AudioFormat._from_obj(self._obj.format)
+        fmt_obj = ffi.addressof(self._obj.audio_format)
+        fmt, _ = AudioFormat._from_obj(fmt_obj)
+        return fmt
 
     @property
     def gain(self):
@@ -60,6 +66,7 @@ class Sink(GrooveClass):
         # TODO: better exception handling
         if self._obj.playlist != ffi.NULL:
             assert lib.groove_sink_detach(self._obj) == 0
+            self.buffer_account.report('when the sink was detached')
         if value is not None:
             assert lib.groove_sink_attach(self._obj, value._obj) == 0
         self._playlist = value
@@ -69,14 +76,16 @@ class Sink(GrooveClass):
         """Automatically computed from audio format when attached"""
         return self._obj.bytes_per_sec
 
-    @classmethod
-    def _from_obj(cls, obj):
-        instance, created = super(Sink, cls)._from_obj(obj)
-        if created:
-            # TODO: is this safe? libgroove uses these callbacks internally
-            #       but when it does I think the sink is not exposed
-            instance._attach_callbacks()
-        return instance, created
+    @property
+    def fill_level(self):
+        """Bytes of decoded audio waiting in the sink"""
+        return lib.groove_sink_get_fill_level(self._obj)
+
+    def _init_from_obj(self):
+        # TODO: is this safe? libgroove uses these callbacks internally
+        #       but when it does I think the sink is not exposed
+        self._attach_callbacks()
+        self.buffer_account = BufferAccount('Sink')
 
     def __init__(self):
         # TODO: better exception handling
@@ -85,6 +94,7 @@ class Sink(GrooveClass):
         self._obj = ffi.gc(obj, lib.groove_sink_destroy)
         self._attach_callbacks()
         self._playlist = None
+        self.buffer_account = BufferAccount('Sink')
 
     def _attach_callbacks(self):
         self._obj.flush = lib.groove_sink_callback_flush
@@ -126,9 +136,13 @@ class Sink(GrooveClass):
         If no buffer is ready, this raises `groove.Buffer.NotReady`
         If the end of the playlist is reached, this raises `groove.Buffer.End`
         If block is True and no buffer is ready, this may block indefinately
+
+        While `buffer_account.max_bytes` is exceeded no buffer is taken, this
+        raises `groove.Buffer.NotReady` or blocks until buffers are unref'd.
         """
         # TODO: add timeout, might have to be done in libgroove to be safe
-        buff_obj_ptr = ffi.new('struct GrooveBuffer **')
+        self.buffer_account.wait(block)
+        buff_obj_ptr = _scratch.buffer_ptr
         value = lib.groove_sink_buffer_get(self._obj, buff_obj_ptr, block)
         assert value >= 0
 
@@ -137,8 +151,10 @@ class Sink(GrooveClass):
         elif value == _constants.GROOVE_BUFFER_END:
             raise Buffer.End()
         elif value == _constants.GROOVE_BUFFER_YES:
-            buff = self.BufferClass._from_obj(buff_obj_ptr[0])
+            buff, _ = self.BufferClass._from_obj(buff_obj_ptr[0])
             buff.sink = self
+            buff.playlist = self._playlist
+            self.buffer_account.handout(buff)
             return buff
 
         raise Exception('Unknown value %s from groove_sink_buffer_get' % value)
@@ -165,6 +181,6 @@ def groove_sink_callback_pause(sink_obj):
 
 
 @ffi.def_extern()
-def groove_sink_callback_flush(sink_obj):
+def groove_sink_callback_play(sink_obj):
     sink, _ = Sink._from_obj(sink_obj)
     sink.on_play()
@@ -0,0 +1,289 @@
+"""
+Live HTTP streaming of encoded audio
+
+One Encoder is read by a single thread and every encoded buffer is published
+into a shared ring. Each connected listener keeps its own cursor into the
+ring, so a slow listener never holds up the encoder or the other listeners.
+
+This module requires asyncio and is not imported by `groove` itself, use
+`import groove.stream`.
+"""
+from __future__ import absolute_import, unicode_literals
+
+import asyncio
+import logging
+import threading
+
+from groove.buffer import Buffer
+
+
+__all__ = [
+    'RingBuffer',
+    'StreamServer',
+]
+
+
+_log = logging.getLogger(__name__)
+
+
+class RingBuffer(object):
+    """Fixed capacity ring of chunks addressed by sequence number
+
+    Sequence numbers grow forever, only the last `capacity` chunks can be
+    read back. `start` is the oldest sequence number still available and
+    `end` is the sequence number the next appended chunk will get.
+    """
+
+    def __init__(self, capacity):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.start = 0
+        self.end = 0
+        self._chunks = [None] * capacity
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, seq):
+        if not self.start <= seq < self.end:
+            raise IndexError('sequence %s is not in the ring' % seq)
+        return self._chunks[seq % self.capacity]
+
+    def append(self, chunk):
+        """Add a chunk, overwriting the oldest one if the ring is full"""
+        self._chunks[self.end % self.capacity] = chunk
+        self.end += 1
+        if self.end - self.start > self.capacity:
+            self.start = self.end - self.capacity
+
+
+class StreamServer(object):
+    """Serve the output of one Encoder to many HTTP listeners
+
+    The encoder must already have its playlist attached. New listeners are
+    sent the container header first (the buffers whose `playlist_item` is
+    `None`), then join the live stream.
+
+    Arguments:
+        encoder (Encoder): Encoder to read buffers from
+        host (str): Interface to listen on
+        port (int): Port to listen on, 0 picks a free port
+        path (str): Request path the stream is served on
+        ring_size (int): Number of encoded buffers kept for listeners
+        burst (int): Number of buffers already in the ring that a new
+                     listener is sent immediately, to fill its player buffer
+        slow_client (str): What to do with a listener that fell out of the
+                           ring: `'skip'` jumps it forward to the live edge,
+                           `'drop'` disconnects it
+        drain_timeout (float): Seconds a listener may take to accept a
+                               write before it is disconnected
+        pacer (Pacer): Optional `groove.pacing.Pacer` wrapping `encoder`,
+                       buffers are then published in real time instead of
+                       as fast as the encoder produces them
+    """
+    skip = 'skip'
+    drop = 'drop'
+
+    def __init__(self, encoder, host='127.0.0.1', port=8000, path='/',
+                 ring_size=256, burst=0, slow_client='skip',
+                 drain_timeout=10.0, pacer=None):
+        if slow_client not in (self.skip, self.drop):
+            raise ValueError('slow_client must be "skip" or "drop"')
+
+        self.encoder = encoder
+        self.pacer = pacer
+        self.host = host
+        self.port = port
+        self.path = path
+        self.burst = min(burst, ring_size)
+        self.slow_client = slow_client
+        self.drain_timeout = drain_timeout
+
+        self.header = []
+        self.ring = RingBuffer(ring_size)
+        self.finished = False
+        self.clients = 0
+        self.skipped = 0
+        self.dropped = 0
+
+        self._loop = None
+        self._server = None
+        self._reader = None
+        self._abort = threading.Event()
+        self._data_event = None
+
+    @property
+    def content_type(self):
+        return self.encoder.mime_type or 'application/octet-stream'
+
+    async def start(self):
+        """Start reading the encoder and accepting listeners"""
+        self._loop = asyncio.get_running_loop()
+        self._data_event = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+        self._reader = threading.Thread(target=self._read_encoder,
+                                        name='groove-stream-reader')
+        self._reader.daemon = True
+        self._reader.start()
+
+    async def stop(self):
+        """Stop accepting listeners and stop reading the encoder
+
+        Listeners that are connected are sent what is left in the ring.
+        The encoder is detached from its playlist, so the reader thread
+        blocked in `get_buffer` returns and can be joined.
+        """
+        self._abort.set()
+        if self._reader is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._join_reader)
+            self._reader = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._finish()
+
+    async def serve_forever(self):
+        await self.start()
+        await self._server.serve_forever()
+
+    def _join_reader(self):
+        self.encoder.playlist = None
+        self._reader.join(self.drain_timeout)
+        if self._reader.is_alive():
+            _log.warning('Stream reader did not stop within %.1f s',
+                         self.drain_timeout)
+
+    def _read_encoder(self):
+        """Reader thread, copies encoded buffers into the event loop"""
+        source = self.pacer or self.encoder
+        in_header = True
+        while not self._abort.is_set():
+            try:
+                buff = source.get_buffer(True)
+            except Buffer.End:
+                break
+            except Buffer.NotReady:
+                # The encoder queue was aborted by a detach
+                continue
+
+            is_header = in_header and buff.playlist_item is None
+            in_header = is_header
+            data = buff.data
+            buff.unref()
+
+            if self._abort.is_set():
+                break
+            self._call_soon(self._publish, data, is_header)
+
+        self._call_soon(self._finish)
+
+    def _call_soon(self, callback, *args):
+        # stop() joins the reader before it returns, this only guards a
+        # reader that outlived the join timeout
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            _log.debug('Event loop closed, dropping %r', callback)
+
+    def _publish(self, data, is_header):
+        if is_header:
+            self.header.append(data)
+        else:
+            self.ring.append(data)
+        self._wake()
+
+    def _finish(self):
+        self.finished = True
+        self._wake()
+
+    def _wake(self):
+        event, self._data_event = self._data_event, asyncio.Event()
+        event.set()
+
+    async def _handle_client(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        status = self._check_request(request)
+        if status is not None:
+            writer.write(('HTTP/1.0 %s\r\nConnection: close\r\n\r\n'
+                          % status).encode('latin-1'))
+            await self._close(writer)
+            return
+
+        self.clients += 1
+        try:
+            await self._stream_to(writer)
+        except (ConnectionError, asyncio.TimeoutError) as exc:
+            _log.debug('Dropping listener: %r', exc)
+        finally:
+            self.clients -= 1
+            await self._close(writer)
+
+    def _check_request(self, request):
+        """Return an HTTP error status for a bad request, None if valid"""
+        try:
+            method, path, _ = request.split(b'\r\n', 1)[0].split(b' ', 2)
+        except ValueError:
+            return '400 Bad Request'
+        if method != b'GET':
+            return '405 Method Not Allowed'
+        if path.split(b'?', 1)[0].decode('latin-1') != self.path:
+            return '404 Not Found'
+        return None
+
+    async def _stream_to(self, writer):
+        writer.write((
+            'HTTP/1.0 200 OK\r\n'
+            'Content-Type: %s\r\n'
+            'Cache-Control: no-cache\r\n'
+            'Connection: close\r\n'
+            '\r\n' % self.content_type).encode('latin-1'))
+
+        # Wait for the container header before sending any audio
+        while not self.header and not self.finished and len(self.ring) == 0:
+            await self._data_event.wait()
+        for chunk in self.header:
+            writer.write(chunk)
+        await self._drain(writer)
+
+        seq = max(self.ring.start, self.ring.end - self.burst)
+        while True:
+            if seq < self.ring.start:
+                if self.slow_client == self.drop:
+                    self.dropped += 1
+                    return
+                self.skipped += 1
+                seq = max(self.ring.start, self.ring.end - self.burst)
+
+            if seq >= self.ring.end:
+                if self.finished:
+                    return
+                await self._data_event.wait()
+                continue
+
+            # Write everything that is ready before waiting on the socket
+            end = self.ring.end
+            while seq < end:
+                writer.write(self.ring[seq])
+                seq += 1
+            await self._drain(writer)
+
+    async def _drain(self, writer):
+        await asyncio.wait_for(writer.drain(), self.drain_timeout)
+
+    async def _close(self, writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
@@ -0,0 +1,157 @@
+"""
+True peak measurement
+
+The true peak is the peak of the reconstructed analog signal, which can be
+higher than any sample. It is estimated by oversampling with a polyphase
+FIR filter, as described in ITU-R BS.1770 Annex 2.
+
+Requires numpy, install with the `analysis` extra.
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from groove._ndarray import buffer_to_float
+from groove.buffer import Buffer
+from groove.sink import Sink
+
+
+__all__ = [
+    'TruePeakDetector',
+    'TruePeakInfo',
+    'polyphase_filter',
+]
+
+
+TruePeakInfo = namedtuple('TruePeakInfo', [
+    'true_peak',
+    'sample_peak',
+    'duration',
+    'playlist_item',
+])
+
+
+def polyphase_filter(oversample=4, taps=48):
+    """Interpolation filter split into phases
+
+    Arguments:
+        oversample (int): Oversampling factor
+        taps (int): Filter taps per phase
+
+    Returns:
+        An array of shape `(taps, oversample)`. Column `p` holds phase `p`
+        in reverse order, ready to be applied to a window of `taps` input
+        samples in ascending time order.
+    """
+    length = taps * oversample
+    n = np.arange(length) - (length - 1) / 2.0
+    h = np.sinc(n / oversample) * np.kaiser(length, 8.0)
+    h *= oversample / h.sum()
+    return h.reshape(taps, oversample)[::-1].astype(np.float32)
+
+
+class _PeakState(object):
+    """Streaming true peak of one run of audio"""
+
+    def __init__(self, phases, channels):
+        self.phases = phases
+        self.history = np.zeros((phases.shape[0] - 1, channels), np.float32)
+        self.true_peak = 0.0
+        self.sample_peak = 0.0
+        self.frames = 0
+
+    def feed(self, samples):
+        """Add `(frames, channels)` float samples"""
+        if len(samples) == 0:
+            return
+        self.frames += len(samples)
+        self.sample_peak = max(self.sample_peak, float(np.abs(samples).max()))
+
+        signal = np.concatenate((self.history, samples.astype(np.float32)))
+        self.history = signal[len(signal) - len(self.history):]
+
+        # (frames, channels, taps) @ (taps, phases) -> every oversampled value
+        windows = sliding_window_view(signal, len(self.phases), axis=0)
+        oversampled = np.matmul(windows, self.phases)
+        self.true_peak = max(self.true_peak,
+                             float(np.abs(oversampled).max()),
+                             self.sample_peak)
+
+
+class TruePeakDetector(object):
+    """Compute the true peak of each playlist item
+
+    Iterating works like LoudnessDetector: one TruePeakInfo per playlist
+    item, followed by one for the whole playlist with `playlist_item` set
+    to `None`. Audio is read in its own sample format, planar or
+    interleaved, and memory use is bounded by the sink buffer size.
+
+    Arguments:
+        oversample (int): Oversampling factor, 4 is enough for 44.1kHz and
+                          48kHz audio
+        taps (int): Filter taps per phase
+        sink_buffer_size (int): How big the sink buffer should be, in sample
+                                frames
+    """
+
+    def __init__(self, oversample=4, taps=48, sink_buffer_size=8192):
+        self.phases = polyphase_filter(oversample, taps)
+        self.sink = Sink()
+        self.sink.buffer_size = sink_buffer_size
+        self.sink.disable_resample = True
+
+    @property
+    def playlist(self):
+        """Playlist to generate true peak info for"""
+        return self.sink.playlist
+
+    @playlist.setter
+    def playlist(self, value):
+        self.sink.playlist = value
+
+    def __iter__(self):
+        album_true_peak = 0.0
+        album_sample_peak = 0.0
+        album_duration = 0.0
+
+        item_obj = None
+        state = None
+        rate = None
+        while True:
+            try:
+                buff = self.sink.get_buffer(True)
+            except Buffer.End:
+                buff = None
+
+            info = None
+            if state is not None and (buff is None or buff._obj.item != item_obj):
+                duration = state.frames / float(rate)
+                album_true_peak = max(album_true_peak, state.true_peak)
+                album_sample_peak = max(album_sample_peak, state.sample_peak)
+                album_duration += duration
+                pitem = self.playlist._pitem(item_obj)
+                info = TruePeakInfo(state.true_peak, state.sample_peak,
+                                    duration, pitem)
+                state = None
+
+            if buff is not None:
+                try:
+                    samples = buffer_to_float(buff, np.float32)
+                    if state is None:
+                        item_obj = buff._obj.item
+                        rate = buff._obj.format.sample_rate
+                        state = _PeakState(self.phases, samples.shape[1])
+                    state.feed(samples)
+                finally:
+                    buff.unref()
+
+            if info is not None:
+                yield info
+            if buff is None:
+                break
+
+        yield TruePeakInfo(album_true_peak, album_sample_peak, album_duration,
+                           None)
@@ -0,0 +1,234 @@
+"""
+Adaptive Player buffer sizes
+"""
+from __future__ import absolute_import, unicode_literals
+
+from collections import namedtuple
+import threading
+import time
+
+from groove.player import PlayerEvent, PlayerEventDispatcher
+
+
+__all__ = [
+    'BufferTuner',
+    'TunerReport',
+]
+
+
+try:
+    _monotonic = time.monotonic
+except AttributeError:
+    _monotonic = time.time
+
+
+TunerReport = namedtuple('TunerReport', [
+    'device_buffer_size',
+    'sink_buffer_size',
+    'device_latency',
+    'sink_latency',
+    'underruns',
+    'min_headroom',
+    'reopens',
+])
+
+
+def _power_of_two(value):
+    result = 1
+    while result < value:
+        result <<= 1
+    return result
+
+
+class BufferTuner(object):
+    """Pick the smallest Player buffers that keep underruns rare
+
+    The tuner counts buffer_underrun events and samples the headroom, how
+    many seconds the decoder is ahead of playback. Every `window` seconds it
+    looks at what it saw:
+
+    * More underruns per minute than `max_underruns`: a buffer is doubled.
+      The sink buffer if the decoder fell behind, otherwise the device
+      buffer. A size that caused underruns is never tried again.
+    * No underruns for `stable_windows` windows in a row: the device buffer
+      is halved, or the sink buffer once the device buffer is as small as it
+      may go.
+
+    New sizes take effect by detaching and re-attaching the playlist, then
+    seeking back to the played position.
+
+    Call `step()` periodically or let `start()` do it from a thread.
+
+    Arguments:
+        player (Player): Player to tune, its playlist should be attached
+        dispatcher (PlayerEventDispatcher): Source of underrun events,
+                                            defaults to the process wide one
+        window (float): Seconds observed before each decision
+        max_underruns (float): Tolerated underruns per minute
+        stable_windows (int): Clean windows before a buffer is shrunk
+        device_range (tuple): Smallest and largest device buffer size
+        sink_range (tuple): Smallest and largest sink buffer size
+        clock (callable): Returns the current time in seconds, defaults to
+                          `time.monotonic`
+    """
+
+    def __init__(self, player, dispatcher=None, window=10.0, max_underruns=0.0,
+                 stable_windows=3, device_range=(256, 16384),
+                 sink_range=(1024, 65536), clock=_monotonic):
+        self.player = player
+        self.window = window
+        self.max_underruns = max_underruns
+        self.stable_windows = stable_windows
+        self.device_range = device_range
+        self.sink_range = sink_range
+        self.reopens = 0
+
+        # Largest sizes known to underrun, never go back to them
+        self._device_floor = 0
+        self._sink_floor = 0
+
+        self._clock = clock
+        self._thread = None
+        self._abort = threading.Event()
+        self._window_start = clock()
+        self._underruns = 0
+        self._total_underruns = 0
+        self._min_headroom = None
+        self._clean_windows = 0
+
+        if dispatcher is None:
+            dispatcher = PlayerEventDispatcher.default()
+        self._dispatcher = dispatcher
+        self._subscription = dispatcher.subscribe(
+            self._on_event, player, [PlayerEvent.buffer_underrun])
+
+    def close(self):
+        """Stop tuning and unsubscribe from player events"""
+        self.stop()
+        self._dispatcher.unsubscribe(self._subscription)
+
+    def _on_event(self, info):
+        self._underruns += 1
+        self._total_underruns += 1
+
+    def _sample_rate(self):
+        rate = self.player.actual_audio_format.sample_rate
+        return float(rate or self.player.target_audio_format.sample_rate)
+
+    def sample_headroom(self):
+        """Record how far decoding is ahead of playback
+
+        Returns:
+            The headroom in seconds, or None if decoding is already in
+            another item
+        """
+        playlist = self.player.playlist
+        if playlist is None:
+            return None
+        play_item, play_seconds = self.player.position()
+        decode_item, decode_seconds = playlist.decode_position()
+        if play_item is None or decode_item is None or \
+                decode_item is not play_item:
+            return None
+
+        headroom = decode_seconds - play_seconds
+        if self._min_headroom is None or headroom < self._min_headroom:
+            self._min_headroom = headroom
+        return headroom
+
+    def report(self):
+        """Current sizes, their latency and what was observed"""
+        rate = self._sample_rate()
+        device = self.player.device_buffer_size
+        sink = self.player.sink_buffer_size
+        return TunerReport(device, sink, device / rate, sink / rate,
+                           self._total_underruns, self._min_headroom,
+                           self.reopens)
+
+    def step(self):
+        """Sample headroom and resize buffers once a window has passed
+
+        Returns:
+            True if the player was reopened with new buffer sizes
+        """
+        self.sample_headroom()
+        now = self._clock()
+        elapsed = now - self._window_start
+        if elapsed < self.window:
+            return False
+
+        underruns = self._underruns
+        min_headroom = self._min_headroom
+        self._window_start = now
+        self._underruns = 0
+        self._min_headroom = None
+
+        device = self.player.device_buffer_size
+        sink = self.player.sink_buffer_size
+        rate = self._sample_rate()
+        if underruns * 60.0 / elapsed > self.max_underruns:
+            self._clean_windows = 0
+            self._device_floor = max(self._device_floor, device)
+            starved = min_headroom is not None and \
+                min_headroom < 2 * device / rate
+            if starved and sink < self.sink_range[1]:
+                self._sink_floor = max(self._sink_floor, sink)
+                return self.reopen(device, sink * 2)
+            if device < self.device_range[1]:
+                return self.reopen(device * 2, sink)
+            return False
+
+        self._clean_windows += 1
+        if self._clean_windows < self.stable_windows:
+            return False
+        self._clean_windows = 0
+
+        if device // 2 >= self.device_range[0] and \
+                device // 2 > self._device_floor:
+            return self.reopen(device // 2, sink)
+        # The sink buffer stays at least twice the device buffer
+        if sink // 2 >= self.sink_range[0] and sink // 2 > self._sink_floor and \
+                sink // 2 >= 2 * device:
+            return self.reopen(device, sink // 2)
+        return False
+
+    def reopen(self, device_buffer_size, sink_buffer_size):
+        """Re-attach the playlist with new buffer sizes
+
+        Playback continues from the position being played.
+
+        Returns:
+            True
+        """
+        player = self.player
+        playlist = player.playlist
+        pitem, seconds = player.position()
+
+        player.playlist = None
+        player.device_buffer_size = _power_of_two(device_buffer_size)
+        player.sink_buffer_size = sink_buffer_size
+        player.playlist = playlist
+        if pitem is not None:
+            playlist.seek(pitem, max(0.0, seconds))
+
+        self.reopens += 1
+        self._min_headroom = None
+        return True
+
+    def start(self, interval=1.0):
+        """Call `step` every `interval` seconds from a background thread"""
+        def run():
+            while not self._abort.wait(interval):
+                self.step()
+
+        self._abort.clear()
+        self._thread = threading.Thread(target=run, name='groove-tuner')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread"""
+        if self._thread is not None:
+            self._abort.set()
+            self._thread.join()
+            self._thread = None
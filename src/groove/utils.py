@@ -3,12 +3,34 @@ Utility methods and classes
 """
 from __future__ import absolute_import, unicode_literals
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 import enum
+import hashlib
+import os
+import threading
 
 from groove._groove import ffi, lib
 
 
+class Scratch(threading.local):
+    """Out-parameter cdata reused by every call on the same thread
+
+    Allocating out-parameters with `ffi.new` on every call creates garbage on
+    hot paths. Each thread gets its own cdata, allocated when the thread
+    first uses the Scratch. Read the values out before calling anything that
+    could use the same Scratch again.
+
+    Arguments:
+        ffi (cffi.FFI): The ffi declaring the types
+        **ctypes: Attribute names and their C types, e.g.
+                  `seconds='double *'`
+    """
+
+    def __init__(self, ffi, **ctypes):
+        for name, ctype in ctypes.items():
+            setattr(self, name, ffi.new(ctype))
+
+
 def unique_enum(cls):
     """Make the enum class unique and provide a reverse mapping"""
     cls = enum.unique(cls)
@@ -65,3 +87,35 @@ def property_convert(attr, from_cdef=None, to_cdef=None, doc=None):
         setattr(self._obj, attr, value)
 
     return property(getter, setter, doc=doc)
+
+
+FileIdentity = namedtuple('FileIdentity', [
+    'path',
+    'size',
+    'mtime',
+    'content_hash',
+])
+
+
+def file_identity(filename, content_hash=False):
+    """Identify a file on disk so changes to it can be noticed
+
+    Arguments:
+        filename (str): Path of the file
+        content_hash (bool): Also hash the file contents. This reads the
+                             whole file but catches changes that keep the
+                             size and modification time.
+
+    Returns:
+        A FileIdentity, `content_hash` is `None` unless requested
+    """
+    path = os.path.abspath(filename)
+    stat = os.stat(path)
+    digest = None
+    if content_hash:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as fd:
+            for block in iter(lambda: fd.read(1 << 20), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+    return FileIdentity(path, stat.st_size, stat.st_mtime, digest)
@@ -1,7 +1,12 @@
 from __future__ import absolute_import, unicode_literals
 
+import logging
+import struct
+import threading
 import unittest
 
+import pytest
+
 import groove as g
 from groove._groove import ffi, lib
 
@@ -29,3 +34,110 @@ class TestBuffer(unittest.TestCase):
         import pdb; pdb.set_trace()
         self.playlist.seek(self.playlist[0], 2)
         buff = self.sink.get_buffer()
+
+
+class TestBufferSamples():
+    def buffer(self, sample_format, layout, planes):
+        self.planes = [ffi.new('uint8_t[]', data) for data in planes]
+        self.data = ffi.new('uint8_t *[]', self.planes)
+        self.obj = ffi.new('struct GrooveBuffer *')
+        self.obj.data = self.data
+        self.obj.format.sample_fmt = sample_format
+        self.obj.format.channel_layout = layout
+        self.obj.frame_count = 2
+        buff, _ = g.Buffer._from_obj(self.obj)
+        return buff
+
+    def test_stats(self):
+        data = struct.pack('=4h', 16384, -32768, 0, 8192)
+        buff = self.buffer(g.SampleFormat.s16, g.ChannelLayout.layout_stereo,
+                           [data])
+        stats = buff.stats()
+        assert stats.samples == 4
+        assert stats.peak == 1.0
+        assert stats.sum_squares == pytest.approx(1.3125)
+        assert stats.rms == pytest.approx((1.3125 / 4) ** 0.5)
+
+    def test_interleave(self):
+        left = struct.pack('=2h', 1, 2)
+        right = struct.pack('=2h', 3, 4)
+        buff = self.buffer(g.SampleFormat.s16p, g.ChannelLayout.layout_stereo,
+                           [left, right])
+        assert buff.interleaved() == struct.pack('=4h', 1, 3, 2, 4)
+        assert buff.planes() == [left, right]
+
+    def test_deinterleave(self):
+        data = struct.pack('=4f', 0.1, 0.2, 0.3, 0.4)
+        buff = self.buffer(g.SampleFormat.flt, g.ChannelLayout.layout_stereo,
+                           [data])
+        assert buff.planes() == [struct.pack('=2f', 0.1, 0.3),
+                                 struct.pack('=2f', 0.2, 0.4)]
+        assert buff.interleaved() == data
+
+
+class TestBufferAccount():
+    def setup_method(self, method):
+        self.gfile = g.File('tests/samples/stereo-440hz.mp3')
+        self.gfile.open()
+        self.playlist = g.Playlist()
+        self.sink = g.Sink()
+        self.sink.playlist = self.playlist
+        self.playlist.append(self.gfile)
+        self.account = self.sink.buffer_account
+
+    def teardown_method(self, method):
+        self.sink.playlist = None
+        self.playlist.clear()
+        self.gfile.close()
+
+    def test_count(self):
+        first = self.sink.get_buffer(True)
+        second = self.sink.get_buffer(True)
+        nbytes = first.size + second.size
+        assert (self.account.count, self.account.bytes) == (2, nbytes)
+
+        first.ref()
+        assert self.account.count == 3
+        first.unref()
+        first.unref()
+        assert (self.account.count, self.account.bytes) == (1, second.size)
+        assert (self.account.total_count, self.account.total_bytes) == \
+            (2, nbytes)
+        second.unref()
+        assert (self.account.count, self.account.bytes) == (0, 0)
+
+    def test_backpressure(self):
+        self.account.max_bytes = 1
+        buff = self.sink.get_buffer(True)
+        with pytest.raises(g.Buffer.NotReady):
+            self.sink.get_buffer()
+
+        got = []
+        thread = threading.Thread(
+            target=lambda: got.append(self.sink.get_buffer(True)))
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+
+        buff.unref()
+        thread.join()
+        assert self.account.count == 1
+        got[0].unref()
+
+    def test_report(self, caplog):
+        self.account.debug = True
+        buff = self.sink.get_buffer(True)
+        live = self.account.live_buffers()
+        assert len(live) == 1
+        assert live[0].refs == 1
+        assert live[0].size == buff.size
+        assert 'test_report' in live[0].stacks[0]
+
+        with caplog.at_level(logging.WARNING, 'groove.buffer'):
+            self.sink.playlist = None
+        assert '1 buffer references' in caplog.text
+        assert 'test_report' in caplog.text
+
+        buff.unref()
+        assert self.account.live_buffers() == []
+        assert not self.account.report('now')
@@ -0,0 +1,153 @@
+"""
+Test groove.clock
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+import groove as g
+from groove.clock import PlaybackClock
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePlaylist(object):
+    def __init__(self, player):
+        self.player = player
+        self.playing = True
+        self.seeks = []
+
+    def is_playing(self):
+        return self.playing
+
+    def play(self):
+        self.player.advance()
+        self.playing = True
+
+    def pause(self):
+        self.player.advance()
+        self.playing = False
+
+    def seek(self, item, seconds):
+        self.seeks.append((item, seconds))
+
+
+class FakePlayer(object):
+    """Plays `rate` media seconds per clock second from 0.0"""
+    def __init__(self, clock, rate=1.0):
+        self.clock = clock
+        self.rate = rate
+        self.item = 'item'
+        self.seconds = 0.0
+        self.updated = clock()
+        self.playlist = FakePlaylist(self)
+        self.position_calls = 0
+
+    def advance(self):
+        if self.playlist.playing:
+            self.seconds += (self.clock() - self.updated) * self.rate
+        self.updated = self.clock()
+
+    def event_get(self, block=False):
+        return None
+
+    def position(self):
+        self.position_calls += 1
+        self.advance()
+        return self.item, self.seconds
+
+
+class TestPlaybackClock():
+    def setup_method(self, method):
+        self.clock = FakeClock()
+
+    def test_interpolate(self):
+        player = FakePlayer(self.clock)
+        clock = PlaybackClock(player, interval=1.0, clock=self.clock)
+        assert player.position_calls == 1
+
+        for n in range(7):
+            self.clock.now += 0.125
+            assert clock.position() == ('item', pytest.approx(0.125 * (n + 1)))
+        assert player.position_calls == 1
+
+        self.clock.now += 0.125
+        assert clock.seconds == pytest.approx(1.0)
+        assert player.position_calls == 2
+
+    def test_playback_starts(self):
+        player = FakePlayer(self.clock)
+        player.item = None
+        clock = PlaybackClock(player, interval=1.0, clock=self.clock)
+        assert clock.position() == (None, 0.0)
+
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            try:
+                player.item = playlist[0]
+                self.clock.now += 1.0
+                clock.sync()
+                assert clock.position()[0] is playlist[0]
+                self.clock.now += 1.0
+                clock.sync()
+                assert clock.position()[0] is playlist[0]
+            finally:
+                playlist.clear()
+
+    def test_rate(self):
+        player = FakePlayer(self.clock, rate=1.01)
+        clock = PlaybackClock(player, interval=1.0, smoothing=0.5,
+                              clock=self.clock)
+        for n in range(20):
+            self.clock.now += 1.0
+            clock.sync()
+        assert clock.rate == pytest.approx(1.01)
+
+    def test_pause_play(self):
+        player = FakePlayer(self.clock)
+        clock = PlaybackClock(player, interval=1.0, clock=self.clock)
+
+        self.clock.now += 0.5
+        clock.pause()
+        self.clock.now += 0.5
+        assert clock.seconds == pytest.approx(0.5)
+
+        clock.play()
+        self.clock.now += 0.25
+        assert clock.seconds == pytest.approx(0.75)
+
+    def test_seek(self):
+        player = FakePlayer(self.clock)
+        clock = PlaybackClock(player, interval=1.0, clock=self.clock)
+
+        clock.seek('other', 30.0)
+        assert player.playlist.seeks == [('other', 30.0)]
+        self.clock.now += 0.5
+        assert clock.position() == ('other', pytest.approx(30.5))
+
+    def test_events(self):
+        player = FakePlayer(self.clock)
+        dispatcher = g.PlayerEventDispatcher()
+        clock = PlaybackClock(player, interval=1.0, dispatcher=dispatcher,
+                              clock=self.clock)
+        dispatcher.stop()
+
+        dispatcher._dispatch(g.PlayerEventInfo(
+            player, g.PlayerEvent.now_playing, 'next', 0.0, 0.0))
+        self.clock.now += 0.5
+        assert clock.position() == ('next', pytest.approx(0.5))
+
+        dispatcher._dispatch(g.PlayerEventInfo(
+            player, g.PlayerEvent.buffer_underrun, 'next', 0.5, 0.0))
+        self.clock.now += 0.5
+        assert clock.seconds == pytest.approx(0.5)
+
+        clock.close()
+        assert dispatcher._subscriptions == []
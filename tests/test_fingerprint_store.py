@@ -0,0 +1,69 @@
+"""
+Test groove.fingerprint_store
+"""
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from groove.fingerprint_store import FingerprintStore, fingerprint_library
+
+
+SAMPLES = [
+    'mono-180hz.mp3',
+    'mono-261hz.mp3',
+]
+
+
+class TestFingerprintStore():
+    def setup_method(self, method):
+        self.tmpdir = tempfile.mkdtemp()
+        self.files = []
+        for name in SAMPLES:
+            path = os.path.join(self.tmpdir, name)
+            shutil.copy(os.path.join('tests/samples', name), path)
+            self.files.append(path)
+        self.store = FingerprintStore(':memory:')
+
+    def teardown_method(self, method):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_fingerprint_library(self):
+        reports = []
+        result = fingerprint_library(self.files, self.store, workers=0,
+                                     shard_size=1, progress=reports.append)
+        assert result.files_done == 2
+        assert result.files_skipped == 0
+        assert result.audio_seconds > 0
+        assert [r.files_done for r in reports] == [1, 2]
+        assert len(self.store) == 2
+
+        stored = self.store.get(self.files[0])
+        assert stored.duration > 0
+        assert len(stored.fingerprint) > 0
+        assert stored.fingerprint.typecode in ('i', 'l')
+
+        # Nothing changed, nothing to fingerprint
+        result = fingerprint_library(self.files, self.store, workers=0)
+        assert result.files_done == 0
+        assert result.files_skipped == 2
+
+    def test_changed_file(self):
+        fingerprint_library(self.files, self.store, workers=0)
+
+        os.utime(self.files[1], (0, 0))
+        assert self.store.get(self.files[1]) is None
+
+        result = fingerprint_library(self.files, self.store, workers=0)
+        assert result.files_done == 1
+        assert self.store.get(self.files[1]) is not None
+
+    def test_unreadable_file(self):
+        missing = os.path.join(self.tmpdir, 'missing.mp3')
+        result = fingerprint_library(self.files[:1] + [missing], self.store,
+                                     workers=0)
+        assert result.files_done == 1
+        assert result.files_failed == 1
+        assert self.store.get(missing) is None
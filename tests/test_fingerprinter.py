@@ -0,0 +1,118 @@
+"""
+Test groove.Fingerprinter
+"""
+from __future__ import absolute_import, unicode_literals
+
+from array import array
+
+import pytest
+
+import groove as g
+
+
+RAW = [-587182205, -587247741, 1560092291, 1560092291, -587116669, 3]
+
+
+class TestFingerprinter():
+    def test_decode(self):
+        fp = g.Fingerprinter.decode(g.Fingerprinter.encode(RAW))
+        assert isinstance(fp, array)
+        assert list(fp) == RAW
+
+    def test_encode_array(self):
+        encoded = g.Fingerprinter.encode(RAW)
+        assert g.Fingerprinter.encode(array('i', RAW)) == encoded
+
+    def test_numpy(self):
+        np = pytest.importorskip('numpy')
+        encoded = g.Fingerprinter.encode(RAW)
+
+        fp = g.Fingerprinter.decode(encoded, use_numpy=True)
+        assert fp.dtype == np.int32
+        assert fp.tolist() == RAW
+        assert g.Fingerprinter.encode(fp) == encoded
+
+        # Other dtypes are converted
+        assert g.Fingerprinter.encode(fp.astype(np.int64)) == encoded
+
+    def test_iter_raw(self):
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            printer = g.Fingerprinter(base64_encode=False)
+            printer.playlist = playlist
+
+            infos = list(printer)
+            printer.playlist = None
+            playlist.clear()
+
+        assert len(infos) == 1
+        fp = infos[0].fingerprint
+        assert isinstance(fp, array)
+        assert len(fp) > 0
+        assert list(g.Fingerprinter.decode(g.Fingerprinter.encode(fp))) == list(fp)
+
+    def test_max_duration(self):
+        gfiles = [g.File('tests/samples/stereo-440hz.mp3'),
+                  g.File('tests/samples/mono-180hz.mp3')]
+        playlist = g.Playlist()
+        for gfile in gfiles:
+            gfile.open()
+            playlist.append(gfile)
+
+        try:
+            printer = g.Fingerprinter(base64_encode=False, max_duration=1.0)
+            printer.playlist = playlist
+            infos = list(printer)
+            printer.playlist = None
+
+            assert [i.playlist_item for i in infos] == list(playlist)
+        finally:
+            playlist.clear()
+            for gfile in gfiles:
+                gfile.close()
+
+        for info in infos:
+            assert info.duration == pytest.approx(1.0)
+            assert isinstance(info.fingerprint, array)
+            assert len(info.fingerprint) > 0
+
+
+class TestWindowedFingerprinter():
+    def fingerprint(self, printer):
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            printer.playlist = playlist
+            records = list(printer)
+            printer.playlist = None
+            playlist.clear()
+        return records
+
+    def test_windows(self):
+        printer = g.WindowedFingerprinter(window=2.0, step=1.0,
+                                          base64_encode=False)
+        records = self.fingerprint(printer)
+
+        assert len(records) >= 2
+        for n, record in enumerate(records):
+            assert record.start == pytest.approx(n * 1.0)
+            assert record.end == pytest.approx(n * 1.0 + 2.0)
+            assert len(record.fingerprint) > 0
+
+        # The first window is the prefix fingerprint
+        prefix = self.fingerprint(g.Fingerprinter(base64_encode=False,
+                                                  max_duration=2.0))
+        assert list(records[0].fingerprint) == list(prefix[0].fingerprint)
+
+    def test_partial(self):
+        full = self.fingerprint(g.WindowedFingerprinter(window=2.0, step=1.0))
+        partial = self.fingerprint(g.WindowedFingerprinter(
+            window=2.0, step=1.0, partial=True))
+
+        def windows(records):
+            return [(r.start, r.end, r.fingerprint) for r in records]
+
+        assert windows(partial[:len(full)]) == windows(full)
+        assert len(partial) == len(full) + 1
+        assert partial[-1].end - partial[-1].start < 2.0
@@ -0,0 +1,76 @@
+"""
+Test groove.fpcompare
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import groove as g
+from groove import fpcompare
+
+
+def random_fingerprint(length, seed=0):
+    rng = np.random.RandomState(seed)
+    return rng.randint(-2 ** 31, 2 ** 31 - 1, length).astype(np.int32)
+
+
+def test_popcount():
+    values = np.array([0, 1, 3, 0xffffffff, 0x80000001], np.uint32)
+    assert fpcompare.popcount(values).tolist() == [0, 1, 2, 32, 2]
+
+
+def test_bit_error_rate():
+    a = random_fingerprint(100).view(np.uint32)
+    assert fpcompare.bit_error_rate(a, a, 0) == 0.0
+    assert fpcompare.bit_error_rate(a[10:20], a, 10) == 0.0
+    assert fpcompare.bit_error_rate(a, a, 200) == 1.0
+
+
+def test_compare():
+    b = random_fingerprint(1000)
+    a = b[100:400] ^ np.int32(1)
+
+    match = fpcompare.compare(a, b)
+    assert match.offset == 100
+    assert match.score == pytest.approx(1.0 - 1 / 32.0)
+    assert match.span == 300
+
+    assert fpcompare.compare(b, a).offset == -100
+
+
+def test_compare_encoded():
+    fp = random_fingerprint(200)
+    encoded = g.Fingerprinter.encode(fp)
+    assert fpcompare.compare(encoded, fp).score == 1.0
+
+
+def test_compare_many():
+    query = random_fingerprint(300, seed=1)
+    candidates = [random_fingerprint(n, seed=n) for n in range(400, 600, 10)]
+    candidates[5] = np.concatenate((random_fingerprint(50), query))
+
+    matches = fpcompare.compare_many(query, candidates, max_offset=100)
+    assert len(matches) == len(candidates)
+    assert matches[5].offset == 50
+    assert matches[5].score == 1.0
+    others = [m.score for n, m in enumerate(matches) if n != 5]
+    assert max(others) < 0.7
+
+
+def test_compare_many_chunked(monkeypatch):
+    query = random_fingerprint(300, seed=1)
+    candidates = [random_fingerprint(n, seed=n) for n in range(400, 600, 10)]
+    candidates[5] = np.concatenate((random_fingerprint(50), query))
+    expected = fpcompare.compare_many(query, candidates)
+
+    # Smaller than one offset row, so every offset is its own chunk
+    monkeypatch.setattr(fpcompare, '_chunk_elements', 100)
+    assert fpcompare.compare_many(query, candidates) == expected
+
+
+def test_no_overlap():
+    match = fpcompare.compare(random_fingerprint(10), random_fingerprint(100),
+                              max_offset=5, min_span=50)
+    assert match == fpcompare.FingerprintMatch(0, 0.0, 0)
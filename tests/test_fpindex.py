@@ -0,0 +1,70 @@
+"""
+Test groove.fpindex
+"""
+from __future__ import absolute_import, unicode_literals
+
+import shutil
+import tempfile
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import groove as g
+from groove.fpindex import FingerprintIndex
+
+
+def random_fingerprints(count, length, seed=0):
+    rng = np.random.RandomState(seed)
+    return [rng.randint(-2 ** 31, 2 ** 31 - 1, length).astype(np.int32)
+            for _ in range(count)]
+
+
+class TestFingerprintIndex():
+    def setup_method(self, method):
+        self.fingerprints = random_fingerprints(200, 500)
+        self.index = FingerprintIndex()
+        for n, fp in enumerate(self.fingerprints):
+            self.index.add('doc%d' % n, fp)
+
+    def test_query(self):
+        # A noisy excerpt of one document
+        query = self.fingerprints[42][100:300] ^ np.int32(3)
+        matches = self.index.query(query)
+
+        assert matches[0].label == 'doc42'
+        assert matches[0].offset == 100
+        assert matches[0].score == pytest.approx(1.0 - 2 / 32.0)
+
+    def test_min_score(self):
+        query = random_fingerprints(1, 100, seed=1)[0]
+        assert self.index.query(query, min_score=0.8) == []
+
+    def test_save_load(self):
+        path = tempfile.mkdtemp()
+        try:
+            self.index.save(path)
+            loaded = FingerprintIndex.load(path)
+            assert len(loaded) == len(self.index)
+            assert loaded.query(self.fingerprints[7])[0].label == 'doc7'
+
+            loaded.add('new', self.fingerprints[7])
+            labels = [m.label for m in loaded.query(self.fingerprints[7])]
+            assert labels[:2] in (['doc7', 'new'], ['new', 'doc7'])
+        finally:
+            shutil.rmtree(path)
+
+    def test_add_infos(self):
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            printer = g.Fingerprinter()
+            printer.playlist = playlist
+
+            doc_ids = self.index.add_infos(printer)
+            printer.playlist = None
+            playlist.clear()
+
+        assert doc_ids == [200]
+        assert self.index.labels[200] == gfile.filename
+        assert self.index.query(self.index.fingerprint(200))[0].doc_id == 200
@@ -3,9 +3,14 @@ Test the python API for libgroove
 """
 from __future__ import absolute_import, unicode_literals
 
+import os
+import threading
+
 import pytest
 
 import groove as g
+from groove import groove as groove_module
+from groove._groove import ffi
 
 
 def test_version():
@@ -32,3 +37,144 @@ class TestSampleFormat():
     def test_bytes_per_sample(self):
         assert g.SampleFormat.none.bytes_per_sample() == 0
         assert g.SampleFormat.s32.bytes_per_sample() == 4
+
+
+class FakeLib(object):
+    def __init__(self):
+        self.calls = []
+
+    def groove_init(self):
+        self.calls.append(('init', os.getpid()))
+        return 0
+
+    def groove_finish(self):
+        self.calls.append(('finish', os.getpid()))
+
+
+class TestInit():
+    @pytest.fixture(autouse=True)
+    def fake_lib(self, monkeypatch):
+        self.lib = FakeLib()
+        monkeypatch.setattr(groove_module, 'lib', self.lib)
+        monkeypatch.setattr(groove_module, '_init_count', 0)
+        monkeypatch.setattr(groove_module, '_init_pid', None)
+        monkeypatch.setattr(groove_module, '_worker_pid', None)
+
+    def test_refcount(self):
+        g.init()
+        g.init()
+        assert [c for c, _ in self.lib.calls] == ['init']
+        g.finish()
+        assert [c for c, _ in self.lib.calls] == ['init']
+        g.finish()
+        g.finish()
+        assert [c for c, _ in self.lib.calls] == ['init', 'finish']
+
+    def test_worker_initializer(self):
+        g.worker_initializer()
+        g.worker_initializer()
+        assert [c for c, _ in self.lib.calls] == ['init']
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+    def test_fork(self):
+        g.init()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            try:
+                g.worker_initializer()
+                ok = self.lib.calls[-1] == ('init', os.getpid())
+                os.write(write_fd, b'1' if ok else b'0')
+            finally:
+                os._exit(0)
+
+        os.close(write_fd)
+        os.waitpid(pid, 0)
+        assert os.read(read_fd, 1) == b'1'
+        os.close(read_fd)
+
+        # The parent is unaffected
+        g.finish()
+        assert [c for c, _ in self.lib.calls] == ['init', 'finish']
+
+
+def run_threads(target, count=8):
+    errors = []
+
+    def run(n):
+        try:
+            target(n)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+class TestObjInstanceMap():
+    def test_from_obj_threads(self):
+        objs = [ffi.new('struct GrooveBuffer *') for _ in range(100)]
+        results = [None] * 8
+
+        def wrap(n):
+            for _ in range(20):
+                buffs = [g.Buffer._from_obj(obj)[0] for obj in objs]
+                # Drop half of the wrappers so they are created again
+                if n % 2:
+                    del buffs
+                else:
+                    results[n] = buffs
+
+        run_threads(wrap)
+        kept = [buffs for buffs in results if buffs is not None]
+        for buffs in kept:
+            for buff, obj in zip(buffs, objs):
+                assert g.Buffer._from_obj(obj)[0] is buff
+
+    def test_reassign_threads(self):
+        objs = [ffi.new('struct GrooveBuffer *') for _ in range(100)]
+
+        def reassign(n):
+            # Each thread moves its own instance between its own cdata
+            mine = objs[n * 10:n * 10 + 10]
+            buff, _ = g.Buffer._from_obj(mine[0])
+            for _ in range(20):
+                for obj in mine:
+                    buff._obj = None
+                    buff._obj = obj
+                    instance, created = g.Buffer._from_obj(obj)
+                    assert instance is buff and not created
+            assert g.Buffer._from_obj(mine[0])[0] is not buff
+
+        run_threads(reassign)
+
+    def test_decode_threads(self):
+        """Many sinks and playlists decoding at once"""
+        def decode(n):
+            for _ in range(3):
+                gfile = g.File('tests/samples/stereo-440hz.mp3')
+                gfile.open()
+                playlist = g.Playlist()
+                sinks = [g.Sink() for _ in range(3)]
+                for sink in sinks:
+                    sink.buffer_size = 1024
+                    sink.playlist = playlist
+                playlist.append(gfile)
+                for sink in sinks:
+                    while True:
+                        try:
+                            buff = sink.get_buffer(True)
+                        except g.Buffer.End:
+                            break
+                        assert buff.playlist_item.file is gfile
+                        buff.unref()
+                for sink in sinks:
+                    sink.playlist = None
+                playlist.clear()
+                gfile.close()
+
+        run_threads(decode)
@@ -0,0 +1,37 @@
+"""
+Test lazy loading of the groove package
+"""
+from __future__ import absolute_import, unicode_literals
+
+import importlib
+import subprocess
+import sys
+
+import pytest
+
+import groove as g
+
+
+@pytest.mark.parametrize('module', sorted(g._lazy_modules))
+def test_lazy_names(module):
+    names = g._lazy_modules[module]
+    assert sorted(names) == sorted(importlib.import_module(module).__all__)
+    for name in names:
+        assert name in dir(g)
+        assert getattr(g, name) is getattr(sys.modules[module], name)
+
+
+def test_unknown_name():
+    with pytest.raises(AttributeError):
+        g.NotAGrooveName
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='eager before 3.7')
+def test_import_is_lazy():
+    code = ('import sys, groove; '
+            'print(sorted(m for m in sys.modules if m in ('
+            '"groove._fingerprinter", "groove._loudness", "groove._player"))); '
+            'groove.Player; '
+            'print("groove._player" in sys.modules)')
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode('utf-8').split() == ['[]', 'True']
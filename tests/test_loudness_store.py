@@ -0,0 +1,94 @@
+"""
+Test groove.loudness_store
+"""
+from __future__ import absolute_import, unicode_literals
+
+import os
+import shutil
+import tempfile
+
+import pytest
+
+import groove as g
+from groove.loudness_store import LoudnessStore
+
+
+SAMPLES = [
+    'mono-180hz.mp3',
+    'mono-261hz.mp3',
+]
+
+
+class TestLoudnessStore():
+    def setup_method(self, method):
+        self.tmpdir = tempfile.mkdtemp()
+        self.files = []
+        for name in SAMPLES:
+            path = os.path.join(self.tmpdir, name)
+            shutil.copy(os.path.join('tests/samples', name), path)
+            self.files.append(path)
+        self.store = LoudnessStore(':memory:')
+
+    def teardown_method(self, method):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_update(self):
+        results = list(self.store.update(self.files, workers=0))
+        assert len(results) == 1
+        assert self.store.track(self.files[0]) is not None
+        assert self.store.album(results[0].name).peak == results[0].peak
+
+        # Nothing changed, nothing to analyze
+        assert list(self.store.update(self.files, workers=0)) == []
+
+    def test_changed_track(self):
+        list(self.store.update(self.files, album=False, workers=0))
+
+        os.utime(self.files[1], (0, 0))
+        assert self.store.track(self.files[1]) is None
+
+        results = list(self.store.update(self.files, album=False, workers=0))
+        assert [t.filename for t in results[0].tracks] == [self.files[1]]
+
+    def test_changed_album(self):
+        name = list(self.store.update(self.files, workers=0))[0].name
+
+        os.utime(self.files[0], (0, 0))
+        assert self.store.album(name) is None
+
+        results = list(self.store.update(self.files, workers=0))
+        assert len(results[0].tracks) == 2
+
+    def test_added_to_album(self):
+        name = list(self.store.update(self.files, workers=0))[0].name
+        assert self.store.album(name) is not None
+
+        path = os.path.join(self.tmpdir, 'mono-523hz.mp3')
+        shutil.copy('tests/samples/mono-523hz.mp3', path)
+        files = self.files + [path]
+
+        results = list(self.store.update(files, workers=0))
+        assert len(results) == 1
+        assert sorted(t.filename for t in results[0].tracks) == sorted(files)
+        assert self.store.track(path) is not None
+        assert len(self.store.album(name).tracks) == 3
+
+    def test_apply_loudness(self):
+        list(self.store.update(self.files[:1], workers=0))
+
+        gfiles = [g.File(f) for f in self.files]
+        playlist = g.Playlist()
+        for gfile in gfiles:
+            gfile.open()
+            playlist.append(gfile)
+
+        try:
+            assert playlist.apply_loudness(self.store) == 1
+            track = self.store.track(self.files[0])
+            assert playlist[0].peak == pytest.approx(track.peak)
+            assert playlist[1].peak == 1.0
+        finally:
+            playlist.clear()
+            for gfile in gfiles:
+                gfile.close()
@@ -0,0 +1,77 @@
+"""
+Test groove.meter
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+import groove as g
+from groove.meter import LoudnessMeter
+
+
+def sine(seconds, dbfs, freq=1000.0):
+    t = np.arange(int(48000 * seconds)) / 48000.0
+    wave = 10 ** (dbfs / 20.0) * np.sin(2 * np.pi * freq * t)
+    return np.column_stack((wave, wave))
+
+
+class TestLoudnessMeter():
+    def test_sine(self):
+        # EBU Tech 3341 case 1: -23 dBFS stereo sine reads -23 LUFS
+        meter = LoudnessMeter(interval=1.0)
+        readings = meter.feed(sine(20, -23.0))
+
+        assert len(readings) == 20
+        last = readings[-1]
+        assert last.momentary == pytest.approx(-23.0, abs=0.1)
+        assert last.short_term == pytest.approx(-23.0, abs=0.1)
+        assert last.integrated == pytest.approx(-23.0, abs=0.1)
+        assert last.peak == pytest.approx(10 ** (-23.0 / 20), rel=1e-3)
+
+    def test_gating(self):
+        # Silence is gated out of integrated loudness
+        meter = LoudnessMeter(interval=1.0)
+        meter.feed(sine(10, -23.0))
+        readings = meter.feed(np.zeros((48000 * 10, 2)))
+        assert readings[-1].momentary == float('-inf')
+        assert readings[-1].integrated == pytest.approx(-23.0, abs=0.1)
+
+    def test_mono(self):
+        meter = LoudnessMeter(interval=1.0,
+                              channel_layout=g.ChannelLayout.layout_mono)
+        readings = meter.feed(sine(10, -23.0)[:, :1])
+        # One channel of the stereo sine carries half its power
+        assert readings[-1].integrated == pytest.approx(-26.0, abs=0.1)
+
+    def test_playlist(self):
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            meter = LoudnessMeter(interval=0.5)
+            meter.playlist = playlist
+
+            readings = list(meter)
+            meter.playlist = None
+            playlist.clear()
+
+        # Sample track is roughly 5 seconds
+        assert 9 <= len(readings) <= 10
+        assert readings[-1].playlist_item is not None
+        assert readings[-1].integrated < 0.0
+
+    def test_stop_paused(self):
+        with g.File('tests/samples/stereo-440hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.pause()
+            playlist.append(gfile)
+            meter = LoudnessMeter()
+            meter.playlist = playlist
+
+            readings = []
+            meter.start(readings.append)
+            meter.stop()
+            assert meter.playlist is None
+            playlist.clear()
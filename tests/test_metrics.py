@@ -0,0 +1,135 @@
+"""
+Test groove.metrics
+"""
+from __future__ import absolute_import, unicode_literals
+
+import gc
+import os
+import shutil
+import tempfile
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+import groove as g
+from groove.metrics import (MetricsRegistry, MetricsSampler,
+                            start_http_server, write_textfile)
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestMetricsRegistry():
+    def test_render(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('test_total', 'A counter', ('name',))
+        gauge = registry.gauge('test_level', 'A gauge')
+        assert registry.counter('test_total', 'A counter', ('name',)) \
+            is counter
+
+        counter.inc(2, 'a "quoted" name')
+        counter.inc(1, 'a "quoted" name')
+        gauge.set(0.5)
+        assert registry.render() == (
+            '# HELP test_total A counter\n'
+            '# TYPE test_total counter\n'
+            'test_total{name="a \\"quoted\\" name"} 3.0\n'
+            '# HELP test_level A gauge\n'
+            '# TYPE test_level gauge\n'
+            'test_level 0.5\n'
+        )
+
+        counter.remove('a "quoted" name')
+        assert counter.samples() == []
+
+    def test_textfile(self):
+        registry = MetricsRegistry()
+        registry.gauge('test_level', 'A gauge').set(1)
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'groove.prom')
+            write_textfile(filename, registry)
+            with open(filename) as fd:
+                assert fd.read() == registry.render()
+            assert os.listdir(path) == ['groove.prom']
+        finally:
+            shutil.rmtree(path)
+
+    def test_http(self):
+        registry = MetricsRegistry()
+        registry.gauge('test_level', 'A gauge').set(1)
+        server = start_http_server(0, registry=registry)
+        try:
+            url = 'http://127.0.0.1:%d/metrics' % server.server_address[1]
+            body = urlopen(url).read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert body == registry.render()
+
+
+class TestMetricsSampler():
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.registry = MetricsRegistry()
+        self.sampler = MetricsSampler(self.registry, clock=self.clock)
+
+        self.gfile = g.File('tests/samples/stereo-440hz.mp3')
+        self.gfile.open()
+        self.playlist = g.Playlist()
+        self.sink = g.Sink()
+        self.sink.playlist = self.playlist
+        self.playlist.append(self.gfile)
+
+    def teardown_method(self, method):
+        self.sink.playlist = None
+        self.playlist.clear()
+        self.gfile.close()
+
+    def test_sink(self):
+        self.sampler.watch(self.sink, 'scan')
+        self.sampler.sample()
+
+        buffers = [self.sink.get_buffer(True) for _ in range(3)]
+        nbytes = sum(buff.size for buff in buffers)
+        buffers[0].unref()
+        self.clock.now += 2.0
+        self.sampler.sample()
+
+        assert self.sampler.sink_buffers.get('scan') == 3
+        assert self.sampler.sink_bytes.get('scan') == nbytes
+        assert self.sampler.buffers_outstanding.get('scan') == 2
+        speed = nbytes / float(self.sink.bytes_per_sec) / 2.0
+        assert abs(self.sampler.sink_decode_speed.get('scan') - speed) < 1e-9
+        assert self.sampler.sink_fill_bytes.get('scan') >= 0
+        assert 'groove_sink_buffers_total{sink="scan"} 3.0' in \
+            self.registry.render()
+
+        for buff in buffers[1:]:
+            buff.unref()
+        self.sampler.sample()
+        assert self.sampler.buffers_outstanding.get('scan') == 0
+
+    def test_collected(self):
+        sink = g.Sink()
+        self.sampler.watch(sink, 'gone')
+        self.sampler.sample()
+        assert self.sampler.sink_buffers.samples() == [(('gone',), 0.0)]
+
+        del sink
+        gc.collect()
+        self.sampler.sample()
+        assert self.sampler.sink_buffers.samples() == []
+
+    def test_unwatch(self):
+        self.sampler.watch(self.sink, 'scan')
+        self.sampler.sample()
+        self.sampler.unwatch(self.sink)
+        assert self.sampler.sink_buffers.samples() == []
@@ -0,0 +1,88 @@
+"""
+Test groove.pacing
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+import groove as g
+from groove._groove import ffi, lib
+from groove.pacing import Pacer
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeSource(object):
+    """Hands out 0.1 second buffers of a single playlist item"""
+    def __init__(self, count, item):
+        self.objs = []
+        for n in range(count):
+            obj = ffi.new('struct GrooveBuffer *')
+            obj.format.sample_rate = 1000
+            obj.frame_count = 100
+            obj.pos = n * 0.1
+            obj.item = item
+            self.objs.append(obj)
+
+    def get_buffer(self, block=False):
+        if not self.objs:
+            raise g.Buffer.End()
+        buff, _ = g.Buffer._from_obj(self.objs.pop(0))
+        return buff
+
+
+class TestPacer():
+    def setup_method(self, method):
+        self.item = ffi.new('struct GroovePlaylistItem *')
+        self.clock = FakeClock()
+
+    def test_paced(self):
+        source = FakeSource(10, self.item)
+        pacer = Pacer(source, lead=0.2, clock=self.clock,
+                      sleep=self.clock.sleep)
+
+        times = [self.clock() for _ in pacer]
+        # the first 0.2 seconds are sent immediately, then one per 0.1s
+        assert times[:3] == [100.0, 100.0, 100.0]
+        assert times[-1] == pytest.approx(100.7)
+        assert pacer.stats.released == 10
+        assert pacer.stats.late == 0
+
+    def test_not_ready(self):
+        source = FakeSource(2, self.item)
+        pacer = Pacer(source, lead=0.0, clock=self.clock,
+                      sleep=self.clock.sleep)
+
+        pacer.get_buffer(False)
+        with pytest.raises(g.Buffer.NotReady):
+            pacer.get_buffer(False)
+        assert pacer.due() == pytest.approx(100.1)
+
+        self.clock.now = 100.1
+        pacer.get_buffer(False)
+
+    def test_late(self):
+        source = FakeSource(3, self.item)
+        pacer = Pacer(source, lead=0.0, jitter=0.1, clock=self.clock,
+                      sleep=self.clock.sleep)
+
+        pacer.get_buffer()
+        self.clock.now += 0.5
+        pacer.get_buffer()
+        stats = pacer.stats
+        assert stats.late == 1
+        assert stats.max_late == pytest.approx(0.4)
+        assert stats.resyncs == 1
+
+        # After a resync the next buffer is scheduled from the new anchor
+        pacer.get_buffer()
+        assert self.clock() == pytest.approx(100.6)
@@ -0,0 +1,115 @@
+"""
+Test groove.player
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+import groove as g
+
+
+class FakePlayer(object):
+    def __init__(self, events):
+        self.events = list(events)
+        self.position_calls = 0
+
+    def event_get(self, block=False):
+        return self.events.pop(0) if self.events else None
+
+    def position(self):
+        self.position_calls += 1
+        return None, float(self.position_calls)
+
+
+class TestPlayerEventDispatcher():
+    def test_poll(self):
+        dispatcher = g.PlayerEventDispatcher()
+        a = FakePlayer([])
+        b = FakePlayer([])
+
+        seen = []
+        dispatcher.add_player(a)
+        dispatcher.subscribe(seen.append)
+        underruns = dispatcher.subscribe_queue(
+            events=[g.PlayerEvent.buffer_underrun])
+        from_b = dispatcher.subscribe_queue(player=b)
+
+        # Poll from this thread instead
+        dispatcher.stop()
+        a.events = [g.PlayerEvent.now_playing, g.PlayerEvent.buffer_underrun]
+        b.events = [g.PlayerEvent.now_playing]
+        assert dispatcher.poll() == 3
+        assert dispatcher.poll() == 0
+
+        assert sorted(i.event for i in seen) == [
+            g.PlayerEvent.now_playing,
+            g.PlayerEvent.now_playing,
+            g.PlayerEvent.buffer_underrun,
+        ]
+        assert underruns.get_nowait().player is a
+        assert underruns.empty()
+        assert from_b.get_nowait().event == g.PlayerEvent.now_playing
+        assert from_b.empty()
+
+        # Position is read once per event
+        assert a.position_calls == 2
+        assert b.position_calls == 1
+
+    def test_unsubscribe(self):
+        dispatcher = g.PlayerEventDispatcher()
+        player = FakePlayer([g.PlayerEvent.now_playing] * 2)
+        dispatcher._players.add(player)
+
+        seen = []
+        handle = dispatcher.subscribe(seen.append)
+        events = dispatcher.subscribe_queue()
+        dispatcher.unsubscribe(handle)
+        dispatcher.unsubscribe(events)
+        assert dispatcher.poll() == 2
+        assert seen == []
+        assert events.empty()
+
+    def test_callback_error(self):
+        dispatcher = g.PlayerEventDispatcher()
+        dispatcher._players.add(FakePlayer([g.PlayerEvent.now_playing]))
+
+        def fail(info):
+            raise RuntimeError()
+
+        seen = []
+        dispatcher.subscribe(fail)
+        dispatcher.subscribe(seen.append)
+        assert dispatcher.poll() == 1
+        assert len(seen) == 1
+
+    def test_player_error(self):
+        dispatcher = g.PlayerEventDispatcher()
+        broken = FakePlayer([])
+        broken.event_get = None
+        dispatcher._players.add(broken)
+        dispatcher._players.add(FakePlayer([g.PlayerEvent.now_playing]))
+
+        seen = []
+        dispatcher.subscribe(seen.append)
+        assert dispatcher.poll() == 1
+        assert len(seen) == 1
+
+    def test_dummy_device(self):
+        with g.File('tests/samples/mono-180hz.mp3') as gfile:
+            playlist = g.Playlist()
+            playlist.append(gfile)
+            player = g.Player()
+            dispatcher = g.PlayerEventDispatcher()
+            events = dispatcher.subscribe_queue(
+                player, events=[g.PlayerEvent.now_playing])
+            try:
+                player.playlist = playlist
+                info = events.get(timeout=5)
+            finally:
+                dispatcher.stop()
+                player.playlist = None
+                playlist.clear()
+
+        assert info.player is player
+        assert info.event == g.PlayerEvent.now_playing
+        assert info.seconds >= 0
@@ -49,6 +49,23 @@ class TestPlaylist:
         assert playlist[0].file == self.files[0]
         assert playlist[1].file == self.files[1]
 
+    def test_getitem(self):
+        playlist = g.Playlist()
+        playlist.extend(self.files)
+        assert len(playlist) == 3
+        assert playlist[-1].file == self.files[2]
+        assert playlist[-3].file == self.files[0]
+        with pytest.raises(IndexError):
+            playlist[3]
+        with pytest.raises(IndexError):
+            playlist[-4]
+
+    def test_iter(self):
+        playlist = g.Playlist()
+        playlist.extend(self.files)
+        assert [item.file for item in playlist] == self.files
+        assert [item.file for item in reversed(playlist)] == self.files[::-1]
+
     def test_clear(self):
         playlist = g.Playlist()
         playlist.extend(self.files)
@@ -0,0 +1,94 @@
+"""
+Test groove.profiling
+"""
+from __future__ import absolute_import, unicode_literals
+
+import groove as g
+from groove import profiling
+from groove.profiling import Profiler
+
+
+def decode(path):
+    gfile = g.File(path)
+    gfile.open()
+    playlist = g.Playlist()
+    sink = g.Sink()
+    sink.playlist = playlist
+    playlist.append(gfile)
+    try:
+        while True:
+            try:
+                sink.get_buffer(True).unref()
+            except g.Buffer.End:
+                break
+    finally:
+        sink.playlist = None
+        playlist.clear()
+        gfile.close()
+
+
+class TestProfiler():
+    def teardown_method(self, method):
+        profiling.reset()
+
+    def test_disabled(self):
+        get_buffer = g.Sink.__dict__['get_buffer']
+        assert not profiling.is_enabled()
+
+        decode('tests/samples/stereo-440hz.mp3')
+        assert profiling.snapshot() == {}
+
+        with Profiler():
+            assert profiling.is_enabled()
+            assert g.Sink.__dict__['get_buffer'] is not get_buffer
+        assert not profiling.is_enabled()
+        assert g.Sink.__dict__['get_buffer'] is get_buffer
+
+    def test_decode(self):
+        with Profiler() as prof:
+            decode('tests/samples/stereo-440hz.mp3')
+
+        stats = prof.stats()
+        assert stats['File.open'].calls == 1
+        assert stats['File.close'].calls == 1
+        assert stats['Playlist.clear'].calls == 1
+
+        get_buffer = stats['Sink.get_buffer']
+        # The last call raised Buffer.End, which is not an error
+        assert get_buffer.errors == 0
+        assert get_buffer.calls > 1
+        assert get_buffer.bytes > 0
+        assert sum(get_buffer.histogram) == get_buffer.calls
+        assert 0 < get_buffer.min <= get_buffer.max <= get_buffer.total
+
+        assert profiling.snapshot() == stats
+        assert 'Sink.get_buffer' in prof.report()
+
+    def test_nested(self):
+        gfile = g.File('tests/samples/stereo-440hz.mp3')
+        with Profiler() as outer:
+            with Profiler() as inner:
+                gfile.open()
+                gfile.close()
+            assert profiling.is_enabled()
+            gfile.open()
+            gfile.close()
+
+        assert inner.stats()['File.open'].calls == 1
+        assert outer.stats()['File.open'].calls == 2
+        assert not profiling.is_enabled()
+
+    def test_generator(self):
+        gfile = g.File('tests/samples/stereo-440hz.mp3')
+        gfile.open()
+        playlist = g.Playlist()
+        playlist.append(gfile)
+        detector = g.LoudnessDetector()
+        with Profiler() as prof:
+            detector.playlist = playlist
+            infos = list(detector)
+            detector.playlist = None
+        playlist.clear()
+        gfile.close()
+
+        assert prof.stats()['LoudnessDetector.__iter__'].calls == len(infos)
@@ -0,0 +1,137 @@
+"""
+Test groove.Queue
+"""
+from __future__ import absolute_import, unicode_literals
+
+import threading
+
+import pytest
+
+import groove as g
+from groove._groove import ffi
+
+
+class TestQueue():
+    def setup_method(self, method):
+        self.discarded = []
+        self.queue = g.Queue(cleanup=self.discarded.append)
+
+    def teardown_method(self, method):
+        self.queue.close()
+
+    def items(self, count):
+        return [ffi.new('int *', n) for n in range(count)]
+
+    def test_fifo(self):
+        items = self.items(3)
+        for item in items:
+            self.queue.put(item)
+        assert self.queue.peek()
+        assert [self.queue.get() for _ in items] == items
+        assert not self.queue.peek()
+        with pytest.raises(g.Queue.Empty):
+            self.queue.get(block=False)
+
+    def test_threads(self):
+        items = self.items(1000)
+        got = []
+
+        def consume():
+            for _ in items:
+                got.append(self.queue.get())
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        for item in items:
+            self.queue.put(item)
+        thread.join()
+        assert got == items
+
+    def test_abort(self):
+        errors = []
+
+        def consume():
+            try:
+                self.queue.get()
+            except g.Queue.Aborted as exc:
+                errors.append(exc)
+
+        thread = threading.Thread(target=consume)
+        thread.start()
+        thread.join(0.1)
+        assert thread.is_alive()
+
+        self.queue.abort()
+        thread.join()
+        assert len(errors) == 1
+        with pytest.raises(g.Queue.Aborted):
+            self.queue.put(self.items(1)[0])
+        with pytest.raises(g.Queue.Aborted):
+            self.queue.get(block=False)
+        assert self.queue._state.held == {}
+
+        self.queue.reset()
+        item = self.items(1)[0]
+        self.queue.put(item)
+        assert self.queue.get() is item
+
+    def test_flush(self):
+        items = self.items(3)
+        for item in items:
+            self.queue.put(item)
+        self.queue.flush()
+        assert self.discarded == items
+        with pytest.raises(g.Queue.Empty):
+            self.queue.get(block=False)
+
+    def test_purge(self):
+        items = self.items(4)
+        for item in items:
+            self.queue.put(item)
+        self.queue.purge(lambda item: item[0] % 2)
+        assert self.discarded == items[1::2]
+        assert [self.queue.get(), self.queue.get()] == items[::2]
+
+    def test_close(self):
+        items = self.items(2)
+        for item in items:
+            self.queue.put(item)
+        self.queue.close()
+        assert self.discarded == items
+        assert self.queue._obj is None
+
+        self.queue.close()
+        with pytest.raises(ValueError):
+            self.queue.put(items[0])
+        with pytest.raises(ValueError):
+            self.queue.get(block=False)
+        with pytest.raises(ValueError):
+            self.queue.abort()
+
+
+class TestBufferQueue():
+    def setup_method(self, method):
+        self.gfile = g.File('tests/samples/stereo-440hz.mp3')
+        self.gfile.open()
+        self.playlist = g.Playlist()
+        self.sink = g.Sink()
+        self.sink.playlist = self.playlist
+        self.playlist.append(self.gfile)
+
+    def teardown_method(self, method):
+        self.sink.playlist = None
+        self.playlist.clear()
+        self.gfile.close()
+
+    def test_unref_on_flush(self):
+        account = self.sink.buffer_account
+        with g.Queue() as queue:
+            buffs = [self.sink.get_buffer(True) for _ in range(3)]
+            for buff in buffs:
+                queue.put(buff)
+            assert queue.get() is buffs[0]
+            buffs[0].unref()
+            assert account.count == 2
+
+            queue.flush()
+            assert account.count == 0
@@ -0,0 +1,61 @@
+"""
+Test groove.replaygain
+"""
+from __future__ import absolute_import, unicode_literals
+
+import os
+
+import pytest
+
+from groove import replaygain
+
+
+FILES = [
+    'tests/samples/mono-180hz.mp3',
+    'tests/samples/mono-261hz.mp3',
+    'tests/samples/stereo-440hz.mp3',
+]
+
+
+def test_loudness_to_replaygain():
+    assert replaygain.loudness_to_replaygain(-18.0) == 0.0
+    assert replaygain.loudness_to_replaygain(-23.0) == 5.0
+    assert replaygain.loudness_to_replaygain(-100.0) == 51.0
+    assert replaygain.loudness_to_replaygain(100.0) == -51.0
+
+
+class TestGroupAlbums():
+    def test_directory(self):
+        albums = replaygain.group_albums(FILES, 'directory')
+        assert list(albums.values()) == [FILES]
+        assert list(albums.keys()) == [os.path.abspath('tests/samples')]
+
+    def test_file(self):
+        albums = replaygain.group_albums(FILES, 'file')
+        assert list(albums.values()) == [[f] for f in FILES]
+
+    def test_unknown(self):
+        with pytest.raises(ValueError):
+            replaygain.group_albums(FILES, 'genre')
+
+
+class TestAnalyze():
+    def test_album(self):
+        result = replaygain.analyze_album('samples', FILES)
+        assert result.name == 'samples'
+        assert [t.filename for t in result.tracks] == FILES
+        assert result.gain is not None
+        assert 0.0 < result.peak <= 1.0
+
+    def test_track_only(self):
+        result = replaygain.analyze_album('samples', FILES, album=False)
+        assert len(result.tracks) == 3
+        assert result.gain is None
+        assert result.peak is None
+
+    def test_library(self):
+        results = list(replaygain.analyze_library(FILES, by='file',
+                                                  workers=2))
+        assert sorted(r.name for r in results) == sorted(FILES)
+        for result in results:
+            assert len(result.tracks) == 1
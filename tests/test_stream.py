@@ -0,0 +1,96 @@
+"""
+Test groove.stream
+"""
+from __future__ import absolute_import, unicode_literals
+
+import asyncio
+
+import pytest
+
+import groove as g
+from groove.stream import RingBuffer, StreamServer
+
+
+class TestRingBuffer():
+    def test_append(self):
+        ring = RingBuffer(3)
+        for n in range(5):
+            ring.append(n)
+
+        assert ring.start == 2
+        assert ring.end == 5
+        assert len(ring) == 3
+        assert [ring[n] for n in range(2, 5)] == [2, 3, 4]
+
+    def test_overwritten(self):
+        ring = RingBuffer(2)
+        for n in range(3):
+            ring.append(n)
+
+        with pytest.raises(IndexError):
+            ring[0]
+        with pytest.raises(IndexError):
+            ring[3]
+
+
+class TestStreamServer():
+    def setup_method(self, method):
+        self.gfile = g.File('tests/samples/stereo-440hz.mp3')
+        self.gfile.open()
+        self.playlist = g.Playlist()
+        self.playlist.append(self.gfile)
+        self.encoder = g.Encoder()
+        self.encoder.format_short_name = 'mp3'
+        self.encoder.codec_short_name = 'mp3'
+        self.encoder.mime_type = 'audio/mpeg'
+
+    def teardown_method(self, method):
+        self.encoder.playlist = None
+        self.playlist.clear()
+        self.gfile.close()
+
+    def _fetch(self, server, path='/'):
+        async def fetch():
+            await server.start()
+            reader, writer = await asyncio.open_connection(
+                server.host, server.port)
+            writer.write(('GET %s HTTP/1.0\r\n\r\n' % path).encode())
+            response = await reader.read()
+            writer.close()
+            await server.stop()
+            return response
+
+        return asyncio.run(fetch())
+
+    def test_stream(self):
+        server = StreamServer(self.encoder, port=0, ring_size=4096)
+        self.encoder.playlist = self.playlist
+        response = self._fetch(server)
+
+        head, body = response.split(b'\r\n\r\n', 1)
+        assert head.startswith(b'HTTP/1.0 200 OK')
+        assert b'Content-Type: audio/mpeg' in head
+        assert body.startswith(b''.join(server.header))
+        assert len(body) > 0
+
+    def test_not_found(self):
+        server = StreamServer(self.encoder, port=0)
+        self.encoder.playlist = self.playlist
+        response = self._fetch(server, '/other')
+        assert response.startswith(b'HTTP/1.0 404')
+
+    def test_stop_while_reading(self):
+        # Stop right away, while the reader is still in get_buffer
+        server = StreamServer(self.encoder, port=0)
+        self.encoder.playlist = self.playlist
+
+        async def run():
+            await server.start()
+            reader = server._reader
+            await server.stop()
+            return reader
+
+        reader = asyncio.run(run())
+        assert not reader.is_alive()
+        assert self.encoder.playlist is None
+        assert server.finished
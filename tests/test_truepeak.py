@@ -0,0 +1,53 @@
+"""
+Test groove.truepeak
+"""
+from __future__ import absolute_import, unicode_literals
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import groove as g
+from groove.truepeak import TruePeakDetector, polyphase_filter, _PeakState
+
+
+def test_polyphase_filter():
+    phases = polyphase_filter(4, 48)
+    assert phases.shape == (48, 4)
+    # Every phase passes DC unchanged
+    assert np.allclose(phases.sum(axis=0), 1.0, atol=1e-4)
+
+
+def test_inter_sample_peak():
+    # A quarter sample rate sine sampled 45 degrees off its peak
+    n = np.arange(48000)
+    wave = 0.5 * np.sin(np.pi / 2 * n + np.pi / 4)
+    state = _PeakState(polyphase_filter(), 1)
+    for start in range(0, len(wave), 4096):
+        state.feed(wave[start:start + 4096, None])
+
+    assert state.sample_peak == pytest.approx(0.3536, abs=1e-3)
+    assert state.true_peak == pytest.approx(0.5, abs=0.01)
+    assert state.frames == 48000
+
+
+def test_detector():
+    with g.File('tests/samples/mono-180hz.mp3') as gf0, \
+            g.File('tests/samples/stereo-440hz.mp3') as gf1:
+        playlist = g.Playlist()
+        playlist.extend([gf0, gf1])
+        detector = TruePeakDetector()
+        detector.playlist = playlist
+
+        infos = list(detector)
+        assert infos[0].playlist_item.file == gf0
+        assert infos[1].playlist_item.file == gf1
+        detector.playlist = None
+        playlist.clear()
+
+    assert len(infos) == 3
+    assert infos[-1].playlist_item is None
+    for info in infos:
+        assert info.true_peak >= info.sample_peak > 0.0
+    assert infos[-1].duration == pytest.approx(
+        infos[0].duration + infos[1].duration)
@@ -0,0 +1,87 @@
+"""
+Test groove.tuning
+"""
+from __future__ import absolute_import, unicode_literals
+
+import groove as g
+from groove.tuning import BufferTuner
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestBufferTuner():
+    def setup_method(self, method):
+        self.clock = FakeClock()
+        self.gfile = g.File('tests/samples/stereo-440hz.mp3')
+        self.gfile.open()
+        self.playlist = g.Playlist()
+        self.playlist.append(self.gfile)
+
+        self.player = g.Player()
+        self.player.device = g.Player.dummy_device
+        self.player.device_buffer_size = 1024
+        self.player.sink_buffer_size = 8192
+        self.player.playlist = self.playlist
+
+        self.dispatcher = g.PlayerEventDispatcher()
+        self.tuner = BufferTuner(self.player, self.dispatcher, window=1.0,
+                                 stable_windows=2, clock=self.clock)
+        # Keep decisions independent of decoding speed
+        self.tuner.sample_headroom = lambda: None
+
+    def teardown_method(self, method):
+        self.tuner.close()
+        self.dispatcher.stop()
+        self.player.playlist = None
+        self.playlist.clear()
+        self.gfile.close()
+
+    def underrun(self):
+        self.tuner._on_event(None)
+
+    def window(self):
+        self.clock.now += 1.0
+        return self.tuner.step()
+
+    def test_grow(self):
+        self.underrun()
+        assert not self.tuner.step()
+        assert self.window()
+
+        assert self.player.device_buffer_size == 2048
+        assert self.player.sink_buffer_size == 8192
+        assert self.player.playlist is self.playlist
+
+        report = self.tuner.report()
+        assert report.underruns == 1
+        assert report.reopens == 1
+        assert report.device_latency > 0
+
+    def test_shrink(self):
+        assert not self.window()
+        assert self.window()
+        assert self.player.device_buffer_size == 512
+
+        # 512 underruns, back to 1024 for good
+        self.underrun()
+        assert self.window()
+        assert self.player.device_buffer_size == 1024
+
+        assert not self.window()
+        assert self.window()
+        assert self.player.device_buffer_size == 1024
+        assert self.player.sink_buffer_size == 4096
+
+    def test_headroom_past_last_item(self):
+        del self.tuner.sample_headroom
+        item = self.playlist[0]
+        self.player.position = lambda: (item, 1.0)
+        self.playlist.decode_position = lambda: (None, -1.0)
+        assert self.tuner.sample_headroom() is None
+        assert not self.tuner.step()
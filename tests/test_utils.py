@@ -1,10 +1,12 @@
 from __future__ import absolute_import, unicode_literals
 
 from enum import IntEnum
+import threading
 
 import pytest
 
 from groove import utils
+from groove._groove import ffi
 
 class TestUniqueEnum():
     """Test the utils.unique_enum decorator"""
@@ -28,3 +30,29 @@ class TestUniqueEnum():
         assert MyEnum.__values__[-1] == MyEnum.x
         assert MyEnum.__values__[0] == MyEnum.y
         assert MyEnum.__values__[1] == MyEnum.z
+
+
+class TestScratch():
+    """Test utils.Scratch"""
+
+    def test_reused(self):
+        """It should return the same cdata on the same thread"""
+        scratch = utils.Scratch(ffi, seconds='double *')
+        assert ffi.typeof(scratch.seconds) is ffi.typeof('double *')
+        assert scratch.seconds is scratch.seconds
+
+    def test_threads(self):
+        """It should allocate separate cdata for every thread"""
+        scratch = utils.Scratch(ffi, seconds='double *')
+        scratch.seconds[0] = 1.0
+        seen = []
+
+        def run():
+            seen.append(scratch.seconds[0])
+            scratch.seconds[0] = 2.0
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        assert seen == [0.0]
+        assert scratch.seconds[0] == 1.0